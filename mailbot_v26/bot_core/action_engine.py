@@ -16,10 +16,11 @@ class ActionFacts:
     confidence: float
 
 
-_AMOUNT_RE = re.compile(r"(?P<amount>\d+[\d\s]*[\.,]?\d*)\s*(?P<currency>₽|руб|рублей|usd|eur|€|\$)?", re.IGNORECASE)
-_DATE_RE = re.compile(r"(\d{1,2}[./-]\d{1,2}[./-]\d{2,4})")
-_DOC_RE = re.compile(r"(?:№|no\.?|num(?:ber)?)[\s:]*([A-Za-z0-9_-]{3,})", re.IGNORECASE)
-_ACTION_RE = re.compile(r"(оплатить|оплата|pay|payment|approve|утвердить|подписать)", re.IGNORECASE)
+# Public: the extractive condenser and progressive fact coverage reuse these.
+AMOUNT_RE = re.compile(r"(?P<amount>\d+[\d\s]*[\.,]?\d*)\s*(?P<currency>₽|руб|рублей|usd|eur|€|\$)?", re.IGNORECASE)
+DATE_RE = re.compile(r"(\d{1,2}[./-]\d{1,2}[./-]\d{2,4})")
+DOC_RE = re.compile(r"(?:№|no\.?|num(?:ber)?)[\s:]*([A-Za-z0-9_-]{3,})", re.IGNORECASE)
+ACTION_RE = re.compile(r"(оплатить|оплата|pay|payment|approve|утвердить|подписать)", re.IGNORECASE)
 _URGENT_RE = re.compile(r"(срочно|urgent|asap|немедленно)", re.IGNORECASE)
 
 
@@ -36,10 +37,10 @@ def analyze_action(text: str) -> ActionFacts:
     and returns a conservative confidence score.
     """
 
-    amount_match = _AMOUNT_RE.search(text)
-    date_match = _DATE_RE.search(text)
-    doc_match = _DOC_RE.search(text)
-    action_match = _ACTION_RE.search(text)
+    amount_match = AMOUNT_RE.search(text)
+    date_match = DATE_RE.search(text)
+    doc_match = DOC_RE.search(text)
+    action_match = ACTION_RE.search(text)
     urgency_match = _URGENT_RE.search(text)
 
     found_fields = sum(
@@ -70,4 +71,4 @@ def analyze_action(text: str) -> ActionFacts:
     )
 
 
-__all__ = ["ActionFacts", "analyze_action"]
+__all__ = ["ACTION_RE", "AMOUNT_RE", "DATE_RE", "DOC_RE", "ActionFacts", "analyze_action"]
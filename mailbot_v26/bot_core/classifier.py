@@ -6,9 +6,10 @@ Section VIII: guaranteed mode—safe handling of corrupt files.
 """
 from __future__ import annotations
 
+import struct
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 
 Category = str
@@ -55,6 +56,26 @@ _GIF_MAGIC = b"GIF8"
 _TIFF_MAGIC = (b"II*\x00", b"MM\x00*")
 _TEXT_PRINTABLE = set(range(0x20, 0x7F)) | {0x09, 0x0A, 0x0D}
 
+# Container sniffing (bounded reads only, archives are never decompressed)
+_ZIP_EOCD_MAGIC = b"PK\x05\x06"
+_ZIP_CDH_MAGIC = b"PK\x01\x02"
+_ZIP_EOCD_SIZE = 22
+_ZIP_EOCD_SEARCH = _ZIP_EOCD_SIZE + 0xFFFF  # EOCD record + max comment length
+_ZIP_CDH_SIZE = 46
+_ZIP_MAX_ENTRIES = 2048
+_OOXML_CONTENT_TYPES = "[Content_Types].xml"
+_OOXML_PREFIXES: Tuple[Tuple[str, Category], ...] = (("word/", "DOCX"), ("xl/", "XLSX"))
+
+_OLE_HEADER_SIZE = 512
+_OLE_DIR_ENTRY_SIZE = 128
+_OLE_MAX_DIR_SECTORS = 64
+_OLE_MAX_REGULAR_SECTOR = 0xFFFFFFFA
+_OLE_STREAMS: dict[str, Category] = {
+    "WordDocument": "DOC",
+    "Workbook": "XLS",
+    "Book": "XLS",  # Excel 5.0/95
+}
+
 
 @dataclass(frozen=True)
 class AttachmentProbe:
@@ -99,19 +120,19 @@ def classify_attachment(filename: str = "", mime_type: str = "", content_bytes:
     if any(head.startswith(sig) for sig in _TIFF_MAGIC):
         return "IMAGE"
     if head.startswith(_DOC_MAGIC):
-        # Legacy OLE container: decide between DOC/XLS only if filename hints; else UNKNOWN.
+        # Legacy OLE container: filename hint first, then the directory stream.
         if suffix == ".doc":
             return "DOC"
         if suffix == ".xls":
             return "XLS"
-        return "UNKNOWN"
+        return _sniff_ole_container(probe.content_bytes) or "UNKNOWN"
     if head.startswith(_ZIP_MAGIC):
-        # Could be DOCX/XLSX/other ZIP—use filename hint only.
+        # Could be DOCX/XLSX/other ZIP: filename hint first, then the central directory.
         if suffix == ".docx":
             return "DOCX"
         if suffix == ".xlsx":
             return "XLSX"
-        return "UNKNOWN"
+        return _sniff_zip_container(probe.content_bytes) or "UNKNOWN"
 
     # 4) Light text heuristic for plain text fallbacks
     if head and _looks_like_text(probe.content_bytes):
@@ -133,6 +154,94 @@ def classify_by_keywords(filename: str, text_sample: str = "", content_type: str
     return (category, 1.0)
 
 
+def _sniff_zip_container(data: bytes) -> Optional[Category]:
+    """Tell DOCX from XLSX by reading only the ZIP central directory.
+
+    Entry names are read straight from the buffer; no member is inflated.
+    Returns ``None`` for plain archives, ZIP64 and anything malformed.
+    """
+
+    try:
+        view = memoryview(data)
+        eocd = data.rfind(_ZIP_EOCD_MAGIC, max(0, len(data) - _ZIP_EOCD_SEARCH))
+        if eocd < 0 or eocd + _ZIP_EOCD_SIZE > len(data):
+            return None
+        entries, cd_size, cd_offset = struct.unpack_from("<HII", data, eocd + 10)
+        if cd_offset + cd_size > eocd:
+            return None
+
+        has_content_types = False
+        found: Optional[Category] = None
+        pos = cd_offset
+        for _ in range(min(entries, _ZIP_MAX_ENTRIES)):
+            if pos + _ZIP_CDH_SIZE > eocd or view[pos:pos + 4] != _ZIP_CDH_MAGIC:
+                return None
+            name_len, extra_len, comment_len = struct.unpack_from("<HHH", data, pos + 28)
+            name = bytes(view[pos + _ZIP_CDH_SIZE:pos + _ZIP_CDH_SIZE + name_len]).decode("cp437", errors="replace")
+            if name == _OOXML_CONTENT_TYPES:
+                has_content_types = True
+            elif found is None:
+                for prefix, category in _OOXML_PREFIXES:
+                    if name.startswith(prefix):
+                        found = category
+                        break
+            if has_content_types and found:
+                return found
+            pos += _ZIP_CDH_SIZE + name_len + extra_len + comment_len
+    except (struct.error, ValueError):
+        return None
+    return None
+
+
+def _sniff_ole_container(data: bytes) -> Optional[Category]:
+    """Tell DOC from XLS by walking the OLE directory stream.
+
+    Only the header, the FAT sectors referenced by the header DIFAT and the
+    directory sectors themselves are touched, with a hard cap on the chain.
+    """
+
+    try:
+        if len(data) < _OLE_HEADER_SIZE:
+            return None
+        sector_size = 1 << struct.unpack_from("<H", data, 30)[0]
+        if sector_size not in (512, 4096):
+            return None
+        first_dir_sector = struct.unpack_from("<I", data, 48)[0]
+        difat = struct.unpack_from("<109I", data, 76)
+        per_fat_sector = sector_size // 4
+
+        def _sector_offset(sector: int) -> int:
+            return (sector + 1) * sector_size
+
+        def _next_sector(sector: int) -> int:
+            index, slot = divmod(sector, per_fat_sector)
+            if index >= len(difat) or difat[index] >= _OLE_MAX_REGULAR_SECTOR:
+                return _OLE_MAX_REGULAR_SECTOR
+            offset = _sector_offset(difat[index]) + slot * 4
+            if offset + 4 > len(data):
+                return _OLE_MAX_REGULAR_SECTOR
+            return struct.unpack_from("<I", data, offset)[0]
+
+        sector = first_dir_sector
+        for _ in range(_OLE_MAX_DIR_SECTORS):
+            if sector >= _OLE_MAX_REGULAR_SECTOR:
+                break
+            start = _sector_offset(sector)
+            end = min(start + sector_size, len(data))
+            for entry in range(start, end - _OLE_DIR_ENTRY_SIZE + 1, _OLE_DIR_ENTRY_SIZE):
+                name_len = struct.unpack_from("<H", data, entry + 64)[0]
+                if not 2 <= name_len <= 64:
+                    continue
+                name = data[entry:entry + name_len - 2].decode("utf-16-le", errors="replace")
+                category = _OLE_STREAMS.get(name)
+                if category:
+                    return category
+            sector = _next_sector(sector)
+    except (struct.error, ValueError):
+        return None
+    return None
+
+
 def _looks_like_text(data: bytes, sample: int = 256, binary_threshold: float = 0.10) -> bool:
     sample_bytes = data[:sample]
     if not sample_bytes:
@@ -20,18 +20,26 @@ import io
 import logging
 from typing import Optional, List
 
-try:
-    from pypdf import PdfReader
-except ImportError:  # fail-safe, обработаем ниже
-    PdfReader = None  # type: ignore
+logger = logging.getLogger(__name__)
+
 
-try:
-    import pikepdf
-except ImportError:
-    pikepdf = None  # type: ignore
+def _load_pypdf():
+    """Импортирует pypdf при первом PDF, а не при старте бота."""
+    try:
+        from pypdf import PdfReader  # type: ignore
 
+        return PdfReader
+    except Exception:
+        return None
 
-logger = logging.getLogger(__name__)
+
+def _load_pikepdf():
+    try:
+        import pikepdf  # type: ignore
+
+        return pikepdf
+    except Exception:
+        return None
 
 
 def _safe_join(chunks: List[str], limit: int = 50_000) -> str:
@@ -55,6 +63,7 @@ def _safe_join(chunks: List[str], limit: int = 50_000) -> str:
 
 def _extract_with_pypdf(file_bytes: bytes) -> str:
     """Попытаться вытащить текст с помощью pypdf."""
+    PdfReader = _load_pypdf()
     if PdfReader is None:
         return ""
 
@@ -80,6 +89,7 @@ def _extract_with_pypdf(file_bytes: bytes) -> str:
 
 def _extract_with_pikepdf(file_bytes: bytes) -> str:
     """Fallback-доставка: пробуем pikepdf, если pypdf не дал текста."""
+    pikepdf = _load_pikepdf()
     if pikepdf is None:
         return ""
 
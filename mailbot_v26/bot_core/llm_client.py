@@ -3,14 +3,48 @@
 The client is deliberately lightweight and defensive. If credentials are
 missing or a request fails, the caller receives an empty string to keep
 pipeline stability, satisfying Constitution Section VI.1.
+
+Connections are kept alive in a small pool (stdlib ``http.client`` only),
+so a message with many chunk prompts pays for one TLS handshake instead of
+one per request. 429 and 5xx responses are retried with jittered
+exponential backoff, honouring ``Retry-After`` when the server sends it.
+``stream`` reads Server-Sent Events so callers can stop generation early.
+
+Latency is tracked per model. Socket timeouts follow the recent p99
+instead of the fixed ``timeout`` (which stays the upper bound). A request
+that times out is recorded at its timeout, so p99 grows after a slowdown,
+and each retry doubles the timeout (up to ``timeout``), so a model that
+just got slower is not timed out forever. A
+request still running after the model's p95 is hedged: a duplicate goes
+to ``hedge_model`` (or ``hedge_api_base``) and the first answer wins.
+Hedges are capped at ``hedge_max_ratio`` of all requests, so the extra
+spend stays small. Streams are hedged the same way on their time to first
+byte (tracked separately as ``<model> stream``), and the request that
+loses a race is aborted instead of being left to run.
 """
 from __future__ import annotations
 
+import contextvars
+import http.client
 import json
-import urllib.error
-import urllib.request
+import logging
+import queue
+import random
+import socket
+import threading
+import time
+import urllib.parse
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from mailbot_v26.llm.latency import LatencyTracker
+from mailbot_v26.llm.tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+_RETRY_STATUSES = {429, 500, 502, 503, 504}
 
 
 @dataclass
@@ -18,53 +52,642 @@ class CloudflareConfig:
     account_id: str
     api_token: str
     model: str = "@cf/meta/llama-3-8b-instruct"
+    api_base: str = "https://api.cloudflare.com/client/v4"
+    max_tokens: int = 512
+    timeout: float = 15.0
+    max_retries: int = 3
+    backoff_base: float = 0.5
+    backoff_max: float = 8.0
+    pool_size: int = 4
+    # Adaptive timeouts: timeout_factor * p99, never below min_timeout.
+    min_timeout: float = 3.0
+    timeout_factor: float = 2.0
+    hedge_enabled: bool = True
+    hedge_model: str = ""
+    hedge_api_base: str = ""
+    hedge_max_ratio: float = 0.1
+
+
+class _ConnectionPool:
+    """LIFO pool of keep-alive HTTP(S) connections to a single host."""
+
+    def __init__(self, scheme: str, host: str, port: Optional[int], timeout: float, size: int) -> None:
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[http.client.HTTPConnection]" = queue.LifoQueue(maxsize=max(1, size))
+
+    def new_connection(self) -> http.client.HTTPConnection:
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def acquire(self) -> Tuple[http.client.HTTPConnection, bool]:
+        """Return ``(connection, reused)``."""
+        try:
+            return self._idle.get_nowait(), True
+        except queue.Empty:
+            return self.new_connection(), False
+
+    def release(self, conn: http.client.HTTPConnection) -> None:
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class _Abort:
+    """Lets a hedge race stop the request that lost it.
+
+    ``set`` shuts down the socket the request is using, so a blocked read
+    returns at once, and the request makes no further retries.
+    """
+
+    def __init__(self) -> None:
+        self.started = threading.Event()
+        self._event = threading.Event()
+        self._conn: Optional[http.client.HTTPConnection] = None
+        self._lock = threading.Lock()
+
+    def is_set(self) -> bool:
+        return self._event.is_set()
+
+    def set(self) -> None:
+        with self._lock:
+            self._event.set()
+            conn, self._conn = self._conn, None
+        if conn is not None:
+            _shutdown(conn)
+
+    def attach(self, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            if not self._event.is_set():
+                self._conn = conn
+                return
+        _shutdown(conn)
+
+    def detach(self) -> bool:
+        """Forget the connection; False when it was aborted (do not reuse it)."""
+        with self._lock:
+            self._conn = None
+            return not self._event.is_set()
 
 
 class CloudflareLLMClient:
-    """Minimal Cloudflare AI REST client."""
+    """Cloudflare AI REST client with pooled connections and retries.
+
+    Instances are callable (``client(prompt)``) so they can be used directly
+    as ``BotConfig.llm_call``. ``on_tokens`` receives the token count of
+    every successful request (``StateManager.add_tokens`` in production).
+    """
+
+    # ``LLMSummarizer`` may pass ``max_tokens``/``model`` keyword options.
+    accepts_options = True
 
-    def __init__(self, config: CloudflareConfig) -> None:
+    def __init__(
+        self,
+        config: CloudflareConfig,
+        on_tokens: Optional[Callable[[int], None]] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
         self.config = config
+        self.on_tokens = on_tokens
+        self._sleep = sleep
+        self._base_path, self._pool = self._endpoint(config.api_base)
+        self._hedge_base_path, self._hedge_pool = (
+            self._endpoint(config.hedge_api_base) if config.hedge_api_base else (self._base_path, self._pool)
+        )
+        self.latency = LatencyTracker()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.requests_made = 0
+        self.hedge_eligible = 0
+        self.hedges_sent = 0
+        self.hedges_won = 0
 
-    def _build_request(self, prompt: str, data: str) -> urllib.request.Request:
-        url = (
-            f"https://api.cloudflare.com/client/v4/accounts/"
-            f"{self.config.account_id}/ai/run/{self.config.model}"
+    def _endpoint(self, api_base: str) -> Tuple[str, _ConnectionPool]:
+        parsed = urllib.parse.urlsplit(api_base)
+        pool = _ConnectionPool(
+            parsed.scheme or "https",
+            parsed.hostname or "api.cloudflare.com",
+            parsed.port,
+            self.config.timeout,
+            self.config.pool_size,
         )
-        payload = json.dumps(
-            {
-                "messages": [
-                    {"role": "system", "content": prompt},
-                    {"role": "user", "content": data},
-                ]
-            }
-        ).encode("utf-8")
+        return parsed.path.rstrip("/"), pool
 
-        request = urllib.request.Request(url, data=payload, method="POST")
-        request.add_header("Authorization", f"Bearer {self.config.api_token}")
-        request.add_header("Content-Type", "application/json")
-        return request
+    def _path(self, model: str, base_path: Optional[str] = None) -> str:
+        base = self._base_path if base_path is None else base_path
+        return f"{base}/accounts/{self.config.account_id}/ai/run/{model}"
 
-    def generate(self, prompt: str, data: str) -> str:
-        """Return model output or empty string on failure."""
+    def _latency_key(self, model: str, hedge: bool) -> str:
+        return f"{model}@hedge" if hedge and self.config.hedge_api_base else model
+
+    def _stream_key(self, model: str, hedge: bool) -> str:
+        # Time to first byte of a stream is not comparable with a full answer.
+        return f"{self._latency_key(model, hedge)} stream"
+
+    def _timeout_for(self, key: str) -> float:
+        p99 = self.latency.percentile(key, 99)
+        if p99 is None:
+            return self.config.timeout
+        return min(self.config.timeout, max(self.config.min_timeout, p99 * self.config.timeout_factor))
+
+    def _timed_out(self, key: str, timeout: Optional[float], exc: BaseException) -> Optional[float]:
+        """Timeout for the next attempt; a timed-out one counts as a sample."""
+        if timeout is None:
+            return None
+        if key and isinstance(exc, TimeoutError):
+            # Censored: the request took at least this long.
+            self.latency.record(key, timeout)
+        return min(self.config.timeout, timeout * 2)
+
+    def _headers(self) -> Dict[str, str]:
+        return {
+            "Authorization": f"Bearer {self.config.api_token}",
+            "Content-Type": "application/json",
+            "Connection": "keep-alive",
+        }
+
+    def _send(
+        self,
+        path: str,
+        payload: bytes,
+        pool: Optional[_ConnectionPool] = None,
+        timeout: Optional[float] = None,
+        abort: Optional[_Abort] = None,
+    ) -> Tuple[http.client.HTTPConnection, http.client.HTTPResponse]:
+        """Send the request and return the connection with its unread response."""
+
+        pool = pool or self._pool
+        conn, reused = pool.acquire()
+        _set_timeout(conn, timeout)
+        if abort is not None:
+            abort.attach(conn)
+        try:
+            conn.request("POST", path, body=payload, headers=self._headers())
+            response = conn.getresponse()
+        except (ConnectionError, http.client.RemoteDisconnected):
+            conn.close()
+            if not reused:
+                raise
+            # The server dropped an idle keep-alive socket; retry once on a fresh one.
+            conn = pool.new_connection()
+            _set_timeout(conn, timeout)
+            if abort is not None:
+                abort.attach(conn)
+            try:
+                conn.request("POST", path, body=payload, headers=self._headers())
+                response = conn.getresponse()
+            except Exception:
+                conn.close()
+                raise
+        except Exception:
+            conn.close()
+            raise
+        with self._lock:
+            self.requests_made += 1
+        return conn, response
+
+    def _finish(
+        self,
+        conn: http.client.HTTPConnection,
+        response: http.client.HTTPResponse,
+        pool: Optional[_ConnectionPool] = None,
+        abort: Optional[_Abort] = None,
+    ) -> None:
+        if response.will_close or (abort is not None and not abort.detach()):
+            conn.close()
+        else:
+            (pool or self._pool).release(conn)
+
+    def _post(
+        self,
+        path: str,
+        payload: bytes,
+        pool: Optional[_ConnectionPool] = None,
+        timeout: Optional[float] = None,
+        abort: Optional[_Abort] = None,
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        conn, response = self._send(path, payload, pool, timeout, abort)
+        try:
+            body = response.read()
+            headers = {key.lower(): value for key, value in response.getheaders()}
+        except Exception:
+            conn.close()
+            raise
+        self._finish(conn, response, pool, abort)
+        return response.status, headers, body
+
+    def _backoff(self, attempt: int, retry_after: Optional[str]) -> float:
+        if retry_after:
+            try:
+                return min(self.config.backoff_max, max(0.0, float(retry_after)))
+            except ValueError:
+                pass
+        ceiling = min(self.config.backoff_max, self.config.backoff_base * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    def _run(self, messages: list[dict[str, str]], model: Optional[str] = None, max_tokens: Optional[int] = None) -> str:
         if not self.config.account_id or not self.config.api_token:
             return ""
 
+        model = model or self.config.model
+        if not self.config.hedge_enabled:
+            return self._timed_run(messages, model, max_tokens)
+        with self._lock:
+            self.hedge_eligible += 1
+        delay = self.latency.percentile(model, 95)
+        if delay is None:
+            return self._timed_run(messages, model, max_tokens)
+        hedge_model = self.config.hedge_model or model
+        return self._race(
+            lambda hedge, abort: self._timed_run(
+                messages, hedge_model if hedge else model, max_tokens, hedge, abort
+            ),
+            delay,
+            model,
+            hedge_model,
+        ) or ""
+
+    def _submit(self, job: Callable[[bool, _Abort], Any], hedge: bool, abort: _Abort) -> Any:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.config.pool_size * 2 + 2, thread_name_prefix="llm-hedge"
+                )
+            executor = self._executor
+
+        def run() -> Any:
+            abort.started.set()
+            return job(hedge, abort)
+
+        # Each job gets its own context copy (token accounting follows it).
+        return executor.submit(contextvars.copy_context().run, run)
+
+    def _race(
+        self,
+        job: Callable[[bool, _Abort], Any],
+        delay: float,
+        model: str,
+        hedge_model: str,
+        discard: Optional[Callable[[Any], None]] = None,
+    ) -> Any:
+        """Run ``job`` and hedge it once it is slower than ``delay``.
+
+        ``job(hedge, abort)`` returns a falsy value on failure. The first
+        truthy result wins; the other request is aborted and a late result
+        of it is passed to ``discard``.
+        """
+
+        primary_abort = _Abort()
+        primary = self._submit(job, False, primary_abort)
+        # The delay counts from the moment the request starts, not from
+        # the time it spent waiting for a free worker.
+        primary_abort.started.wait()
         try:
-            request = self._build_request(prompt, data)
-            with urllib.request.urlopen(request, timeout=15) as response:
-                body = response.read().decode("utf-8")
-            parsed = json.loads(body)
-            choices = parsed.get("result", {}).get("response", {})
-            if isinstance(choices, dict) and "message" in choices:
-                content = choices["message"].get("content", "")
+            return primary.result(timeout=delay)
+        except FutureTimeout:
+            pass
+
+        with self._lock:
+            allowed = self.hedges_sent + 1 <= self.config.hedge_max_ratio * self.hedge_eligible
+            if allowed:
+                self.hedges_sent += 1
+        if not allowed:
+            return primary.result()
+
+        logger.info("LLM request to %s slower than p95 (%.2fs), hedging to %s", model, delay, hedge_model)
+        hedge_abort = _Abort()
+        hedge = self._submit(job, True, hedge_abort)
+        aborts = {primary: primary_abort, hedge: hedge_abort}
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                if result:
+                    if future is hedge:
+                        with self._lock:
+                            self.hedges_won += 1
+                    for loser in pending:
+                        aborts[loser].set()
+                        if discard is not None:
+                            loser.add_done_callback(lambda late: late.result() and discard(late.result()))
+                    return result
+        return None
+
+    def _timed_run(
+        self,
+        messages: list[dict[str, str]],
+        model: str,
+        max_tokens: Optional[int],
+        hedge: bool = False,
+        abort: Optional[_Abort] = None,
+    ) -> str:
+        key = self._latency_key(model, hedge)
+        started = time.monotonic()
+        try:
+            result = self._run_once(messages, model, max_tokens, hedge, abort)
+        except Exception:
+            logger.exception("LLM request crashed")
+            return ""
+        if result:
+            self.latency.record(key, time.monotonic() - started)
+        return result
+
+    def _run_once(
+        self,
+        messages: list[dict[str, str]],
+        model: str,
+        max_tokens: Optional[int],
+        hedge: bool = False,
+        abort: Optional[_Abort] = None,
+    ) -> str:
+        payload = json.dumps(
+            {"messages": messages, "max_tokens": max_tokens or self.config.max_tokens}
+        ).encode("utf-8")
+        pool = self._hedge_pool if hedge else self._pool
+        path = self._path(model, self._hedge_base_path if hedge else self._base_path)
+        key = self._latency_key(model, hedge)
+        timeout: Optional[float] = self._timeout_for(key)
+
+        for attempt in range(self.config.max_retries + 1):
+            retry_after: Optional[str] = None
+            try:
+                status, headers, body = self._post(path, payload, pool, timeout, abort)
+            except (OSError, http.client.HTTPException) as exc:
+                if abort is not None and abort.is_set():
+                    return ""
+                logger.warning("LLM request failed: %s", exc)
+                timeout = self._timed_out(key, timeout, exc)
             else:
-                content = parsed.get("result", {}).get("output", "")
-            if isinstance(content, list):
-                content = "".join(str(part) for part in content)
-            return str(content).strip()
-        except (urllib.error.URLError, json.JSONDecodeError, KeyError, TimeoutError, ValueError):
+                if status == 200:
+                    return self._handle_success(messages, body)
+                if status not in _RETRY_STATUSES:
+                    logger.warning("LLM HTTP error %s", status)
+                    return ""
+                retry_after = headers.get("retry-after")
+                logger.warning("LLM HTTP %s, attempt %d", status, attempt + 1)
+            if abort is not None and abort.is_set():
+                return ""
+            if attempt < self.config.max_retries:
+                self._sleep(self._backoff(attempt, retry_after))
+        return ""
+
+    def _handle_success(self, messages: list[dict[str, str]], body: bytes) -> str:
+        try:
+            parsed = json.loads(body.decode("utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError, ValueError):
             return ""
+        content = _parse_content(parsed)
+        self._report_tokens((parsed.get("result") or {}).get("usage"), messages, content)
+        return content
+
+    def _report_tokens(self, usage: Optional[Dict[str, Any]], messages: list[dict[str, str]], content: str) -> None:
+        if self.on_tokens is None:
+            return
+        usage = usage or {}
+        total = usage.get("total_tokens")
+        if not isinstance(total, int):
+            prompt_tokens = usage.get("prompt_tokens")
+            completion_tokens = usage.get("completion_tokens")
+            if isinstance(prompt_tokens, int) and isinstance(completion_tokens, int):
+                total = prompt_tokens + completion_tokens
+            else:
+                total = sum(estimate_tokens(m["content"]) for m in messages) + estimate_tokens(content)
+        try:
+            self.on_tokens(total)
+        except Exception:
+            logger.exception("Token accounting failed")
+
+    def complete(self, prompt: str, model: Optional[str] = None, max_tokens: Optional[int] = None) -> str:
+        """Send ``prompt`` as a single user message. Empty string on failure."""
+        return self._run([{"role": "user", "content": prompt}], model=model, max_tokens=max_tokens)
+
+    __call__ = complete
+
+    def stream(self, prompt: str, model: Optional[str] = None, max_tokens: Optional[int] = None) -> Iterator[str]:
+        """Yield response text as the model generates it (SSE).
+
+        Closing the generator early (``close()`` or leaving a ``for`` loop
+        over it with ``break``) drops the connection, which stops generation
+        on the server side. Failures end the stream without raising, just
+        like ``complete`` returns an empty string.
+        """
+
+        if not self.config.account_id or not self.config.api_token:
+            return
+        messages = [{"role": "user", "content": prompt}]
+        payload = json.dumps(
+            {"messages": messages, "max_tokens": max_tokens or self.config.max_tokens, "stream": True}
+        ).encode("utf-8")
+        opened = self._open_stream_hedged(model or self.config.model, payload)
+        if opened is None:
+            return
+        conn, response, pool = opened
+        if "text/event-stream" not in (response.getheader("Content-Type") or ""):
+            # Server ignored the stream flag and answered with plain JSON.
+            try:
+                body = response.read()
+            except Exception:
+                conn.close()
+                return
+            self._finish(conn, response, pool)
+            content = self._handle_success(messages, body)
+            if content:
+                yield content
+            return
+
+        received: list[str] = []
+        usage: Optional[Dict[str, Any]] = None
+        finished = False
+        try:
+            for data in _iter_sse(response):
+                if data == "[DONE]":
+                    finished = True
+                    break
+                try:
+                    event = json.loads(data)
+                except ValueError:
+                    continue
+                if isinstance(event.get("usage"), dict):
+                    usage = event["usage"]
+                piece = event.get("response")
+                if isinstance(piece, str) and piece:
+                    received.append(piece)
+                    yield piece
+            else:
+                finished = True
+        except (OSError, http.client.HTTPException) as exc:
+            logger.warning("LLM stream interrupted: %s", exc)
+        finally:
+            if finished:
+                try:
+                    response.read()
+                    self._finish(conn, response, pool)
+                except Exception:
+                    conn.close()
+            else:
+                conn.close()
+            self._report_tokens(usage, messages, "".join(received))
+
+    def _open_stream_hedged(
+        self, model: str, payload: bytes
+    ) -> Optional[Tuple[http.client.HTTPConnection, http.client.HTTPResponse, _ConnectionPool]]:
+        if not self.config.hedge_enabled:
+            return self._timed_open(payload, model)
+        with self._lock:
+            self.hedge_eligible += 1
+        delay = self.latency.percentile(self._stream_key(model, False), 95)
+        if delay is None:
+            return self._timed_open(payload, model)
+        hedge_model = self.config.hedge_model or model
+        return self._race(
+            lambda hedge, abort: self._timed_open(payload, hedge_model if hedge else model, hedge, abort),
+            delay,
+            model,
+            hedge_model,
+            discard=lambda opened: opened[0].close(),
+        )
+
+    def _timed_open(
+        self, payload: bytes, model: str, hedge: bool = False, abort: Optional[_Abort] = None
+    ) -> Optional[Tuple[http.client.HTTPConnection, http.client.HTTPResponse, _ConnectionPool]]:
+        key = self._stream_key(model, hedge)
+        pool = self._hedge_pool if hedge else self._pool
+        path = self._path(model, self._hedge_base_path if hedge else self._base_path)
+        started = time.monotonic()
+        try:
+            opened = self._open_stream(path, payload, self._timeout_for(key), pool, abort, key)
+        except Exception:
+            logger.exception("LLM request crashed")
+            return None
+        if opened is None:
+            return None
+        conn, response = opened
+        if abort is not None and not abort.detach():
+            # Lost the race while the headers were arriving.
+            conn.close()
+            return None
+        self.latency.record(key, time.monotonic() - started)
+        return conn, response, pool
+
+    def _open_stream(
+        self,
+        path: str,
+        payload: bytes,
+        timeout: Optional[float] = None,
+        pool: Optional[_ConnectionPool] = None,
+        abort: Optional[_Abort] = None,
+        key: str = "",
+    ) -> Optional[Tuple[http.client.HTTPConnection, http.client.HTTPResponse]]:
+        for attempt in range(self.config.max_retries + 1):
+            retry_after: Optional[str] = None
+            try:
+                conn, response = self._send(path, payload, pool, timeout, abort)
+            except (OSError, http.client.HTTPException) as exc:
+                if abort is not None and abort.is_set():
+                    return None
+                logger.warning("LLM request failed: %s", exc)
+                timeout = self._timed_out(key, timeout, exc)
+            else:
+                if response.status == 200:
+                    return conn, response
+                try:
+                    response.read()
+                    self._finish(conn, response, pool, abort)
+                except Exception:
+                    conn.close()
+                if response.status not in _RETRY_STATUSES:
+                    logger.warning("LLM HTTP error %s", response.status)
+                    return None
+                retry_after = response.getheader("Retry-After")
+                logger.warning("LLM HTTP %s, attempt %d", response.status, attempt + 1)
+            if abort is not None and abort.is_set():
+                return None
+            if attempt < self.config.max_retries:
+                self._sleep(self._backoff(attempt, retry_after))
+        return None
+
+    def generate(self, prompt: str, data: str) -> str:
+        """Return model output or empty string on failure."""
+        return self._run(
+            [
+                {"role": "system", "content": prompt},
+                {"role": "user", "content": data},
+            ]
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+        self._pool.close()
+        if self._hedge_pool is not self._pool:
+            self._hedge_pool.close()
+
+
+def _parse_content(parsed: Dict[str, Any]) -> str:
+    result = parsed.get("result") or {}
+    choices = result.get("response", {})
+    if isinstance(choices, str):
+        content: Any = choices
+    elif isinstance(choices, dict) and "message" in choices:
+        content = choices["message"].get("content", "")
+    else:
+        content = result.get("output", "")
+    if isinstance(content, list):
+        content = "".join(str(part) for part in content)
+    return str(content or "").strip()
+
+
+def _shutdown(conn: http.client.HTTPConnection) -> None:
+    sock = conn.sock
+    if sock is None:
+        return
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
+def _set_timeout(conn: http.client.HTTPConnection, timeout: Optional[float]) -> None:
+    if timeout is None:
+        return
+    conn.timeout = timeout
+    if conn.sock is not None:
+        conn.sock.settimeout(timeout)
+
+
+def _iter_sse(response: http.client.HTTPResponse) -> Iterator[str]:
+    """Yield the ``data`` payload of every Server-Sent Event."""
+
+    data_lines: list[str] = []
+    while True:
+        raw = response.readline()
+        if not raw:
+            break
+        line = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+        if not line:
+            if data_lines:
+                yield "\n".join(data_lines)
+                data_lines = []
+            continue
+        if line.startswith("data:"):
+            value = line[5:]
+            data_lines.append(value[1:] if value.startswith(" ") else value)
+    if data_lines:
+        yield "\n".join(data_lines)
 
 
 def load_prompt(path: Path) -> str:
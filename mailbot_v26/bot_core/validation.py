@@ -2,7 +2,7 @@
 from __future__ import annotations
 
 import re
-from typing import List
+from typing import List, Set, Union
 
 
 def drop_none_tokens(facts_line: str) -> str:
@@ -25,8 +25,22 @@ def clean_none(text: str) -> str:
     return " | ".join(filtered)
 
 
+# Share of a summary's stemmed tokens that must come from the source; also
+# the default of ``[llm] validation_min_similarity``.
+MIN_SIMILARITY = 0.3
+
+_NUMBER_RE = re.compile(r"\d+[\d\s]*[\.,]?\d*")
+_DATE_RE = re.compile(r"\d{1,2}[./-]\d{1,2}[./-]\d{2,4}")
+_TOKEN_RE = re.compile(r"[\w\.]+")
+_DATE_SEPARATORS_RE = re.compile(r"[/-]")
+
+
 def _extract_numbers(text: str) -> List[str]:
-    return [match.strip() for match in re.findall(r"\d+[\d\s]*[\.,]?\d*", text)]
+    return [match.strip() for match in _NUMBER_RE.findall(text)]
+
+
+def _normalize_number(value: str) -> str:
+    return "".join(value.split()).replace(",", ".").rstrip(".")
 
 
 def validate_numbers(summary: str, original: str) -> bool:
@@ -40,7 +54,7 @@ def validate_numbers(summary: str, original: str) -> bool:
 
 
 def _normalize_date(value: str) -> str:
-    return re.sub(r"[/-]", ".", value)
+    return _DATE_SEPARATORS_RE.sub(".", value)
 
 
 STOP_WORDS = {
@@ -58,34 +72,34 @@ STOP_WORDS = {
 
 
 def validate_dates(summary: str, original: str) -> bool:
-    date_re = re.compile(r"\d{1,2}[./-]\d{1,2}[./-]\d{2,4}")
     summary_dates = [
-        _normalize_date(match) for match in date_re.findall(summary or "")
+        _normalize_date(match) for match in _DATE_RE.findall(summary or "")
     ]
     if not summary_dates:
         return True
 
     original_dates = {
-        _normalize_date(match) for match in date_re.findall(original or "")
+        _normalize_date(match) for match in _DATE_RE.findall(original or "")
     }
     return all(date in original_dates for date in summary_dates)
 
 
+def _stem_tokens(text: str) -> Set[str]:
+    raw_tokens = _TOKEN_RE.findall((text or "").lower())
+    tokens: Set[str] = set()
+    for raw in raw_tokens:
+        token = raw.replace("ё", "е").strip("._")
+        while len(token) > 3 and token[-1] in "аеёиоуыэюяй":
+            token = token[:-1]
+        if not token or token in STOP_WORDS:
+            continue
+        tokens.add(token)
+    return tokens
+
+
 def jaccard_similarity(text1: str, text2: str) -> float:
-    def _tokenize(text: str) -> set[str]:
-        raw_tokens = re.findall(r"[\w\.]+", (text or "").lower())
-        tokens: set[str] = set()
-        for raw in raw_tokens:
-            token = raw.replace("ё", "е").strip("._")
-            while len(token) > 3 and token[-1] in "аеёиоуыэюяй":
-                token = token[:-1]
-            if not token or token in STOP_WORDS:
-                continue
-            tokens.add(token)
-        return tokens
-
-    tokens1 = _tokenize(text1)
-    tokens2 = _tokenize(text2)
+    tokens1 = _stem_tokens(text1)
+    tokens2 = _stem_tokens(text2)
     if not tokens1 or not tokens2:
         return 0.0
     intersection = tokens1 & tokens2
@@ -93,16 +107,67 @@ def jaccard_similarity(text1: str, text2: str) -> float:
     return len(intersection) / len(union) if union else 0.0
 
 
-def validate_summary(summary: str, original: str, min_similarity: float = 0.35) -> str | None:
+class FactIndex:
+    """Numbers, dates and stemmed tokens of a message, extracted once.
+
+    Built from the body and every attachment text, then reused for each
+    summary check of that message, so validation never rescans the source.
+    """
+
+    def __init__(self, *texts: str) -> None:
+        self.numbers: Set[str] = set()
+        self.dates: Set[str] = set()
+        self.tokens: Set[str] = set()
+        self._numbers_blob: str | None = None
+        for text in texts:
+            self.add(text)
+
+    def add(self, text: str) -> None:
+        if not text:
+            return
+        self.numbers.update(_normalize_number(number) for number in _extract_numbers(text))
+        self.dates.update(_normalize_date(match) for match in _DATE_RE.findall(text))
+        self.tokens |= _stem_tokens(text)
+        self._numbers_blob = None
+
+    def has_number(self, number: str) -> bool:
+        normalized = _normalize_number(number)
+        if not normalized or normalized in self.numbers:
+            return True
+        # Same leniency as a substring check: "15" is backed by "150000".
+        if self._numbers_blob is None:
+            self._numbers_blob = "|".join(sorted(self.numbers))
+        return normalized in self._numbers_blob
+
+    def has_date(self, date: str) -> bool:
+        return _normalize_date(date) in self.dates
+
+    def coverage(self, text: str) -> float:
+        """Share of the stemmed tokens of ``text`` that occur in the source."""
+        tokens = _stem_tokens(text)
+        if not tokens:
+            return 0.0
+        return len(tokens & self.tokens) / len(tokens)
+
+
+def validate_summary(
+    summary: str, original: Union[str, FactIndex], min_similarity: float = MIN_SIMILARITY
+) -> str | None:
+    """Return the cleaned summary, or None if it is not backed by the source.
+
+    Every number and date must occur in the source, and at least
+    ``min_similarity`` of the summary's stemmed tokens must as well. Pass a
+    prebuilt ``FactIndex`` to check several summaries of one message.
+    """
     cleaned = clean_none(summary)
     if not cleaned:
         return None
-    if not validate_numbers(cleaned, original):
+    index = original if isinstance(original, FactIndex) else FactIndex(original or "")
+    if not all(index.has_number(number) for number in _extract_numbers(cleaned)):
         return None
-    if not validate_dates(cleaned, original):
+    if not all(index.has_date(date) for date in _DATE_RE.findall(cleaned)):
         return None
-    similarity = jaccard_similarity(cleaned, original)
-    if similarity < min_similarity:
+    if index.coverage(cleaned) < min_similarity:
         return None
     return cleaned
 
@@ -142,6 +207,8 @@ def _self_test():
 
 
 __all__ = [
+    "MIN_SIMILARITY",
+    "FactIndex",
     "clean_none",
     "drop_none_tokens",
     "ensure_length",
@@ -9,9 +9,13 @@ and per-account settings isolated.
 from __future__ import annotations
 
 import configparser
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Callable, List, Optional
+from typing import Callable, Dict, List, Optional
+
+from mailbot_v26.bot_core.llm_client import CloudflareConfig, CloudflareLLMClient
+from mailbot_v26.bot_core.validation import MIN_SIMILARITY
+from mailbot_v26.llm.routing import KNOWN_ROUTES
 
 CONFIG_DIR = Path(__file__).resolve().parent / "config"
 
@@ -47,6 +51,47 @@ class KeysConfig:
     cf_api_token: str
 
 
+@dataclass
+class LLMConfig:
+    """Summarization settings from the optional ``[llm]`` section."""
+
+    model: str = "@cf/meta/llama-3-8b-instruct"
+    cache_enabled: bool = True
+    cache_ttl_hours: int = 72
+    cache_max_entries: int = 5000
+    max_concurrency: int = 4
+    max_tokens: int = 512
+    context_tokens: int = 8192
+    chunk_tokens: int = 1800
+    merge_fan_in: int = 4
+    request_timeout: float = 15.0
+    max_retries: int = 3
+    daily_token_budget: int = 0
+    account_budget_share: float = 0.5
+    priority_reserve: float = 0.1
+    reduced_max_chunks: int = 2
+    breaker_failure_threshold: int = 3
+    breaker_reset_seconds: int = 120
+    batch_window_ms: int = 0
+    batch_max_items: int = 6
+    extractive_target_tokens: int = 8000
+    stream_responses: bool = True
+    progressive_summary: bool = False
+    validate_summaries: bool = True
+    validation_min_similarity: float = MIN_SIMILARITY
+    thread_context: bool = True
+    thread_ttl_days: int = 30
+    boilerplate_filter: bool = True
+    boilerplate_min_messages: int = 3
+    min_timeout: float = 3.0
+    hedge_enabled: bool = True
+    hedge_model: str = ""
+    hedge_api_base: str = ""
+    hedge_max_ratio: float = 0.1
+    # route -> model from the optional [llm_routes] section
+    routes: Dict[str, str] = field(default_factory=dict)
+
+
 @dataclass
 class BotConfig:
     """Aggregate configuration bundle."""
@@ -55,6 +100,7 @@ class BotConfig:
     accounts: List[AccountConfig]
     keys: KeysConfig
     llm_call: Optional[Callable[[str], str]] = None
+    llm: LLMConfig = field(default_factory=LLMConfig)
 
 
 class ConfigError(Exception):
@@ -85,6 +131,76 @@ def load_general_config(base_dir: Path = CONFIG_DIR) -> GeneralConfig:
         raise ConfigError(f"Invalid value in config.ini: {exc}") from exc
 
 
+def _load_llm_routes(parser: configparser.ConfigParser) -> Dict[str, str]:
+    if "llm_routes" not in parser:
+        return {}
+    routes: Dict[str, str] = {}
+    for route, model in parser["llm_routes"].items():
+        if route not in KNOWN_ROUTES:
+            raise ConfigError(f"Unknown route in config.ini [llm_routes]: {route}")
+        if model.strip():
+            routes[route] = model.strip()
+    return routes
+
+
+def load_llm_config(base_dir: Path = CONFIG_DIR) -> LLMConfig:
+    parser = _read_config_file(base_dir / "config.ini")
+    routes = _load_llm_routes(parser)
+    if "llm" not in parser:
+        return LLMConfig(routes=routes)
+
+    section = parser["llm"]
+    defaults = LLMConfig()
+    try:
+        return LLMConfig(
+            model=section.get("model", fallback=defaults.model).strip() or defaults.model,
+            cache_enabled=section.getboolean("cache_enabled", fallback=defaults.cache_enabled),
+            cache_ttl_hours=section.getint("cache_ttl_hours", fallback=defaults.cache_ttl_hours),
+            cache_max_entries=section.getint("cache_max_entries", fallback=defaults.cache_max_entries),
+            max_concurrency=max(1, section.getint("max_concurrency", fallback=defaults.max_concurrency)),
+            max_tokens=section.getint("max_tokens", fallback=defaults.max_tokens),
+            context_tokens=section.getint("context_tokens", fallback=defaults.context_tokens),
+            chunk_tokens=section.getint("chunk_tokens", fallback=defaults.chunk_tokens),
+            merge_fan_in=max(2, section.getint("merge_fan_in", fallback=defaults.merge_fan_in)),
+            request_timeout=section.getfloat("request_timeout", fallback=defaults.request_timeout),
+            max_retries=max(0, section.getint("max_retries", fallback=defaults.max_retries)),
+            daily_token_budget=section.getint("daily_token_budget", fallback=defaults.daily_token_budget),
+            account_budget_share=section.getfloat("account_budget_share", fallback=defaults.account_budget_share),
+            priority_reserve=section.getfloat("priority_reserve", fallback=defaults.priority_reserve),
+            reduced_max_chunks=section.getint("reduced_max_chunks", fallback=defaults.reduced_max_chunks),
+            breaker_failure_threshold=section.getint(
+                "breaker_failure_threshold", fallback=defaults.breaker_failure_threshold
+            ),
+            breaker_reset_seconds=section.getint("breaker_reset_seconds", fallback=defaults.breaker_reset_seconds),
+            batch_window_ms=max(0, section.getint("batch_window_ms", fallback=defaults.batch_window_ms)),
+            batch_max_items=max(2, section.getint("batch_max_items", fallback=defaults.batch_max_items)),
+            extractive_target_tokens=max(
+                0, section.getint("extractive_target_tokens", fallback=defaults.extractive_target_tokens)
+            ),
+            stream_responses=section.getboolean("stream_responses", fallback=defaults.stream_responses),
+            progressive_summary=section.getboolean("progressive_summary", fallback=defaults.progressive_summary),
+            validate_summaries=section.getboolean("validate_summaries", fallback=defaults.validate_summaries),
+            validation_min_similarity=min(
+                1.0,
+                max(0.0, section.getfloat("validation_min_similarity", fallback=defaults.validation_min_similarity)),
+            ),
+            min_timeout=section.getfloat("min_timeout", fallback=defaults.min_timeout),
+            hedge_enabled=section.getboolean("hedge_enabled", fallback=defaults.hedge_enabled),
+            hedge_model=section.get("hedge_model", fallback=defaults.hedge_model).strip(),
+            hedge_api_base=section.get("hedge_api_base", fallback=defaults.hedge_api_base).strip(),
+            hedge_max_ratio=min(1.0, max(0.0, section.getfloat("hedge_max_ratio", fallback=defaults.hedge_max_ratio))),
+            thread_context=section.getboolean("thread_context", fallback=defaults.thread_context),
+            thread_ttl_days=max(1, section.getint("thread_ttl_days", fallback=defaults.thread_ttl_days)),
+            boilerplate_filter=section.getboolean("boilerplate_filter", fallback=defaults.boilerplate_filter),
+            boilerplate_min_messages=max(
+                1, section.getint("boilerplate_min_messages", fallback=defaults.boilerplate_min_messages)
+            ),
+            routes=routes,
+        )
+    except ValueError as exc:
+        raise ConfigError(f"Invalid value in config.ini [llm]: {exc}") from exc
+
+
 def load_accounts_config(base_dir: Path = CONFIG_DIR) -> List[AccountConfig]:
     parser = _read_config_file(base_dir / "accounts.ini")
     accounts: List[AccountConfig] = []
@@ -128,6 +244,29 @@ def load_keys_config(base_dir: Path = CONFIG_DIR) -> KeysConfig:
         raise ConfigError(f"Missing key in keys.ini: {exc!s}") from exc
 
 
+def build_llm_client(keys: KeysConfig, llm: LLMConfig) -> Optional[CloudflareLLMClient]:
+    """Create the production LLM transport, or ``None`` without credentials."""
+
+    if not keys.cf_account_id or not keys.cf_api_token:
+        return None
+    return CloudflareLLMClient(
+        CloudflareConfig(
+            account_id=keys.cf_account_id,
+            api_token=keys.cf_api_token,
+            model=llm.model,
+            max_tokens=llm.max_tokens,
+            timeout=llm.request_timeout,
+            max_retries=llm.max_retries,
+            pool_size=llm.max_concurrency,
+            min_timeout=llm.min_timeout,
+            hedge_enabled=llm.hedge_enabled,
+            hedge_model=llm.hedge_model,
+            hedge_api_base=llm.hedge_api_base,
+            hedge_max_ratio=llm.hedge_max_ratio,
+        )
+    )
+
+
 def load_config(base_dir: Path = CONFIG_DIR) -> BotConfig:
     """Load and validate all configuration files.
 
@@ -140,7 +279,14 @@ def load_config(base_dir: Path = CONFIG_DIR) -> BotConfig:
     general = load_general_config(base_dir)
     accounts = load_accounts_config(base_dir)
     keys = load_keys_config(base_dir)
-    return BotConfig(general=general, accounts=accounts, keys=keys)
+    llm = load_llm_config(base_dir)
+    return BotConfig(
+        general=general,
+        accounts=accounts,
+        keys=keys,
+        llm_call=build_llm_client(keys, llm),
+        llm=llm,
+    )
 
 
 __all__ = [
@@ -149,8 +295,11 @@ __all__ = [
     "ConfigError",
     "GeneralConfig",
     "KeysConfig",
+    "LLMConfig",
+    "build_llm_client",
     "load_config",
     "load_accounts_config",
     "load_general_config",
     "load_keys_config",
+    "load_llm_config",
 ]
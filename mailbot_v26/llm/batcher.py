@@ -0,0 +1,221 @@
+"""Opt-in packing of small LLM prompts into one request.
+
+During a burst (morning backlog, mailing lists) many short emails each pay
+the full request latency. ``PromptBatcher`` collects small prompts that
+arrive within ``window`` seconds, sends them as one numbered multi-task
+prompt and splits the answer back per job. Jobs the model skipped are
+re-sent individually while ``allow()`` says the LLM is usable, so partial
+answers never lose a summary. A batch request that fails outright fails
+all its jobs: re-sending each of them would multiply load on a backend
+that just failed, and the caller's circuit breaker sees every failure.
+
+The first waiting job acts as the batch leader: it waits for the window
+(or a full batch), sends the request and hands results to the others. No
+background thread is needed. The tokens of a request are charged to the
+accounts of the jobs in it, in proportion to their prompt tokens
+(``budget.shared_tokens``), not all to the leader's. A job that arrives after a quiet spell
+(nothing else submitted within ``window``) is sent at once instead, so
+sequential traffic never pays the window; the window only applies once
+a burst is under way. With ``slots``, each request first takes a
+slot of that semaphore (the caller's concurrency limit); request time is
+measured after it, and added to each job's ``CallTiming``.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import logging
+import re
+import threading
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import Callable, ContextManager, Dict, List, Optional
+
+from mailbot_v26.llm import prompts_ru
+from mailbot_v26.llm.budget import shared_tokens
+from mailbot_v26.llm.routing import CallTiming
+from mailbot_v26.llm.tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+_ANSWER_MARKER = re.compile(r"^[ \t]*#{2,}[ \t]*ОТВЕТ[ \t]+(\d+)[ \t:]*$", re.MULTILINE | re.IGNORECASE)
+
+# call(prompt, max_tokens) -> response text; max_tokens None means default
+BatchCall = Callable[[str, Optional[int]], str]
+
+
+@dataclass
+class _Job:
+    prompt: str
+    tokens: int
+    result: str = ""
+    done: bool = False
+    timing: Optional[CallTiming] = None
+    idle_before: bool = False
+    # Where the job was submitted from: its account for token accounting.
+    context: contextvars.Context = field(default_factory=contextvars.copy_context)
+
+
+def build_batch_prompt(prompts: List[str]) -> str:
+    parts = [prompts_ru.BATCH_HEADER.strip()]
+    for idx, prompt in enumerate(prompts, start=1):
+        parts.append(f"### ЗАДАНИЕ {idx}\n{prompt.strip()}")
+    return "\n\n".join(parts) + "\n"
+
+
+def split_batch_response(response: str, count: int) -> Dict[int, str]:
+    """Map task number to its answer; unknown or empty answers are dropped."""
+    answers: Dict[int, str] = {}
+    markers = list(_ANSWER_MARKER.finditer(response or ""))
+    for idx, marker in enumerate(markers):
+        number = int(marker.group(1))
+        end = markers[idx + 1].start() if idx + 1 < len(markers) else len(response)
+        answer = response[marker.end():end].strip()
+        if 1 <= number <= count and answer and number not in answers:
+            answers[number] = answer
+    return answers
+
+
+class PromptBatcher:
+    """Collects small prompts for ``window`` seconds and sends them together."""
+
+    def __init__(
+        self,
+        call: BatchCall,
+        window: float = 0.2,
+        max_items: int = 6,
+        max_item_tokens: int = 700,
+        max_prompt_tokens: int = 3000,
+        item_output_tokens: int = 200,
+        slots: Optional[ContextManager] = None,
+        allow: Optional[Callable[[], bool]] = None,
+    ) -> None:
+        self.call = call
+        self.slots = slots
+        self.allow = allow
+        self.window = max(0.0, window)
+        self.max_items = max(2, max_items)
+        self.max_item_tokens = max_item_tokens
+        self.max_prompt_tokens = max_prompt_tokens
+        self.item_output_tokens = item_output_tokens
+        self._cond = threading.Condition()
+        self._pending: List[_Job] = []
+        self._collecting = False
+        self._last_arrival: Optional[float] = None
+        self.requests = 0
+        self.batched_jobs = 0
+        self.retried_jobs = 0
+
+    def accepts(self, prompt: str) -> bool:
+        return estimate_tokens(prompt) <= self.max_item_tokens
+
+    def submit(self, prompt: str, timing: Optional[CallTiming] = None) -> str:
+        job = _Job(prompt, estimate_tokens(prompt), timing=timing)
+        with self._cond:
+            now = time.monotonic()
+            job.idle_before = self._last_arrival is None or now - self._last_arrival >= self.window
+            self._last_arrival = now
+            self._pending.append(job)
+            self._cond.notify_all()
+            while not job.done:
+                if not self._collecting and self._pending and self._pending[0] is job:
+                    self._collecting = True
+                    break
+                self._cond.wait()
+            else:
+                return job.result
+
+            deadline = time.monotonic() + self.window
+            if len(self._pending) == 1 and job.idle_before:
+                deadline = 0.0  # lone job after a quiet spell: nobody to wait for
+            while not self._batch_full():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = self._take_batch()
+            self._collecting = False
+            self._cond.notify_all()
+
+        try:
+            self._execute(batch)
+        finally:
+            with self._cond:
+                for item in batch:
+                    item.done = True
+                self._cond.notify_all()
+        return job.result
+
+    def _batch_full(self) -> bool:
+        tokens = sum(item.tokens for item in self._pending[: self.max_items])
+        return len(self._pending) >= self.max_items or tokens >= self.max_prompt_tokens
+
+    def _take_batch(self) -> List[_Job]:
+        batch: List[_Job] = []
+        tokens = 0
+        while self._pending and len(batch) < self.max_items:
+            item = self._pending[0]
+            if batch and tokens + item.tokens > self.max_prompt_tokens:
+                break
+            batch.append(self._pending.pop(0))
+            tokens += item.tokens
+        return batch
+
+    def _safe_call(self, prompt: str, max_tokens: Optional[int], jobs: List[_Job]) -> str:
+        try:
+            with self._cond:
+                self.requests += 1
+            with self.slots if self.slots is not None else nullcontext(), shared_tokens(
+                (job.context, job.tokens) for job in jobs
+            ):
+                started = time.monotonic()
+                try:
+                    result = self.call(prompt, max_tokens)
+                finally:
+                    elapsed = time.monotonic() - started
+                    for job in jobs:
+                        if job.timing is not None:
+                            job.timing.add(elapsed)
+            return result if isinstance(result, str) else ""
+        except Exception as exc:
+            logger.warning("Batched LLM call failed: %s", exc)
+            return ""
+
+    def _execute(self, batch: List[_Job]) -> None:
+        if len(batch) == 1:
+            batch[0].result = self._safe_call(batch[0].prompt, None, batch)
+            return
+
+        response = self._safe_call(
+            build_batch_prompt([item.prompt for item in batch]),
+            self.item_output_tokens * len(batch),
+            batch,
+        )
+        if not response.strip():
+            logger.warning("LLM batch of %d jobs failed; not re-sending them individually", len(batch))
+            return
+        answers = split_batch_response(response, len(batch))
+        for number, item in enumerate(batch, start=1):
+            answer = answers.get(number)
+            if answer:
+                item.result = answer
+                with self._cond:
+                    self.batched_jobs += 1
+            elif self.allow is None or self.allow():
+                with self._cond:
+                    self.retried_jobs += 1
+                item.result = self._safe_call(item.prompt, None, [item])
+        if len(answers) < len(batch):
+            logger.info("LLM batch answered %d of %d jobs; rest sent individually", len(answers), len(batch))
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {
+                "requests": self.requests,
+                "batched_jobs": self.batched_jobs,
+                "retried_jobs": self.retried_jobs,
+            }
+
+
+__all__ = ["PromptBatcher", "build_batch_prompt", "split_batch_response"]
@@ -0,0 +1,231 @@
+"""LLM throughput benchmark against the local Workers AI stand-in.
+
+Starts ``StubLLMServer``, then runs a synthetic mail corpus through the real
+``CloudflareLLMClient`` and ``LLMSummarizer`` once per concurrency level
+and prints calls per message, request latency percentiles and throughput::
+
+    python -m mailbot_v26.llm.benchmark --messages 40 --concurrency 1,4,8 \\
+        --latency-ms 300 --rate-limit-rate 0.05
+
+``--stream`` reads answers as Server-Sent Events and stops at the summary
+length, like production with ``stream_responses = true``.
+
+Nothing leaves the machine; no credentials are needed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Iterator, List, Optional
+
+from mailbot_v26.bot_core.llm_client import CloudflareConfig, CloudflareLLMClient
+from mailbot_v26.llm.fanout import map_ordered
+from mailbot_v26.llm.latency import percentile
+from mailbot_v26.llm.stub_server import StubLLMServer, StubProfile
+from mailbot_v26.llm.summarizer import LLMSummarizer
+from mailbot_v26.pipeline.processor import SUMMARY_CHAR_LIMIT
+
+_SENTENCES = [
+    "Направляем счет № {doc} на оплату услуг за {month}.",
+    "Сумма к оплате составляет {amount} руб., срок оплаты до {date}.",
+    "Просим подтвердить получение документов и подписать акт сверки.",
+    "Отгрузка по заказу {doc} запланирована на {date}, склад готов к приемке.",
+    "В приложении договор поставки с протоколом разногласий.",
+    "Напоминаем о совещании по бюджету проекта на следующей неделе.",
+    "Банк сообщает о зачислении {amount} руб. на расчетный счет.",
+    "Налоговая инспекция направила требование о представлении пояснений.",
+    "Прошу согласовать изменения в графике отпусков отдела.",
+    "Сервер резервного копирования будет недоступен во время плановых работ.",
+]
+_MONTHS = ["январь", "февраль", "март", "апрель", "май", "июнь"]
+
+
+@dataclass
+class LevelResult:
+    concurrency: int
+    messages: int
+    requests: int
+    calls_per_message: float
+    p50_ms: float
+    p95_ms: float
+    messages_per_second: float
+    failed_calls: int
+    elapsed: float
+
+
+def synthetic_corpus(count: int, body_chars: int, seed: int = 7) -> List[str]:
+    """Business-like mail bodies with sizes spread around ``body_chars``."""
+
+    rng = random.Random(seed)
+    corpus: List[str] = []
+    for _ in range(count):
+        target = rng.randint(max(80, body_chars // 5), max(100, body_chars * 2))
+        sentences: List[str] = []
+        size = 0
+        while size < target:
+            sentence = rng.choice(_SENTENCES).format(
+                doc=f"{rng.randint(100, 9999)}-{rng.choice('АБВК')}",
+                month=rng.choice(_MONTHS),
+                amount=f"{rng.randint(1, 900)} {rng.randint(100, 999)}",
+                date=f"{rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.2025",
+            )
+            sentences.append(sentence)
+            size += len(sentence) + 1
+        corpus.append(" ".join(sentences))
+    return corpus
+
+
+class _TimedTransport:
+    """Wraps the client and records the wall time of every call or stream."""
+
+    accepts_options = True
+
+    def __init__(self, client: CloudflareLLMClient) -> None:
+        self.client = client
+        self.latencies: List[float] = []
+        self.failed = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, prompt: str, **options) -> str:
+        started = time.perf_counter()
+        result = self.client(prompt, **options)
+        self._record(time.perf_counter() - started, bool(result))
+        return result
+
+    def stream(self, prompt: str, **options) -> Iterator[str]:
+        # Timed until the reader closes the stream, early or at the end.
+        started = time.perf_counter()
+        received = False
+        pieces = self.client.stream(prompt, **options)
+        try:
+            for piece in pieces:
+                received = True
+                yield piece
+        finally:
+            pieces.close()
+            self._record(time.perf_counter() - started, received)
+
+    def _record(self, elapsed: float, ok: bool) -> None:
+        with self._lock:
+            self.latencies.append(elapsed)
+            if not ok:
+                self.failed += 1
+
+
+def run_level(
+    server: StubLLMServer,
+    corpus: List[str],
+    concurrency: int,
+    batch_window_ms: int = 0,
+    extract_tokens: int = 0,
+    stream: bool = False,
+) -> LevelResult:
+    client = CloudflareLLMClient(
+        CloudflareConfig(
+            account_id="bench",
+            api_token="bench",
+            api_base=server.api_base,
+            pool_size=concurrency,
+            backoff_base=0.05,
+            backoff_max=1.0,
+        )
+    )
+    transport = _TimedTransport(client)
+    summarizer = LLMSummarizer(
+        transport,
+        max_concurrency=concurrency,
+        batch_window=batch_window_ms / 1000.0,
+        batch_max_items=max(2, concurrency),
+        extract_tokens=extract_tokens,
+        output_char_limit=SUMMARY_CHAR_LIMIT if stream else 0,
+    )
+    requests_before = server.stats.requests
+    started = time.perf_counter()
+    try:
+        map_ordered(summarizer.summarize_email, corpus, concurrency)
+    finally:
+        client.close()
+    elapsed = time.perf_counter() - started
+
+    requests = server.stats.requests - requests_before
+    latencies_ms = [value * 1000.0 for value in transport.latencies]
+    return LevelResult(
+        concurrency=concurrency,
+        messages=len(corpus),
+        requests=requests,
+        calls_per_message=requests / max(1, len(corpus)),
+        p50_ms=percentile(latencies_ms, 50),
+        p95_ms=percentile(latencies_ms, 95),
+        messages_per_second=len(corpus) / elapsed if elapsed > 0 else 0.0,
+        failed_calls=transport.failed,
+        elapsed=elapsed,
+    )
+
+
+def format_report(results: List[LevelResult]) -> str:
+    lines = [
+        f"{'conc':>5} {'msgs':>5} {'reqs':>6} {'calls/msg':>9} {'p50 ms':>8} {'p95 ms':>8} {'msg/s':>7} {'failed':>6}"
+    ]
+    for item in results:
+        lines.append(
+            f"{item.concurrency:>5} {item.messages:>5} {item.requests:>6} {item.calls_per_message:>9.2f} "
+            f"{item.p50_ms:>8.1f} {item.p95_ms:>8.1f} {item.messages_per_second:>7.2f} {item.failed_calls:>6}"
+        )
+    return "\n".join(lines)
+
+
+def _parse_args(argv: Optional[List[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="mailbot_v26.llm.benchmark", description="LLM path benchmark")
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--body-chars", type=int, default=2500, help="typical body size")
+    parser.add_argument("--concurrency", default="1,2,4,8", help="comma-separated levels")
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="median time to first token")
+    parser.add_argument("--latency-spread", type=float, default=0.4, help="log-normal sigma")
+    parser.add_argument("--token-ms", type=float, default=4.0, help="generation time per word")
+    parser.add_argument("--response-words", type=int, default=40)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--batch-window-ms", type=int, default=0)
+    parser.add_argument("--extract-tokens", type=int, default=0)
+    parser.add_argument("--stream", action="store_true", help="read answers as SSE streams")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--verbose", action="store_true", help="show client retry warnings")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> List[LevelResult]:
+    args = _parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.ERROR, format="%(levelname)s %(message)s")
+    levels = [max(1, int(level)) for level in args.concurrency.split(",") if level.strip()]
+    profile = StubProfile(
+        latency_ms=args.latency_ms,
+        latency_spread=args.latency_spread,
+        token_interval_ms=args.token_ms,
+        response_words=args.response_words,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        seed=args.seed,
+    )
+    corpus = synthetic_corpus(args.messages, args.body_chars, seed=args.seed)
+
+    results: List[LevelResult] = []
+    with StubLLMServer(profile) as server:
+        for level in levels:
+            results.append(
+                run_level(server, corpus, level, args.batch_window_ms, args.extract_tokens, args.stream)
+            )
+        print(format_report(results))
+        print(
+            f"server: {server.stats.requests} requests, {server.stats.rate_limited} rate limited, "
+            f"{server.stats.errors} errors"
+        )
+    return results
+
+
+if __name__ == "__main__":
+    main()
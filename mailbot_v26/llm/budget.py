@@ -0,0 +1,171 @@
+"""Daily LLM token budget with graceful degradation.
+
+Spend is tracked globally and per account in ``state.json`` (via
+``StateManager.add_tokens``). Before a message is summarized the budget
+picks a mode for it:
+
+* ``FULL`` - normal chunk/merge/final pipeline;
+* ``REDUCED`` - only the first ``reduced_max_chunks`` chunks are sent;
+* ``BODY_ONLY`` - attachments get the extractive fallback, not the LLM;
+* ``FALLBACK`` - no LLM calls at all.
+
+Each account may only spend ``account_share`` of the daily budget, so a
+single noisy mailbox cannot push everyone else to fallback. The last
+``priority_reserve`` of the budget is kept for priority mail.
+
+Tokens are booked to the account set with ``TokenBudget.account`` in the
+reporting thread's context. A request made on behalf of several accounts
+(a packed batch) runs inside ``shared_tokens``, and its tokens are split
+across their accounts by weight.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import logging
+from contextlib import contextmanager
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_CURRENT_ACCOUNT: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "mailbot_budget_account", default=None
+)
+_TOKEN_SHARES: contextvars.ContextVar[Optional[Tuple[Tuple[Optional[str], int], ...]]] = contextvars.ContextVar(
+    "mailbot_budget_shares", default=None
+)
+
+
+@contextmanager
+def shared_tokens(shares: Iterable[Tuple[contextvars.Context, int]]) -> Iterator[None]:
+    """Split tokens reported inside this block across several submitters.
+
+    Each share is the context a job was submitted from (its account is read
+    from it) and the job's weight, e.g. its prompt tokens.
+    """
+    accounts = tuple((context.get(_CURRENT_ACCOUNT), max(1, weight)) for context, weight in shares)
+    token = _TOKEN_SHARES.set(accounts or None)
+    try:
+        yield
+    finally:
+        _TOKEN_SHARES.reset(token)
+
+
+def _split(count: int, shares: Tuple[Tuple[Optional[str], int], ...]) -> Dict[Optional[str], int]:
+    total = sum(weight for _login, weight in shares)
+    parts: Dict[Optional[str], int] = {}
+    booked = 0
+    for idx, (login, weight) in enumerate(shares):
+        # The last share takes the rounding remainder.
+        part = count - booked if idx == len(shares) - 1 else count * weight // total
+        booked += part
+        parts[login] = parts.get(login, 0) + part
+    return parts
+
+
+class BudgetLevel(IntEnum):
+    FULL = 0
+    REDUCED = 1
+    BODY_ONLY = 2
+    FALLBACK = 3
+
+
+@dataclass(frozen=True)
+class BudgetDecision:
+    level: BudgetLevel
+    max_chunks: Optional[int] = None
+
+    @property
+    def use_llm(self) -> bool:
+        return self.level < BudgetLevel.FALLBACK
+
+    @property
+    def summarize_attachments(self) -> bool:
+        return self.level < BudgetLevel.BODY_ONLY
+
+
+FULL_DECISION = BudgetDecision(BudgetLevel.FULL)
+
+
+class TokenBudget:
+    """Decides how much LLM work a message may use and books its tokens."""
+
+    def __init__(
+        self,
+        state,
+        daily_limit: int = 0,
+        account_share: float = 0.5,
+        priority_reserve: float = 0.1,
+        reduced_max_chunks: int = 2,
+        reduced_threshold: float = 0.5,
+        body_only_threshold: float = 0.25,
+    ) -> None:
+        self.state = state
+        self.daily_limit = max(0, daily_limit)
+        self.account_share = min(1.0, max(0.0, account_share)) or 1.0
+        self.priority_reserve = min(0.9, max(0.0, priority_reserve))
+        self.reduced_max_chunks = max(1, reduced_max_chunks)
+        self.reduced_threshold = reduced_threshold
+        self.body_only_threshold = body_only_threshold
+
+    @contextmanager
+    def account(self, login: str) -> Iterator[None]:
+        """Charge tokens reported inside this block to ``login``."""
+        token = _CURRENT_ACCOUNT.set(login)
+        try:
+            yield
+        finally:
+            _CURRENT_ACCOUNT.reset(token)
+
+    def record(self, count: int) -> None:
+        """Token sink for the LLM transport (``CloudflareLLMClient.on_tokens``)."""
+        if count <= 0:
+            return
+        shares = _TOKEN_SHARES.get()
+        if not shares:
+            self.state.add_tokens(count, login=_CURRENT_ACCOUNT.get())
+            return
+        for login, part in _split(count, shares).items():
+            if part > 0:
+                self.state.add_tokens(part, login=login)
+
+    def remaining_ratio(self, login: str, priority: bool = False) -> float:
+        if self.daily_limit <= 0:
+            return 1.0
+        reserve = int(self.daily_limit * self.priority_reserve)
+        global_cap = self.daily_limit if priority else self.daily_limit - reserve
+        account_cap = max(1, int(global_cap * self.account_share))
+        if priority:
+            account_cap = min(global_cap, account_cap + reserve)
+
+        global_left = (global_cap - self.state.get_tokens_used_today()) / max(1, global_cap)
+        account_left = (account_cap - self.state.get_tokens_used_today(login)) / account_cap
+        return min(global_left, account_left)
+
+    def decide(self, login: str, priority: bool = False) -> BudgetDecision:
+        if self.daily_limit <= 0:
+            return FULL_DECISION
+
+        ratio = self.remaining_ratio(login, priority)
+        if ratio <= 0:
+            decision = BudgetDecision(BudgetLevel.FALLBACK)
+        elif ratio < self.body_only_threshold:
+            decision = BudgetDecision(BudgetLevel.BODY_ONLY, max_chunks=self.reduced_max_chunks)
+        elif ratio < self.reduced_threshold:
+            decision = BudgetDecision(BudgetLevel.REDUCED, max_chunks=self.reduced_max_chunks)
+        else:
+            return FULL_DECISION
+
+        logger.info(
+            "LLM budget for %s: %s (%.0f%% left, priority=%s)",
+            login,
+            decision.level.name,
+            max(0.0, ratio) * 100,
+            priority,
+        )
+        return decision
+
+
+__all__ = ["BudgetDecision", "BudgetLevel", "FULL_DECISION", "TokenBudget", "shared_tokens"]
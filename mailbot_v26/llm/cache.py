@@ -0,0 +1,144 @@
+"""Persistent LLM response cache.
+
+Responses are stored in a small SQLite file next to ``state.json`` and are
+keyed by a SHA-256 of ``(model, prompt)``, so forwarded copies, duplicate
+deliveries and reprocessing after a restart do not pay for the same prompt
+twice. Entries expire after ``ttl_seconds`` and the table is trimmed to
+``max_entries`` by least-recent access. Any storage error degrades to a
+cache miss: the cache must never break summarization.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+DEFAULT_CACHE_PATH = Path(__file__).resolve().parent.parent / "llm_cache.sqlite3"
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    response TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+)
+"""
+
+
+def cache_key(model: str, prompt: str) -> str:
+    digest = hashlib.sha256()
+    digest.update((model or "").encode("utf-8"))
+    digest.update(b"\x00")
+    digest.update((prompt or "").encode("utf-8"))
+    return digest.hexdigest()
+
+
+class LLMResponseCache:
+    """Thread-safe SQLite cache with TTL and size-bounded eviction."""
+
+    def __init__(
+        self,
+        path: Path = DEFAULT_CACHE_PATH,
+        ttl_seconds: float = 72 * 3600,
+        max_entries: int = 5000,
+    ) -> None:
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(_SCHEMA)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed_at)")
+        except (OSError, sqlite3.Error) as exc:
+            logger.warning("LLM cache disabled: %s", exc)
+            self._conn = None
+
+    def get(self, model: str, prompt: str) -> Optional[str]:
+        key = cache_key(model, prompt)
+        now = time.time()
+        with self._lock:
+            if self._conn is None:
+                self.misses += 1
+                return None
+            try:
+                row = self._conn.execute(
+                    "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                response, created_at = row
+                if now - created_at > self.ttl_seconds:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self.misses += 1
+                    return None
+                self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            except sqlite3.Error as exc:
+                logger.warning("LLM cache read failed: %s", exc)
+                self.misses += 1
+                return None
+            self.hits += 1
+            return response
+
+    def put(self, model: str, prompt: str, response: str) -> None:
+        if not response:
+            return
+        key = cache_key(model, prompt)
+        now = time.time()
+        with self._lock:
+            if self._conn is None:
+                return
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, response, now, now),
+                )
+                self._evict(now)
+            except sqlite3.Error as exc:
+                logger.warning("LLM cache write failed: %s", exc)
+
+    def _evict(self, now: float) -> None:
+        assert self._conn is not None
+        self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY accessed_at ASC LIMIT ?)",
+                (overflow,),
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            if self._conn is None:
+                return 0
+            try:
+                return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            except sqlite3.Error:
+                return 0
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self)}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+__all__ = ["DEFAULT_CACHE_PATH", "LLMResponseCache", "cache_key"]
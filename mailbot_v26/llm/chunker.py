@@ -1,4 +1,17 @@
-from typing import List
+import re
+from typing import Iterator, List, Tuple
+
+from mailbot_v26.llm.tokens import estimate_tokens
+
+# Chunk budget in tokens; start.py caps it by the model context window.
+DEFAULT_CHUNK_TOKENS = 1800
+DEFAULT_OVERLAP_TOKENS = 60
+# Room for the instruction part of chunk/merge prompts.
+PROMPT_OVERHEAD_TOKENS = 300
+
+_PARAGRAPH_SPLIT = re.compile(r"\n\s*\n")
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?…;])\s+|\n")
+
 
 def chunk_text(text: str, size: int = 2000, overlap: int = 250) -> List[str]:
     if not text:
@@ -21,3 +34,91 @@ def chunk_text(text: str, size: int = 2000, overlap: int = 250) -> List[str]:
             start = 0
 
     return chunks
+
+
+def chunk_budget(context_tokens: int, max_output_tokens: int, chunk_tokens: int = DEFAULT_CHUNK_TOKENS) -> int:
+    """Largest chunk that still leaves room for the prompt and the answer."""
+    room = context_tokens - max_output_tokens - PROMPT_OVERHEAD_TOKENS
+    return max(128, min(chunk_tokens, room))
+
+
+def _hard_split(unit: str, tokens: int, max_tokens: int, overlap_tokens: int) -> Iterator[Tuple[str, int]]:
+    """Split one oversized sentence into windows, preferring whitespace."""
+    chars_per_token = len(unit) / max(1, tokens)
+    window = max(1, int(max_tokens * chars_per_token))
+    overlap = min(window // 2, int(overlap_tokens * chars_per_token))
+    start = 0
+    while start < len(unit):
+        end = min(len(unit), start + window)
+        if end < len(unit):
+            space = unit.rfind(" ", start + window // 2, end)
+            if space > start:
+                end = space
+        piece = unit[start:end].strip()
+        if piece:
+            yield piece, estimate_tokens(piece)
+        if end >= len(unit):
+            break
+        next_start = end - overlap
+        space = unit.find(" ", next_start, end)
+        if space >= 0:
+            next_start = space + 1
+        start = max(start + 1, next_start)
+
+
+def _units(text: str, max_tokens: int, overlap_tokens: int) -> Iterator[Tuple[str, str, int]]:
+    """Yield ``(separator, unit, tokens)`` from paragraphs down to sentences."""
+    for paragraph in _PARAGRAPH_SPLIT.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        tokens = estimate_tokens(paragraph)
+        if tokens <= max_tokens:
+            yield "\n\n", paragraph, tokens
+            continue
+        separator = "\n\n"
+        for sentence in _SENTENCE_SPLIT.split(paragraph):
+            sentence = sentence.strip()
+            if not sentence:
+                continue
+            sentence_tokens = estimate_tokens(sentence)
+            if sentence_tokens <= max_tokens:
+                yield separator, sentence, sentence_tokens
+            else:
+                for piece, piece_tokens in _hard_split(sentence, sentence_tokens, max_tokens, overlap_tokens):
+                    yield separator, piece, piece_tokens
+            separator = " "
+
+
+def iter_chunks_by_tokens(
+    text: str,
+    max_tokens: int = DEFAULT_CHUNK_TOKENS,
+    overlap_tokens: int = DEFAULT_OVERLAP_TOKENS,
+) -> Iterator[str]:
+    """Lazy ``chunk_by_tokens``: the text is only split as far as it is read."""
+    if not text or not text.strip():
+        return
+
+    max_tokens = max(16, max_tokens)
+    parts: List[str] = []
+    used = 0
+    for separator, unit, tokens in _units(text, max_tokens, overlap_tokens):
+        if parts and used + tokens > max_tokens:
+            yield "".join(parts).strip()
+            parts, used = [], 0
+        parts.append((separator if parts else "") + unit)
+        used += tokens
+    if parts:
+        yield "".join(parts).strip()
+
+
+def chunk_by_tokens(
+    text: str,
+    max_tokens: int = DEFAULT_CHUNK_TOKENS,
+    overlap_tokens: int = DEFAULT_OVERLAP_TOKENS,
+) -> List[str]:
+    """Pack whole paragraphs (then sentences) into chunks of ``max_tokens``.
+
+    Overlap is only used when a single sentence has to be cut.
+    """
+    return list(iter_chunks_by_tokens(text, max_tokens, overlap_tokens))
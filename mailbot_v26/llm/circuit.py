@@ -0,0 +1,110 @@
+"""Circuit breaker for the LLM endpoint.
+
+When the endpoint is down every chunk, merge and final call would wait out
+its full timeout before falling back. The breaker counts consecutive
+failures; once ``failure_threshold`` is reached it opens and
+``LLMSummarizer`` goes straight to its fallback. After ``reset_timeout``
+seconds a single probe request is let through (half-open): success closes
+the circuit, failure opens it again.
+
+The open/closed flag is persisted through ``StateManager.set_llm_unavailable``
+so a restart during an outage does not start by hammering the endpoint.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from enum import Enum
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitState(Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker backed by ``LLMState.unavailable``."""
+
+    def __init__(
+        self,
+        state,
+        failure_threshold: int = 3,
+        reset_timeout: float = 120.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.state = state
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = max(0.0, reset_timeout)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._probe_in_flight = False
+        self._opened_at = 0.0
+        self._state = CircuitState.CLOSED
+
+        unavailable, _error = state.get_llm_status()
+        if unavailable:
+            self._state = CircuitState.OPEN
+            self._opened_at = clock()
+
+    @property
+    def current(self) -> CircuitState:
+        with self._lock:
+            return self._state
+
+    def available(self) -> bool:
+        """True when a request could be attempted now (without reserving it)."""
+        with self._lock:
+            if self._state is CircuitState.CLOSED:
+                return True
+            if self._state is CircuitState.OPEN:
+                return self._clock() - self._opened_at >= self.reset_timeout
+            return not self._probe_in_flight
+
+    def allow_request(self) -> bool:
+        """Reserve a request slot; in half-open state only one probe passes."""
+        with self._lock:
+            if self._state is CircuitState.CLOSED:
+                return True
+            if self._state is CircuitState.OPEN:
+                if self._clock() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = CircuitState.HALF_OPEN
+                logger.info("LLM circuit half-open: sending probe request")
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            was_open = self._state is not CircuitState.CLOSED
+            self._state = CircuitState.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+        if was_open:
+            logger.info("LLM circuit closed: endpoint recovered")
+            self.state.set_llm_unavailable(False)
+
+    def record_failure(self, error: str = "") -> None:
+        with self._lock:
+            self._failures += 1
+            probe_failed = self._state is CircuitState.HALF_OPEN
+            self._probe_in_flight = False
+            if not probe_failed and (
+                self._state is CircuitState.OPEN or self._failures < self.failure_threshold
+            ):
+                return
+            self._state = CircuitState.OPEN
+            self._opened_at = self._clock()
+        logger.warning("LLM circuit open after %d failures: %s", self._failures, error or "no response")
+        self.state.set_llm_unavailable(True, error or "no response")
+
+
+__all__ = ["CircuitBreaker", "CircuitState"]
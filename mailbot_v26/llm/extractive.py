@@ -0,0 +1,174 @@
+"""Extractive pre-summarization without an LLM.
+
+Sentences are scored by term centrality (how many other sentences share
+their words) plus hits on the amount, date and document-number patterns of
+``bot_core.action_engine``. The best sentences are kept, in original order,
+until a token or character target is reached. Near-duplicates of an already
+kept sentence (repeated footer lines, templated rows) are skipped, since
+they would otherwise win on centrality alone.
+
+Used twice: to condense long bodies and attachments before they reach the
+LLM, and as the fallback summary when the LLM is unavailable.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import List, Optional
+
+from mailbot_v26.bot_core.action_engine import AMOUNT_RE, DATE_RE, DOC_RE
+from mailbot_v26.llm.tokens import estimate_tokens
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?…;])\s+|\n+")
+_WORD = re.compile(r"[^\W\d_]{3,}")
+# Crude stemming: Russian inflection mostly lives in the last few letters.
+_STEM_LENGTH = 6
+_STOPWORDS = frozenset(
+    {
+        "это", "как", "так", "что", "для", "при", "или", "его", "она", "они", "все", "вас", "нас", "вам",
+        "нам", "уже", "еще", "ещё", "было", "быть", "будет", "также", "если", "чтобы", "только", "этот",
+        "the", "and", "for", "with", "this", "that", "are", "was", "you", "your", "from", "have", "will",
+        "please", "пожалуйста",
+    }
+)
+
+CENTRALITY_WEIGHT = 2.0
+FACT_WEIGHT = 2.0
+LEAD_BONUS = 0.5
+SHORT_SENTENCE_WORDS = 3
+# Word-set Jaccard similarity above which a sentence counts as a repeat.
+REDUNDANCY_THRESHOLD = 0.8
+
+
+@dataclass(frozen=True)
+class ScoredSentence:
+    index: int
+    text: str
+    score: float
+    tokens: int
+    terms: frozenset[str] = frozenset()
+
+
+def split_sentences(text: str) -> List[str]:
+    return [part.strip() for part in _SENTENCE_SPLIT.split(text or "") if part and part.strip()]
+
+
+def _terms(sentence: str) -> set[str]:
+    terms = set()
+    for word in _WORD.findall(sentence.lower()):
+        if word not in _STOPWORDS:
+            terms.add(word[:_STEM_LENGTH])
+    return terms
+
+
+def _fact_hits(sentence: str) -> float:
+    hits = 0.0
+    if DATE_RE.search(sentence):
+        hits += 1.0
+    if DOC_RE.search(sentence):
+        hits += 1.0
+    amounts = list(AMOUNT_RE.finditer(sentence))
+    if any(match.group("currency") for match in amounts):
+        hits += 1.0
+    elif amounts:
+        hits += 0.25
+    return hits
+
+
+def score_sentences(text: str) -> List[ScoredSentence]:
+    sentences = split_sentences(text)
+    if not sentences:
+        return []
+
+    term_sets = [_terms(sentence) for sentence in sentences]
+    frequency: Counter[str] = Counter()
+    for terms in term_sets:
+        frequency.update(terms)
+
+    raw_centrality = [
+        sum(frequency[term] - 1 for term in terms) / math.sqrt(len(terms)) if terms else 0.0
+        for terms in term_sets
+    ]
+    top = max(raw_centrality) or 1.0
+
+    scored: List[ScoredSentence] = []
+    for index, (sentence, centrality) in enumerate(zip(sentences, raw_centrality)):
+        score = CENTRALITY_WEIGHT * centrality / top + FACT_WEIGHT * _fact_hits(sentence)
+        if index == 0:
+            score += LEAD_BONUS
+        if len(sentence.split()) < SHORT_SENTENCE_WORDS:
+            score *= 0.3
+        scored.append(
+            ScoredSentence(index, sentence, score, estimate_tokens(sentence), frozenset(term_sets[index]))
+        )
+    return scored
+
+
+def _is_redundant(sentence: ScoredSentence, chosen: List[ScoredSentence]) -> bool:
+    if not sentence.terms:
+        return False
+    for other in chosen:
+        union = len(sentence.terms | other.terms)
+        if union and len(sentence.terms & other.terms) / union >= REDUNDANCY_THRESHOLD:
+            return True
+    return False
+
+
+def _truncate(text: str, max_chars: int) -> str:
+    if len(text) <= max_chars:
+        return text
+    cut = text[: max(0, max_chars - 3)]
+    space = cut.rfind(" ")
+    if space > max_chars // 2:
+        cut = cut[:space]
+    return cut.rstrip() + "..."
+
+
+def extract_summary(
+    text: str,
+    max_tokens: Optional[int] = None,
+    max_chars: Optional[int] = None,
+    separator: str = " ",
+) -> str:
+    """Return the highest-scoring sentences of ``text`` in original order.
+
+    Sentences that would overflow a limit, or repeat a kept one, are
+    skipped in favour of sentences further down the ranking. If not even
+    the best sentence fits, it is cut at a word boundary.
+    """
+
+    scored = score_sentences(text)
+    if not scored:
+        return ""
+
+    ranked = sorted(scored, key=lambda item: (-item.score, item.index))
+    chosen: List[ScoredSentence] = []
+    tokens = 0
+    chars = 0
+    for sentence in ranked:
+        extra_chars = len(sentence.text) + (len(separator) if chosen else 0)
+        if max_tokens is not None and tokens + sentence.tokens > max_tokens:
+            continue
+        if max_chars is not None and chars + extra_chars > max_chars:
+            continue
+        if _is_redundant(sentence, chosen):
+            continue
+        chosen.append(sentence)
+        tokens += sentence.tokens
+        chars += extra_chars
+
+    if not chosen:
+        limit = max_chars if max_chars is not None else len(ranked[0].text)
+        if max_tokens is not None:
+            # estimate_tokens never goes below ~2.6 characters per token
+            limit = min(limit, int(max_tokens * 2.6))
+        return _truncate(ranked[0].text, limit)
+
+    chosen.sort(key=lambda item: item.index)
+    return separator.join(item.text for item in chosen)
+
+
+__all__ = ["ScoredSentence", "extract_summary", "score_sentences", "split_sentences"]
@@ -0,0 +1,36 @@
+"""Ordered fan-out helper for independent LLM calls.
+
+Chunk summaries and attachment summaries do not depend on each other, so
+they can be issued concurrently. Results always come back in input order
+so merge prompts and the final Telegram layout stay deterministic. The
+network concurrency itself is capped by ``LLMSummarizer`` with a
+semaphore; this helper only decides how many threads wait on it.
+
+Each job runs in a copy of the caller's ``contextvars`` context, so
+per-message context (such as the account charged for tokens) follows the
+work onto pool threads.
+"""
+
+from __future__ import annotations
+
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def map_ordered(func: Callable[[T], R], items: Iterable[T], max_workers: int = 1) -> List[R]:
+    """Apply ``func`` to every item, concurrently when allowed, keeping order."""
+
+    work = list(items)
+    workers = min(max(1, max_workers), len(work))
+    if workers <= 1:
+        return [func(item) for item in work]
+    contexts = [contextvars.copy_context() for _ in work]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mailbot-llm") as pool:
+        return list(pool.map(lambda ctx, item: ctx.run(func, item), contexts, work))
+
+
+__all__ = ["map_ordered"]
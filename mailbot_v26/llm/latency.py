@@ -0,0 +1,70 @@
+"""Rolling per-model latency percentiles.
+
+``CloudflareLLMClient`` records the duration of every successful request
+here and derives two things from the recent window of each model: the
+socket timeout (a multiple of p99 instead of a fixed 15 s) and the delay
+after which a hedged duplicate request is sent (p95). Until a model has
+``min_samples`` observations no estimate is given and callers keep their
+static defaults.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+DEFAULT_WINDOW = 200
+DEFAULT_MIN_SAMPLES = 20
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile; 0.0 for an empty list."""
+
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class LatencyTracker:
+    """Keeps the last ``window`` request durations (seconds) per model."""
+
+    def __init__(self, window: int = DEFAULT_WINDOW, min_samples: int = DEFAULT_MIN_SAMPLES) -> None:
+        self.window = max(1, window)
+        self.min_samples = max(1, min_samples)
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, model: str, seconds: float) -> None:
+        with self._lock:
+            samples = self._samples.get(model)
+            if samples is None:
+                samples = self._samples[model] = deque(maxlen=self.window)
+            samples.append(max(0.0, seconds))
+
+    def percentile(self, model: str, q: float) -> Optional[float]:
+        """``q``-th percentile for ``model``, or None while samples are few."""
+
+        with self._lock:
+            samples = list(self._samples.get(model, ()))
+        if len(samples) < self.min_samples:
+            return None
+        return percentile(samples, q)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            models = {model: list(samples) for model, samples in self._samples.items()}
+        return {
+            model: {
+                "samples": len(samples),
+                "p50_ms": round(percentile(samples, 50) * 1000.0, 1),
+                "p95_ms": round(percentile(samples, 95) * 1000.0, 1),
+            }
+            for model, samples in sorted(models.items())
+        }
+
+
+__all__ = ["LatencyTracker", "percentile"]
@@ -0,0 +1,84 @@
+"""Fact tracking for progressive (early-stopping) summarization.
+
+Invoices, contracts and court letters usually state the amount, due date,
+document number and requested action on the first page. In progressive
+mode ``LLMSummarizer`` summarizes chunks in order and, after each wave,
+checks what has been read so far against the rule of the email category.
+Once every required fact has been seen the remaining chunks are not sent
+to the LLM at all. Categories without a rule are always read in full.
+
+Facts are detected with the ``action_engine`` regexes on the source
+chunks, so the check costs no LLM calls.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, Set, Tuple
+
+from mailbot_v26.bot_core.action_engine import ACTION_RE, AMOUNT_RE, DATE_RE, DOC_RE
+
+FACT_AMOUNT = "amount"
+FACT_DATE = "date"
+FACT_DOC = "doc_number"
+FACT_ACTION = "action"
+
+# category -> facts that make a summary complete
+REQUIRED_FACTS: Dict[str, Tuple[str, ...]] = {
+    "INVOICE": (FACT_AMOUNT, FACT_DATE, FACT_DOC, FACT_ACTION),
+    "TAX_FNS": (FACT_AMOUNT, FACT_DATE, FACT_DOC),
+    "BANK": (FACT_AMOUNT, FACT_DATE),
+    "COURT": (FACT_DOC, FACT_DATE),
+    "LEGAL": (FACT_DOC, FACT_DATE, FACT_ACTION),
+    "DEADLINE": (FACT_DATE, FACT_ACTION),
+}
+
+
+def required_facts(category: str) -> Tuple[str, ...]:
+    return REQUIRED_FACTS.get(category, ())
+
+
+def find_facts(text: str) -> Set[str]:
+    """Facts present in ``text``; an amount needs a currency next to it."""
+
+    found: Set[str] = set()
+    if not text:
+        return found
+    if any(match.group("currency") for match in AMOUNT_RE.finditer(text)):
+        found.add(FACT_AMOUNT)
+    if DATE_RE.search(text):
+        found.add(FACT_DATE)
+    if DOC_RE.search(text):
+        found.add(FACT_DOC)
+    if ACTION_RE.search(text):
+        found.add(FACT_ACTION)
+    return found
+
+
+class FactSheet:
+    """Facts seen so far against the ones a category requires."""
+
+    def __init__(self, required: Iterable[str]) -> None:
+        self.required = frozenset(required)
+        self.found: Set[str] = set()
+
+    def add(self, text: str) -> None:
+        if not self.complete():
+            self.found |= find_facts(text) & self.required
+
+    def missing(self) -> Set[str]:
+        return set(self.required - self.found)
+
+    def complete(self) -> bool:
+        return bool(self.required) and self.required <= self.found
+
+
+__all__ = [
+    "FACT_ACTION",
+    "FACT_AMOUNT",
+    "FACT_DATE",
+    "FACT_DOC",
+    "FactSheet",
+    "REQUIRED_FACTS",
+    "find_facts",
+    "required_facts",
+]
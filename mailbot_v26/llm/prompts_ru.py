@@ -118,6 +118,35 @@ EMAIL_MERGE = """
 {summaries}
 """
 
+# Префикс для короткого письма, которое суммируется одним вызовом
+# сразу финальным промптом категории (без чанка и слияния).
+SINGLE_PASS_PREFIX = """
+Используй только факты из текста письма.
+Не придумывай суммы, даты, номера. Без эмодзи.
+"""
+
+# Ответ в известной переписке: суммируется только новое сообщение,
+# сводка предыдущих писем цепочки идёт как контекст.
+THREAD_UPDATE = """
+Это ответ в переписке. Опиши новое сообщение; прошлое используй только
+как контекст и не пересказывай его.
+
+Ранее в переписке:
+{summary}
+
+Новое сообщение:
+{text}
+"""
+
+# Заголовок пакетного запроса: несколько коротких независимых заданий
+# в одном вызове. Ответы разбираются по маркерам "### ОТВЕТ N".
+BATCH_HEADER = """
+Ниже несколько независимых заданий, разделенных строками "### ЗАДАНИЕ N".
+Выполни каждое задание отдельно, не смешивая факты между ними.
+Ответ на задание N начни с отдельной строки "### ОТВЕТ N".
+Ответь на все задания по порядку. Без эмодзи.
+"""
+
 # ==========================================================
 # ФИНАЛЬНЫЕ ПРОМПТЫ ПО ТИПАМ ПИСЕМ
 # ==========================================================
@@ -0,0 +1,141 @@
+"""Per-stage model routing for the summarization pipeline.
+
+Every LLM call belongs to a route:
+
+* ``chunk`` - email chunk summaries;
+* ``attachment.<kind>`` - attachment chunk summaries (``attachment.pdf``,
+  ``attachment.excel``, ``attachment.contract``, ``attachment.generic``);
+* ``merge`` - merging summaries of an email or attachment;
+* ``final`` - the category prompt that produces the text sent to Telegram.
+
+Routes are configured in the optional ``[llm_routes]`` section of
+config.ini. A missing route falls back to a broader one
+(``attachment.excel`` -> ``attachment`` -> ``chunk``) and finally to the
+default ``[llm] model``. Calls, failures, latency and token volume are
+counted per route so high-volume stages can be moved to smaller models
+with data to back it. Latency is the time spent in LLM requests; time a
+call waited locally (concurrency limit, batch window) is kept apart as
+queue time, so a busy route does not look like a slow model.
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Dict, Mapping, Optional
+
+ROUTE_CHUNK = "chunk"
+ROUTE_MERGE = "merge"
+ROUTE_FINAL = "final"
+ROUTE_ATTACHMENT = "attachment"
+ATTACHMENT_KINDS = ("pdf", "excel", "contract", "generic")
+KNOWN_ROUTES = frozenset(
+    [ROUTE_CHUNK, ROUTE_MERGE, ROUTE_FINAL, ROUTE_ATTACHMENT]
+    + [f"{ROUTE_ATTACHMENT}.{kind}" for kind in ATTACHMENT_KINDS]
+)
+
+
+def attachment_route(kind: str) -> str:
+    return f"{ROUTE_ATTACHMENT}.{(kind or 'generic').lower()}"
+
+
+class CallTiming:
+    """Seconds one call spent in LLM requests (a batched call may take two)."""
+
+    __slots__ = ("seconds",)
+
+    def __init__(self) -> None:
+        self.seconds = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.seconds += max(0.0, seconds)
+
+
+@dataclass
+class RouteStats:
+    model: str
+    calls: int = 0
+    failures: int = 0
+    latency_total: float = 0.0
+    queue_total: float = 0.0
+    prompt_tokens: int = 0
+    output_tokens: int = 0
+
+    @property
+    def avg_latency_ms(self) -> float:
+        return self.latency_total / self.calls * 1000.0 if self.calls else 0.0
+
+    @property
+    def avg_queue_ms(self) -> float:
+        return self.queue_total / self.calls * 1000.0 if self.calls else 0.0
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "model": self.model,
+            "calls": self.calls,
+            "failures": self.failures,
+            "avg_latency_ms": round(self.avg_latency_ms, 1),
+            "avg_queue_ms": round(self.avg_queue_ms, 1),
+            "prompt_tokens": self.prompt_tokens,
+            "output_tokens": self.output_tokens,
+        }
+
+
+class ModelRouter:
+    """Maps routes to models and keeps per-route call statistics."""
+
+    def __init__(self, default_model: str = "", routes: Optional[Mapping[str, str]] = None) -> None:
+        self.default_model = default_model
+        self.routes = {key: value for key, value in (routes or {}).items() if value}
+        self._stats: Dict[str, RouteStats] = {}
+        self._lock = threading.Lock()
+
+    def model_for(self, route: str) -> str:
+        candidates = [route]
+        if route.startswith(f"{ROUTE_ATTACHMENT}."):
+            candidates += [ROUTE_ATTACHMENT, ROUTE_CHUNK]
+        for candidate in candidates:
+            model = self.routes.get(candidate)
+            if model:
+                return model
+        return self.default_model
+
+    def record(
+        self,
+        route: str,
+        model: str,
+        latency: float,
+        prompt_tokens: int,
+        output_tokens: int,
+        ok: bool,
+        queued: float = 0.0,
+    ) -> None:
+        with self._lock:
+            stats = self._stats.get(route)
+            if stats is None or stats.model != model:
+                stats = self._stats[route] = RouteStats(model)
+            stats.calls += 1
+            stats.latency_total += latency
+            stats.queue_total += queued
+            stats.prompt_tokens += prompt_tokens
+            stats.output_tokens += output_tokens
+            if not ok:
+                stats.failures += 1
+
+    def stats(self) -> Dict[str, Dict[str, object]]:
+        with self._lock:
+            return {route: stats.as_dict() for route, stats in sorted(self._stats.items())}
+
+
+__all__ = [
+    "ATTACHMENT_KINDS",
+    "CallTiming",
+    "KNOWN_ROUTES",
+    "ModelRouter",
+    "ROUTE_ATTACHMENT",
+    "ROUTE_CHUNK",
+    "ROUTE_FINAL",
+    "ROUTE_MERGE",
+    "RouteStats",
+    "attachment_route",
+]
@@ -0,0 +1,240 @@
+"""Local stand-in for the Cloudflare Workers AI ``/ai/run`` endpoint.
+
+Speaks the request and response shapes ``CloudflareLLMClient`` uses, so the
+whole LLM path can be load-tested without the real API:
+
+* ``POST {base}/accounts/{account}/ai/run/{model}`` with ``messages`` and
+  ``max_tokens``; the answer is ``{"result": {"response", "usage"}}``;
+* ``"stream": true`` switches to Server-Sent Events
+  (``data: {"response": "..."}`` per token, then ``data: [DONE]``);
+* numbered multi-task prompts (see ``llm.batcher``) get one
+  ``### ОТВЕТ N`` block per task.
+
+Timing follows a simple model: time to first token is drawn from a
+log-normal distribution around ``latency_ms``, then every generated word
+costs ``token_interval_ms``. Configurable shares of requests fail with 500
+or are rejected with 429 and ``Retry-After``.
+
+Usage::
+
+    with StubLLMServer(StubProfile(latency_ms=200)) as server:
+        config = CloudflareConfig("acc", "token", api_base=server.api_base)
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+from mailbot_v26.llm.tokens import estimate_tokens
+
+_TASK_RE = re.compile(r"^### ЗАДАНИЕ (\d+)$", re.MULTILINE)
+_WORD_RE = re.compile(r"[^\W_]+")
+
+
+@dataclass
+class StubProfile:
+    latency_ms: float = 300.0
+    # sigma of the log-normal around latency_ms; 0 gives a fixed delay
+    latency_spread: float = 0.4
+    token_interval_ms: float = 4.0
+    response_words: int = 40
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    retry_after: float = 0.05
+    seed: Optional[int] = None
+
+
+@dataclass
+class StubStats:
+    requests: int = 0
+    completed: int = 0
+    errors: int = 0
+    rate_limited: int = 0
+    streams: int = 0
+    streams_cancelled: int = 0
+    generated_words: int = 0
+
+
+def build_response(prompt: str, words: int) -> str:
+    """Deterministic pseudo-summary made of words from the prompt."""
+
+    tasks = list(_TASK_RE.finditer(prompt))
+    if tasks:
+        per_task = max(3, words // len(tasks))
+        blocks = []
+        for idx, task in enumerate(tasks):
+            end = tasks[idx + 1].start() if idx + 1 < len(tasks) else len(prompt)
+            blocks.append(f"### ОТВЕТ {task.group(1)}\n{build_response(prompt[task.end():end], per_task)}")
+        return "\n".join(blocks)
+
+    vocabulary = _WORD_RE.findall(prompt)[-200:] or ["ответ"]
+    picked = [vocabulary[idx % len(vocabulary)] for idx in range(max(1, words))]
+    sentences = [" ".join(picked[idx:idx + 8]) for idx in range(0, len(picked), 8)]
+    return " ".join(sentence[:1].upper() + sentence[1:] + "." for sentence in sentences)
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "StubLLMServer"
+
+    def do_POST(self) -> None:  # noqa: N802 - http.server API
+        length = int(self.headers.get("Content-Length", 0) or 0)
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"success": False, "errors": [{"message": "bad json"}]})
+            return
+
+        outcome, ttft = self.server.draw()
+        if outcome == "rate_limited":
+            self._send_json(
+                429,
+                {"success": False, "errors": [{"message": "rate limited"}]},
+                {"Retry-After": f"{self.server.profile.retry_after:g}"},
+            )
+            return
+        time.sleep(ttft)
+        if outcome == "error":
+            self._send_json(500, {"success": False, "errors": [{"message": "internal error"}]})
+            return
+
+        messages = payload.get("messages") or []
+        prompt = "\n".join(str(message.get("content", "")) for message in messages)
+        words = self.server.profile.response_words
+        max_tokens = payload.get("max_tokens")
+        if isinstance(max_tokens, int) and max_tokens > 0:
+            words = min(words, max_tokens)
+        text = build_response(prompt, words)
+
+        if payload.get("stream"):
+            self._stream(text)
+            return
+        pieces = text.split(" ")
+        time.sleep(len(pieces) * self.server.interval)
+        self.server.record(generated=len(pieces))
+        usage = {"prompt_tokens": estimate_tokens(prompt), "completion_tokens": estimate_tokens(text)}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        self._send_json(200, {"result": {"response": text, "usage": usage}, "success": True, "errors": []})
+
+    def _send_json(self, status: int, payload: Dict, headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        try:
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client timed out or dropped a hedge that lost its race.
+            self.close_connection = True
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _stream(self, text: str) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        pieces = text.split(" ")
+        sent = 0
+        try:
+            for idx, piece in enumerate(pieces):
+                token = piece if idx == 0 else " " + piece
+                event = json.dumps({"response": token}, ensure_ascii=False)
+                self._write_chunk(f"data: {event}\n\n".encode("utf-8"))
+                sent += 1
+                time.sleep(self.server.interval)
+            self._write_chunk(b"data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+            self.server.record(generated=sent, stream=True, cancelled=True)
+            return
+        self.server.record(generated=sent, stream=True)
+
+    def log_message(self, *args) -> None:
+        return None
+
+
+class StubLLMServer(ThreadingHTTPServer):
+    """Threaded stub server; ``api_base`` goes into ``CloudflareConfig``."""
+
+    daemon_threads = True
+
+    def __init__(self, profile: Optional[StubProfile] = None, host: str = "127.0.0.1", port: int = 0) -> None:
+        super().__init__((host, port), _StubHandler)
+        self.profile = profile or StubProfile()
+        self.stats = StubStats()
+        self._rng = random.Random(self.profile.seed)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def api_base(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/client/v4"
+
+    @property
+    def interval(self) -> float:
+        return max(0.0, self.profile.token_interval_ms) / 1000.0
+
+    def draw(self) -> tuple[str, float]:
+        """Pick the outcome and time to first token for one request."""
+
+        profile = self.profile
+        with self._lock:
+            self.stats.requests += 1
+            roll = self._rng.random()
+            ttft = profile.latency_ms * math.exp(self._rng.gauss(0.0, profile.latency_spread))
+            if roll < profile.rate_limit_rate:
+                self.stats.rate_limited += 1
+                return "rate_limited", 0.0
+            if roll < profile.rate_limit_rate + profile.error_rate:
+                self.stats.errors += 1
+                return "error", max(0.0, ttft) / 1000.0
+        return "ok", max(0.0, ttft) / 1000.0
+
+    def record(self, generated: int, stream: bool = False, cancelled: bool = False) -> None:
+        with self._lock:
+            self.stats.generated_words += generated
+            if stream:
+                self.stats.streams += 1
+            if cancelled:
+                self.stats.streams_cancelled += 1
+            else:
+                self.stats.completed += 1
+
+    def start(self) -> "StubLLMServer":
+        self._thread = threading.Thread(
+            target=self.serve_forever, kwargs={"poll_interval": 0.05}, name="llm-stub", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self.shutdown()
+            self._thread = None
+        self.server_close()
+
+    def __enter__(self) -> "StubLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+__all__ = ["StubLLMServer", "StubProfile", "StubStats", "build_response"]
@@ -1,35 +1,113 @@
-from typing import Callable, List, Optional
+import threading
+import time
+from itertools import chain, islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence
 
-from mailbot_v26.llm.chunker import chunk_text
+from mailbot_v26.llm.batcher import PromptBatcher
+from mailbot_v26.llm.cache import LLMResponseCache
+from mailbot_v26.llm.chunker import DEFAULT_CHUNK_TOKENS, iter_chunks_by_tokens
+from mailbot_v26.llm.circuit import CircuitBreaker
+from mailbot_v26.llm.extractive import extract_summary
+from mailbot_v26.llm.fanout import map_ordered
 from mailbot_v26.llm import prompts_ru
+from mailbot_v26.llm.progressive import FactSheet, required_facts
+from mailbot_v26.llm.routing import (
+    ROUTE_CHUNK,
+    ROUTE_FINAL,
+    ROUTE_MERGE,
+    CallTiming,
+    ModelRouter,
+    attachment_route,
+)
+from mailbot_v26.llm.tokens import estimate_tokens
+from mailbot_v26.llm.triggers import TriggerMatcher
+
+DEFAULT_MERGE_FAN_IN = 4
+
+_TRIGGER_MATCHER = TriggerMatcher(prompts_ru.TRIGGERS)
 
 
 class LLMSummarizer:
-    def __init__(self, llm_call: Optional[Callable[[str], str]]):
+    def __init__(
+        self,
+        llm_call: Optional[Callable[[str], str]],
+        cache: Optional[LLMResponseCache] = None,
+        model: str = "",
+        max_concurrency: int = 1,
+        breaker: Optional[CircuitBreaker] = None,
+        chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+        merge_fan_in: int = DEFAULT_MERGE_FAN_IN,
+        batch_window: float = 0.0,
+        batch_max_items: int = 6,
+        extract_tokens: int = 0,
+        output_char_limit: int = 0,
+        router: Optional[ModelRouter] = None,
+        progressive: bool = False,
+    ):
         self.llm_call = llm_call
+        self.cache = cache
+        self.model = model
+        self.max_concurrency = max(1, max_concurrency)
+        self._inflight = threading.BoundedSemaphore(self.max_concurrency)
+        self.breaker = breaker
+        self.chunk_tokens = chunk_tokens
+        self.merge_fan_in = max(2, merge_fan_in)
+        # Inputs longer than this are condensed extractively first (0 = off).
+        self.extract_tokens = max(0, extract_tokens)
+        # With a streaming transport, stop reading once a response reaches
+        # this many characters; the pipeline would cut it there anyway.
+        self.output_char_limit = max(0, output_char_limit)
+        self.router = router if router is not None else ModelRouter(model)
+        # Opt-in: small prompts arriving within the window share one request.
+        # One batcher per model, since a batch goes to a single model.
+        self.batch_window = max(0.0, batch_window)
+        self.batch_max_items = batch_max_items
+        self._batchers: Dict[str, PromptBatcher] = {}
+        self._batchers_lock = threading.Lock()
+        # Opt-in: stop summarizing chunks once the category's key facts
+        # (amount, due date, document number, action) have been read.
+        self.progressive = progressive
+        self.early_stops = 0
 
-    def summarize_email(self, text: str) -> str:
+    def summarize_email(self, text: str, max_chunks: Optional[int] = None, context: str = "") -> str:
+        """Summarize an email; ``context`` is the summary of its thread so far."""
         if not text:
             return ""
-        if not self.llm_call:
+        if not self._llm_available():
             return self._fallback(text)
 
+        text = self._condense(text)
+        # The thread context goes to the LLM only, never into the fallback.
+        source = prompts_ru.THREAD_UPDATE.format(summary=context, text=text).strip() if context else text
+        chunks = self._chunks(source, max_chunks)
+        head = list(islice(chunks, 2))
+        if len(head) == 1:
+            # Short mail: one call with the category prompt instead of
+            # chunk -> merge -> final.
+            final_prompt = self._select_final_prompt("", text)
+            single = self._safe_call(
+                prompts_ru.SINGLE_PASS_PREFIX + final_prompt.format(summary=head[0]), ROUTE_FINAL
+            )
+            return single.strip() if single.strip() else self._fallback(text)
+
         base = self._chunk_and_merge(
-            text,
+            chain(head, chunks),
             prompts_ru.EMAIL_CHUNK,
             prompts_ru.EMAIL_MERGE,
+            ROUTE_CHUNK,
+            self._required_facts(text),
         )
         if not base:
             return self._fallback(text)
 
         final_prompt = self._select_final_prompt(base, text)
-        final = self._safe_call(final_prompt.format(summary=base))
+        final = self._safe_call(final_prompt.format(summary=base), ROUTE_FINAL)
         return final.strip() if final else self._fallback(text)
 
-    def summarize_attachment(self, text: str, kind: str = "PDF") -> str:
+    def summarize_attachment(self, text: str, kind: str = "PDF", max_chunks: Optional[int] = None) -> str:
         if not text:
             return ""
-        if not self.llm_call:
+        if not self._llm_available():
             return self._fallback(text)
 
         chunk_prompt = {
@@ -38,48 +116,222 @@ class LLMSummarizer:
             "CONTRACT": prompts_ru.ATTACHMENT_CHUNK_CONTRACT,
         }.get(kind, prompts_ru.ATTACHMENT_CHUNK_GENERIC)
 
-        merged = self._chunk_and_merge(text, chunk_prompt, prompts_ru.ATTACHMENT_MERGE)
+        condensed = self._condense(text)
+        merged = self._chunk_and_merge(
+            self._chunks(condensed, max_chunks),
+            chunk_prompt,
+            prompts_ru.ATTACHMENT_MERGE,
+            attachment_route(kind),
+            self._required_facts(condensed, "LEGAL" if kind == "CONTRACT" else ""),
+        )
         return merged if merged else self._fallback(text)
 
-    def _chunk_and_merge(self, text: str, chunk_prompt: str, merge_prompt: str) -> str:
-        chunks = chunk_text(text)
-        if not chunks:
-            return ""
+    def _condense(self, text: str) -> str:
+        if not self.extract_tokens or estimate_tokens(text) <= self.extract_tokens:
+            return text
+        return extract_summary(text, max_tokens=self.extract_tokens, separator="\n") or text
+
+    def _chunks(self, text: str, max_chunks: Optional[int]) -> Iterator[str]:
+        chunks = iter(iter_chunks_by_tokens(text, self.chunk_tokens))
+        return islice(chunks, max_chunks) if max_chunks else chunks
+
+    def _required_facts(self, text: str, category: str = "") -> Sequence[str]:
+        if not self.progressive:
+            return ()
+        return required_facts(category or _TRIGGER_MATCHER.best(text))
+
+    def _chunk_and_merge(
+        self,
+        chunks: Iterable[str],
+        chunk_prompt: str,
+        merge_prompt: str,
+        chunk_route: str,
+        required: Sequence[str] = (),
+    ) -> str:
+        def summarize(chunk: str) -> str:
+            return self._safe_call(chunk_prompt.format(text=chunk), chunk_route)
 
         summaries: List[str] = []
-        for chunk in chunks:
-            out = self._safe_call(chunk_prompt.format(text=chunk))
-            if out:
-                cleaned = out.strip()
-                if cleaned:
-                    summaries.append(cleaned)
-
-        if not summaries:
-            return ""
+        if not required:
+            outputs = map_ordered(summarize, chunks, self.max_concurrency)
+            summaries = [out.strip() for out in outputs if out and out.strip()]
+            return self._reduce(summaries, merge_prompt)
+
+        # Progressive: read chunks in waves of ``max_concurrency`` and stop
+        # as soon as every required fact has been seen.
+        facts = FactSheet(required)
+        remaining = iter(chunks)
+        while True:
+            wave = list(islice(remaining, self.max_concurrency))
+            if not wave:
+                break
+            outputs = map_ordered(summarize, wave, self.max_concurrency)
+            summaries.extend(out.strip() for out in outputs if out and out.strip())
+            for chunk in wave:
+                facts.add(chunk)
+            if facts.complete():
+                if next(remaining, None) is not None:
+                    self.early_stops += 1
+                break
+        return self._reduce(summaries, merge_prompt)
+
+    def _reduce(self, summaries: List[str], merge_prompt: str) -> str:
+        """Merge summaries as a tree so no merge prompt outgrows the context.
 
-        merged = self._safe_call(merge_prompt.format(summaries="\n".join(summaries)))
+        Each level merges groups of at most ``merge_fan_in`` summaries (and
+        at most ``chunk_tokens`` tokens) concurrently, until one remains.
+        """
+        level = summaries
+        while len(level) > 1:
+            groups = self._merge_groups(level)
+            merged = map_ordered(
+                lambda group: group[0] if len(group) == 1 else self._merge_group(group, merge_prompt),
+                groups,
+                self.max_concurrency,
+            )
+            if not all(merged):
+                return ""
+            level = merged
+        return level[0] if level else ""
+
+    def _merge_group(self, group: List[str], merge_prompt: str) -> str:
+        merged = self._safe_call(merge_prompt.format(summaries="\n".join(group)), ROUTE_MERGE)
         return merged.strip() if merged else ""
 
+    def _merge_groups(self, level: List[str]) -> List[List[str]]:
+        groups: List[List[str]] = []
+        current: List[str] = []
+        used = 0
+        for summary in level:
+            tokens = estimate_tokens(summary)
+            if current and (len(current) >= self.merge_fan_in or used + tokens > self.chunk_tokens):
+                groups.append(current)
+                current, used = [], 0
+            current.append(summary)
+            used += tokens
+        groups.append(current)
+        if all(len(group) == 1 for group in groups):
+            # Oversized summaries: still make progress by merging pairs.
+            groups = [level[idx:idx + 2] for idx in range(0, len(level), 2)]
+        return groups
+
     def _select_final_prompt(self, summary: str, raw_text: str) -> str:
-        combined = f"{summary}\n{raw_text}".lower()
-        for key, triggers in prompts_ru.TRIGGERS.items():
-            if any(trigger.lower() in combined for trigger in triggers):
-                return prompts_ru.FINAL_PROMPTS.get(key, prompts_ru.FINAL_PROMPTS["GENERIC"])
-        return prompts_ru.FINAL_PROMPTS["GENERIC"]
+        key = _TRIGGER_MATCHER.best(f"{summary}\n{raw_text}")
+        return prompts_ru.FINAL_PROMPTS.get(key, prompts_ru.FINAL_PROMPTS["GENERIC"])
+
+    def _llm_available(self) -> bool:
+        if not self.llm_call:
+            return False
+        return self.breaker is None or self.breaker.available()
 
-    def _safe_call(self, prompt: str) -> str:
+    def _safe_call(self, prompt: str, route: str = ROUTE_FINAL) -> str:
         if not self.llm_call:
             return ""
+        model = self.router.model_for(route)
+        if self.cache is not None:
+            cached = self.cache.get(model, prompt)
+            if cached is not None:
+                return cached
+        if self.breaker is not None and not self.breaker.allow_request():
+            return ""
+        started = time.monotonic()
+        timing = CallTiming()
         try:
-            result = self.llm_call(prompt)
-            if isinstance(result, str):
-                return result
+            batcher = self._batcher_for(model)
+            if batcher is not None and batcher.accepts(prompt):
+                result = batcher.submit(prompt, timing)
+            else:
+                result = self._call_llm(prompt, model=model, timing=timing)
+        except Exception as exc:
+            self._record_route(route, model, started, timing, prompt, "")
+            if self.breaker is not None:
+                self.breaker.record_failure(str(exc))
             return ""
-        except Exception:
+        if not isinstance(result, str) or not result.strip():
+            self._record_route(route, model, started, timing, prompt, "")
+            if self.breaker is not None:
+                self.breaker.record_failure()
             return ""
+        self._record_route(route, model, started, timing, prompt, result)
+        if self.breaker is not None:
+            self.breaker.record_success()
+        if self.cache is not None and result.strip():
+            self.cache.put(model, prompt, result)
+        return result
+
+    def _record_route(
+        self, route: str, model: str, started: float, timing: CallTiming, prompt: str, result: str
+    ) -> None:
+        # Request time only; waiting for a slot or a batch is queue time.
+        elapsed = time.monotonic() - started
+        self.router.record(
+            route,
+            model,
+            timing.seconds,
+            estimate_tokens(prompt),
+            estimate_tokens(result),
+            ok=bool(result.strip()),
+            queued=max(0.0, elapsed - timing.seconds),
+        )
+
+    def _batcher_for(self, model: str) -> Optional[PromptBatcher]:
+        if self.batch_window <= 0:
+            return None
+        with self._batchers_lock:
+            batcher = self._batchers.get(model)
+            if batcher is None:
+                batcher = PromptBatcher(
+                    lambda prompt, max_tokens: self._request(prompt, max_tokens, model),
+                    window=self.batch_window,
+                    max_items=self.batch_max_items,
+                    slots=self._inflight,
+                    allow=self._llm_available,
+                )
+                self._batchers[model] = batcher
+            return batcher
+
+    def _call_llm(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        model: str = "",
+        timing: Optional[CallTiming] = None,
+    ) -> str:
+        with self._inflight:
+            started = time.monotonic()
+            try:
+                return self._request(prompt, max_tokens, model)
+            finally:
+                if timing is not None:
+                    timing.add(time.monotonic() - started)
+
+    def _request(self, prompt: str, max_tokens: Optional[int] = None, model: str = "") -> str:
+        """One LLM request; the caller holds a concurrency slot."""
+        options: Dict[str, object] = {}
+        if getattr(self.llm_call, "accepts_options", False):
+            if model and model != self.model:
+                options["model"] = model
+            if max_tokens:
+                options["max_tokens"] = max_tokens
+        stream = getattr(self.llm_call, "stream", None)
+        if self.output_char_limit and callable(stream) and not max_tokens:
+            return self._read_stream(stream(prompt, **options))
+        return self.llm_call(prompt, **options)
+
+    def _read_stream(self, pieces: Iterator[str]) -> str:
+        parts: List[str] = []
+        size = 0
+        try:
+            for piece in pieces:
+                parts.append(piece)
+                size += len(piece)
+                if size >= self.output_char_limit:
+                    break
+        finally:
+            close = getattr(pieces, "close", None)
+            if close is not None:
+                close()
+        return "".join(parts)
 
     def _fallback(self, text: str) -> str:
-        trimmed = text.strip()[:600]
-        if len(text.strip()) > 600:
-            return trimmed + "..."
-        return trimmed
+        return extract_summary(text, max_chars=600)
@@ -0,0 +1,129 @@
+"""Single-pass category detection over ``prompts_ru.TRIGGERS``.
+
+All trigger phrases are compiled once into one regular expression shaped
+like a trie (shared prefixes are factored out), so an email is scanned a
+single time instead of once per trigger. Every hit adds a weight to each
+category that lists the phrase and the best-scoring category picks the
+final prompt.
+
+Matching rules:
+
+* triggers match at the start of a word, so stems like ``"скидк"`` still
+  cover ``"скидка"``/``"скидки"`` but ``"иск"`` does not fire inside
+  ``"риск"``;
+* triggers of one or two characters (``"до"``, ``"hr"``) must be whole
+  words;
+* spaces inside a phrase match any run of whitespace;
+* longer phrases weigh more, repeated hits of the same phrase add less
+  and less, and the catch-all ``GENERIC`` category counts half.
+"""
+
+from __future__ import annotations
+
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Mapping, Optional
+
+DEFAULT_CATEGORY = "GENERIC"
+SHORT_TRIGGER_CHARS = 2
+REPEAT_WEIGHT = 0.25
+MAX_COUNTED_REPEATS = 4
+DEFAULT_CATEGORY_WEIGHTS = {"GENERIC": 0.5}
+
+
+@dataclass
+class CategoryScore:
+    score: float = 0.0
+    hits: Counter = field(default_factory=Counter)
+
+
+def trigger_weight(phrase: str) -> float:
+    if len(phrase) <= SHORT_TRIGGER_CHARS:
+        return 0.5
+    return 1.0 + 0.5 * (len(phrase.split()) - 1)
+
+
+def _trie_pattern(phrases: Iterable[str]) -> str:
+    trie: Dict[str, dict] = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [
+            (r"\s+" if char == " " else re.escape(char)) + build(child)
+            for char, child in sorted(node.items())
+            if char
+        ]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            return "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+
+class TriggerMatcher:
+    """Compiled trigger table; ``best`` returns the winning category."""
+
+    def __init__(
+        self,
+        triggers: Mapping[str, Iterable[str]],
+        category_weights: Optional[Mapping[str, float]] = None,
+        default: str = DEFAULT_CATEGORY,
+    ) -> None:
+        self.default = default
+        self.category_weights = dict(DEFAULT_CATEGORY_WEIGHTS if category_weights is None else category_weights)
+        self._order = list(triggers)
+        self._categories: Dict[str, List[str]] = {}
+        for category, phrases in triggers.items():
+            for phrase in phrases:
+                key = " ".join(phrase.lower().split())
+                if key and category not in self._categories.setdefault(key, []):
+                    self._categories[key].append(category)
+        self._pattern = re.compile(r"(?<!\w)" + _trie_pattern(self._categories)) if self._categories else None
+
+    def scan(self, text: str) -> Dict[str, CategoryScore]:
+        """Per-category weighted score and per-phrase hit counts."""
+
+        scores: Dict[str, CategoryScore] = {}
+        if not text or self._pattern is None:
+            return scores
+        lowered = text.lower()
+        counts: Counter = Counter()
+        for match in self._pattern.finditer(lowered):
+            phrase = match.group(0)
+            if " " not in phrase and len(phrase) <= SHORT_TRIGGER_CHARS:
+                end = match.end()
+                if end < len(lowered) and (lowered[end].isalnum() or lowered[end] == "_"):
+                    continue
+            counts[" ".join(phrase.split())] += 1
+
+        for phrase, count in counts.items():
+            weight = trigger_weight(phrase) * (1 + REPEAT_WEIGHT * (min(count, MAX_COUNTED_REPEATS) - 1))
+            for category in self._categories.get(phrase, ()):
+                entry = scores.setdefault(category, CategoryScore())
+                entry.score += weight * self.category_weights.get(category, 1.0)
+                entry.hits[phrase] += count
+        return scores
+
+    def best(self, text: str) -> str:
+        scores = self.scan(text)
+        if not scores:
+            return self.default
+        # Highest score wins; ties keep the TRIGGERS order.
+        return max(
+            scores,
+            key=lambda category: (
+                scores[category].score,
+                -self._order.index(category) if category in self._order else 0,
+            ),
+        )
+
+
+__all__ = ["CategoryScore", "TriggerMatcher", "trigger_weight"]
@@ -0,0 +1,279 @@
+"""Per-sender-domain index of repeated boilerplate lines.
+
+Corporate mail carries the same legal disclaimer, marketing footer and
+address block in every message. For each sender domain the index tracks
+how often each line occurs, keyed by a short hash of the line with case
+and whitespace folded. The frequency decays with every new message of
+the domain, so it reflects roughly the last ``window`` messages. A line
+counts as boilerplate once it occurs in at least ``min_share`` of those
+messages and the domain has sent at least ``min_messages`` of them. The
+current message is learned only after it has been cleaned, so a line is
+never stripped the first times it appears.
+
+Only the leading and trailing blocks of a body are stripped, where
+banners, disclaimers and footers sit. The trailing block is the run of
+boilerplate lines at the end (blank lines and known short lines in
+between do not end it). The leading block must also be followed by a
+blank line. A recurring content line ("Во вложении счет на оплату по
+договору ...") next to a changing line (the amount) is therefore kept,
+however often the sender repeats it.
+
+Free mail domains (gmail.com, mail.ru, ...) are keyed by the full address,
+so unrelated senders are not counted together.
+
+A message is learned once per ``Message-ID`` (the last
+``RECENT_MESSAGE_IDS`` of each domain are remembered), so the same mail
+delivered to several mailboxes or processed again does not inflate the
+counts.
+
+Short lines (greetings, "Счет во вложении.") are never stripped, and a
+body is never stripped down to nothing. The index is bounded: at most
+``max_domains`` domains (least recently seen are dropped) and
+``max_lines`` fingerprints per domain (rarest are dropped). It is kept in
+a small JSON file next to ``state.json``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+DEFAULT_BOILERPLATE_PATH = Path(__file__).resolve().parent.parent / "boilerplate.json"
+MIN_LINE_CHARS = 25
+RECENT_MESSAGE_IDS = 200
+# Shared mailbox providers: their senders have nothing in common.
+PUBLIC_MAIL_DOMAINS = frozenset(
+    {
+        "gmail.com",
+        "googlemail.com",
+        "outlook.com",
+        "hotmail.com",
+        "live.com",
+        "yahoo.com",
+        "icloud.com",
+        "mail.ru",
+        "inbox.ru",
+        "list.ru",
+        "bk.ru",
+        "yandex.ru",
+        "ya.ru",
+        "rambler.ru",
+    }
+)
+
+logger = logging.getLogger(__name__)
+
+_DOMAIN_RE = re.compile(r"@([\w.-]+\.\w+)")
+_ADDRESS_RE = re.compile(r"([\w.+-]+@[\w.-]+\.\w+)")
+_EXTRA_BLANKS_RE = re.compile(r"\n{3,}")
+
+
+def sender_domain(sender: str) -> str:
+    """Lowercase domain of a ``From`` value, "" when there is none."""
+    matches = _DOMAIN_RE.findall(sender or "")
+    return matches[-1].lower().rstrip(".") if matches else ""
+
+
+def sender_key(sender: str) -> str:
+    """Index key of a sender: its domain, or the address on free mail domains."""
+    domain = sender_domain(sender)
+    if domain in PUBLIC_MAIL_DOMAINS:
+        addresses = _ADDRESS_RE.findall(sender or "")
+        return addresses[-1].lower().rstrip(".") if addresses else domain
+    return domain
+
+
+def line_fingerprint(line: str) -> str:
+    folded = " ".join(line.lower().split())
+    return hashlib.blake2b(folded.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class _DomainLines:
+    __slots__ = ("messages", "lines", "recent")
+
+    def __init__(
+        self,
+        messages: int = 0,
+        lines: Optional[Dict[str, List[float]]] = None,
+        recent: Optional[List[str]] = None,
+    ) -> None:
+        self.messages = messages
+        # fingerprint -> [decayed count as of its last message, message number last seen]
+        self.lines: Dict[str, List[float]] = lines or {}
+        # Message-IDs already learned, oldest first.
+        self.recent: List[str] = recent or []
+
+
+class BoilerplateIndex:
+    """Learns and strips lines that a sender domain repeats in every mail."""
+
+    def __init__(
+        self,
+        path: Optional[Path] = DEFAULT_BOILERPLATE_PATH,
+        min_messages: int = 3,
+        max_domains: int = 500,
+        max_lines: int = 300,
+        min_share: float = 0.5,
+        window: int = 20,
+    ) -> None:
+        self.path = path
+        self.min_messages = max(1, min_messages)
+        self.max_domains = max(1, max_domains)
+        self.max_lines = max(1, max_lines)
+        self.min_share = min(1.0, max(0.0, min_share))
+        self.decay = 1.0 - 1.0 / max(2, window)
+        self.stripped_lines = 0
+        self.stripped_chars = 0
+        self._domains: "OrderedDict[str, _DomainLines]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._load()
+
+    def strip(self, sender: str, text: str, message_id: str = "") -> str:
+        """``text`` without the sender domain's leading and trailing boilerplate.
+
+        ``sender`` must contain the address, not only the display name.
+        """
+        key = sender_key(sender)
+        if not key or not text:
+            return text
+        lines = text.split("\n")
+        fingerprints = [line_fingerprint(line) if line.strip() else "" for line in lines]
+        with self._lock:
+            entry = self._domains.get(key)
+            known = [
+                bool(fingerprint) and entry is not None and self._is_boilerplate(entry, fingerprint)
+                for fingerprint in fingerprints
+            ]
+            drop = _edge_blocks(lines, known)
+            kept = [line for idx, line in enumerate(lines) if idx not in drop]
+            self._learn(key, {fingerprint for fingerprint in fingerprints if fingerprint}, message_id)
+            if not drop or not any(line.strip() for line in kept):
+                return text
+            self.stripped_lines += len(drop)
+            self.stripped_chars += sum(len(lines[idx]) for idx in drop)
+        return _EXTRA_BLANKS_RE.sub("\n\n", "\n".join(kept)).strip()
+
+    def _score(self, entry: _DomainLines, fingerprint: str) -> float:
+        seen = entry.lines.get(fingerprint)
+        if seen is None:
+            return 0.0
+        return seen[0] * self.decay ** (entry.messages - seen[1])
+
+    def _is_boilerplate(self, entry: _DomainLines, fingerprint: str) -> bool:
+        if entry.messages < self.min_messages:
+            return False
+        # Decayed number of messages, the denominator of the share.
+        total = (1.0 - self.decay ** entry.messages) / (1.0 - self.decay)
+        return self._score(entry, fingerprint) >= self.min_share * total
+
+    def _learn(self, key: str, fingerprints: set, message_id: str = "") -> None:
+        entry = self._domains.pop(key, None) or _DomainLines()
+        self._domains[key] = entry
+        while len(self._domains) > self.max_domains:
+            self._domains.popitem(last=False)
+        if message_id:
+            if message_id in entry.recent:
+                return
+            entry.recent.append(message_id)
+            del entry.recent[:-RECENT_MESSAGE_IDS]
+        entry.messages += 1
+        for fingerprint in fingerprints:
+            entry.lines[fingerprint] = [self._score(entry, fingerprint) + 1.0, entry.messages]
+        if len(entry.lines) > self.max_lines:
+            # Keep the most frequent three quarters.
+            ranked = sorted(entry.lines, key=lambda fingerprint: self._score(entry, fingerprint), reverse=True)
+            entry.lines = {fingerprint: entry.lines[fingerprint] for fingerprint in ranked[: self.max_lines * 3 // 4]}
+        self._dirty = True
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "domains": len(self._domains),
+                "stripped_lines": self.stripped_lines,
+                "stripped_chars": self.stripped_chars,
+            }
+
+    def _load(self) -> None:
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as fh:
+                raw = json.load(fh)
+            for domain, data in raw.get("domains", {}).items():
+                self._domains[domain] = _DomainLines(
+                    int(data["messages"]),
+                    {key: [float(seen[0]), int(seen[1])] for key, seen in data["lines"].items()},
+                    list(data.get("recent", [])),
+                )
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            logger.warning("Boilerplate index reset: %s", exc)
+            self._domains.clear()
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = {
+                "domains": {
+                    domain: {"messages": entry.messages, "lines": entry.lines, "recent": entry.recent}
+                    for domain, entry in self._domains.items()
+                }
+            }
+            try:
+                tmp_file = self.path.with_suffix(".tmp")
+                with open(tmp_file, "w", encoding="utf-8") as fh:
+                    json.dump(payload, fh, separators=(",", ":"))
+                tmp_file.replace(self.path)
+                self._dirty = False
+            except OSError as exc:
+                logger.warning("Boilerplate index not saved: %s", exc)
+
+
+def _edge_blocks(lines: List[str], known: List[bool]) -> set:
+    """Indexes of the boilerplate lines in the leading and trailing blocks."""
+
+    def stripped(idx: int) -> bool:
+        return known[idx] and len(lines[idx]) >= MIN_LINE_CHARS
+
+    def transparent(idx: int) -> bool:
+        # Blank lines and known short lines (a phone, a company name) do
+        # not end a block, and are not stripped either.
+        return not lines[idx].strip() or known[idx]
+
+    drop = set()
+    for idx in range(len(lines) - 1, -1, -1):
+        if not transparent(idx):
+            break
+        if stripped(idx):
+            drop.add(idx)
+
+    leading = set()
+    for idx, line in enumerate(lines):
+        if not line.strip():
+            # A banner is a paragraph of its own.
+            drop |= leading
+            break
+        if not transparent(idx):
+            break
+        if stripped(idx):
+            leading.add(idx)
+    return drop
+
+
+__all__ = [
+    "BoilerplateIndex",
+    "DEFAULT_BOILERPLATE_PATH",
+    "PUBLIC_MAIL_DOMAINS",
+    "line_fingerprint",
+    "sender_domain",
+    "sender_key",
+]
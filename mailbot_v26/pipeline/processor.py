@@ -1,13 +1,29 @@
 from __future__ import annotations
 
-import re
+import threading
 from dataclasses import dataclass
 from datetime import datetime
 from typing import List, Optional
 
+from mailbot_v26.bot_core.action_engine import analyze_action
+from mailbot_v26.bot_core.validation import MIN_SIMILARITY, FactIndex, validate_summary
+from mailbot_v26.llm.budget import FULL_DECISION, BudgetDecision, TokenBudget
+from mailbot_v26.llm.extractive import extract_summary
+from mailbot_v26.llm.fanout import map_ordered
 from mailbot_v26.llm.summarizer import LLMSummarizer
+from mailbot_v26.pipeline.boilerplate import BoilerplateIndex
+from mailbot_v26.pipeline.threads import ThreadContext, ThreadStore
 
-from mailbot_v26.text import clean_email_body, sanitize_text
+from mailbot_v26.text import latest_reply, sanitize_text, strip_signature
+
+# Output limits: each LLM summary, and the whole Telegram message.
+SUMMARY_CHAR_LIMIT = 1200
+MESSAGE_CHAR_LIMIT = 3500
+# Input limits for the normalized body and attachment texts. Both are
+# several chunks long, so long mail goes through chunk -> merge (and the
+# budget's chunk limit) instead of being cut to a single chunk.
+BODY_CHAR_LIMIT = 20000
+ATTACHMENT_CHAR_LIMIT = 40000
 
 
 @dataclass
@@ -16,32 +32,78 @@ class Attachment:
     content: bytes
     content_type: str = ""
     text: str | None = None
+    # ``text`` after sanitize_text; once set, later stages use it as is.
+    normalized_text: str | None = None
+
+    def normalize(self) -> str:
+        if self.normalized_text is None:
+            self.normalized_text = sanitize_text(self.text or "", max_len=ATTACHMENT_CHAR_LIMIT)
+        return self.normalized_text
 
 
 @dataclass
 class InboundMessage:
     subject: str
     body: str
+    # Display name when there is one; ``sender_address`` is the bare address.
     sender: str = ""
+    sender_address: str = ""
     received_at: datetime | None = None
     attachments: List[Attachment] | None = None
+    priority: bool = False
+    # ``body`` without quoted/forwarded parts, sanitized; computed once.
+    normalized_body: str | None = None
+    # Threading headers, angle brackets included.
+    message_id: str = ""
+    in_reply_to: str = ""
+    references: List[str] | None = None
 
     def __post_init__(self) -> None:
         if self.attachments is None:
             self.attachments = []
+        if self.references is None:
+            self.references = []
+
+    def normalize(self) -> str:
+        if self.normalized_body is None:
+            # The new text of a reply; a bare forward keeps its forwarded body.
+            raw = self.body or ""
+            body = strip_signature(latest_reply(raw) or raw)
+            self.normalized_body = sanitize_text(body, max_len=BODY_CHAR_LIMIT)
+        return self.normalized_body
 
 
 class MessageProcessor:
     """Single premium pipeline entry point."""
 
-    def __init__(self, config, state) -> None:
+    def __init__(
+        self,
+        config,
+        state,
+        llm: Optional[LLMSummarizer] = None,
+        budget: Optional[TokenBudget] = None,
+        threads: Optional[ThreadStore] = None,
+        boilerplate: Optional[BoilerplateIndex] = None,
+    ) -> None:
         self.config = config
         self.state = state
-        self.llm = LLMSummarizer(config.llm_call)
+        self.llm = llm if llm is not None else LLMSummarizer(config.llm_call)
+        self.budget = budget
+        self.threads = threads
+        self.boilerplate = boilerplate
+        # Anti-hallucination check of LLM summaries against the source.
+        llm_config = getattr(config, "llm", None)
+        self.validate_summaries = bool(getattr(llm_config, "validate_summaries", False))
+        self.min_similarity = getattr(llm_config, "validation_min_similarity", MIN_SIMILARITY)
+        self.validation_rejects = 0
+        self._rejects_lock = threading.Lock()
 
     def process(self, account_login: str, message: InboundMessage) -> Optional[str]:
         try:
-            return self._build(account_login, message)
+            if self.budget is None:
+                return self._build(account_login, message)
+            with self.budget.account(account_login):
+                return self._build(account_login, message)
         except Exception:
             return None
 
@@ -51,27 +113,39 @@ class MessageProcessor:
         sender_line = sanitize_text((message.sender or "").strip() or account_login, max_len=200)
         subject_line = sanitize_text((message.subject or "Без темы").strip(), max_len=300)
 
-        body_clean = clean_email_body(message.body or "")
-        body_clean = sanitize_text(body_clean, max_len=6000)
-
-        body_summary_raw = self.llm.summarize_email(body_clean)
-        body_summary = sanitize_text(body_summary_raw, max_len=1200)
-        if not self._is_meaningful(body_summary):
-            body_summary = self._fallback_summary(body_clean)
+        thread = self._thread_context(message)
+        context = thread.summary if thread is not None else ""
+        # Only the new reply is summarized; a known thread adds its summary
+        # as context instead of the whole quoted chain.
+        body_text = message.normalize()
+        if self.boilerplate is not None:
+            # Disclaimers and footers this sender's domain repeats in every mail.
+            body_text = self.boilerplate.strip(
+                message.sender_address or message.sender or "", body_text, message.message_id
+            )
+
+        attachments = message.attachments or []
+        # Body and attachments are independent LLM jobs; run them together
+        # under the summarizer's concurrency limit and keep their order.
+        jobs: List[tuple[Optional[str], str]] = [(None, body_text)]
+        jobs.extend((self._detect_attachment_kind(att.filename), att.normalize()) for att in attachments)
+        decision = self._budget_decision(account_login, message)
+        # One index of the whole message serves every summary check.
+        index = FactIndex(context, *(text for _, text in jobs)) if self.validate_summaries else None
+        results = map_ordered(
+            lambda job: self._summarize_job(job, decision, index, context),
+            jobs,
+            getattr(self.llm, "max_concurrency", 1),
+        )
+        summaries = [summary for summary, _ in results]
 
-        attachment_blocks: List[tuple[str, str]] = []
-        for att in message.attachments or []:
-            att_text = sanitize_text(att.text or "", max_len=4000)
-            kind = self._detect_attachment_kind(att.filename)
-            summary = ""
-            if att_text:
-                summary_raw = self.llm.summarize_attachment(att_text, kind=kind)
-                summary = sanitize_text(summary_raw, max_len=1200)
-                if not self._is_meaningful(summary):
-                    summary = self._fallback_summary(att_text, limit=600)
-            if not summary:
-                summary = "Документ. Текст не извлечён."
-            attachment_blocks.append((att.filename or "Вложение", summary))
+        body_summary = summaries[0]
+        if thread is not None and self.threads is not None:
+            # Fallback and placeholder texts are no context for the next reply.
+            self.threads.record(message.message_id, thread.thread_id, body_summary if results[0][1] else "")
+        attachment_blocks: List[tuple[str, str]] = [
+            (att.filename or "Вложение", summary) for att, summary in zip(attachments, summaries[1:])
+        ]
 
         lines: List[str] = [timestamp_line, sender_line, subject_line, ""]
 
@@ -89,10 +163,65 @@ class MessageProcessor:
             lines.append("Служебное письмо. Краткое содержание недоступно.")
 
         result = "\n".join(lines).strip()
-        if len(result) > 3500:
-            result = result[:3497] + "..."
+        if len(result) > MESSAGE_CHAR_LIMIT:
+            result = result[: MESSAGE_CHAR_LIMIT - 3] + "..."
         return result
 
+    def _thread_context(self, message: InboundMessage) -> Optional[ThreadContext]:
+        if self.threads is None or not message.message_id:
+            return None
+        return self.threads.lookup(message.message_id, message.in_reply_to, message.references or [])
+
+    def _budget_decision(self, account_login: str, message: InboundMessage) -> BudgetDecision:
+        if self.budget is None:
+            return FULL_DECISION
+        priority = message.priority or bool(analyze_action(message.subject or "").urgency)
+        return self.budget.decide(account_login, priority=priority)
+
+    def _summarize_job(
+        self,
+        job: tuple[Optional[str], str],
+        decision: BudgetDecision = FULL_DECISION,
+        index: Optional[FactIndex] = None,
+        context: str = "",
+    ) -> tuple[str, bool]:
+        """Summary of one job and whether it came from the LLM."""
+        kind, text = job
+        # Only pass the chunk limit when the budget asks for one.
+        limits = {"max_chunks": decision.max_chunks} if decision.max_chunks else {}
+        if kind is None:
+            summary = ""
+            if decision.use_llm:
+                options = dict(limits, context=context) if context else limits
+                summary = sanitize_text(self.llm.summarize_email(text, **options), max_len=SUMMARY_CHAR_LIMIT)
+                summary = self._validated(summary, index)
+            if not self._is_meaningful(summary):
+                return self._fallback_summary(text), False
+            return summary, True
+
+        summary = ""
+        if text:
+            if decision.summarize_attachments:
+                summary = sanitize_text(
+                    self.llm.summarize_attachment(text, kind=kind, **limits), max_len=SUMMARY_CHAR_LIMIT
+                )
+                summary = self._validated(summary, index)
+            if not self._is_meaningful(summary):
+                return self._fallback_summary(text, limit=600), False
+            return summary, True
+        return "Документ. Текст не извлечён.", False
+
+    def _validated(self, summary: str, index: Optional[FactIndex]) -> str:
+        """Drop a summary whose numbers, dates or wording are not in the source."""
+        if index is None or not summary.strip():
+            return summary
+        checked = validate_summary(summary, index, self.min_similarity)
+        if checked is None:
+            with self._rejects_lock:
+                self.validation_rejects += 1
+            return ""
+        return checked
+
     @staticmethod
     def _detect_attachment_kind(filename: str | None) -> str:
         if not filename:
@@ -117,33 +246,16 @@ class MessageProcessor:
 
     @staticmethod
     def _fallback_summary(text: str, limit: int = 700) -> str:
-        sanitized = sanitize_text(text or "", max_len=limit + 200)
+        # ``text`` is already normalized; only the length cap is left to apply.
+        sanitized = _truncate(text or "", limit + 200)
         if not sanitized:
             return "Содержание письма отсутствует."
 
         stripped = MessageProcessor._strip_greetings_and_signatures(sanitized)
         working = stripped or sanitized
 
-        sentences = re.split(r"(?<=[.!?])\s+", working)
-        meaningful: list[str] = []
-        for sentence in sentences:
-            sentence_clean = sentence.strip()
-            if len(sentence_clean.split()) < 3:
-                continue
-            meaningful.append(sentence_clean)
-            if len(" ".join(meaningful)) >= limit:
-                break
-
-        if meaningful:
-            summary = " ".join(meaningful[:3])
-            if len(summary) > limit:
-                summary = summary[: limit - 3] + "..."
-            return summary
-
-        truncated = working[: max(300, min(limit, 500))]
-        if len(working) > len(truncated):
-            truncated = truncated.rstrip() + "..."
-        return truncated or "Содержание письма отсутствует."
+        summary = extract_summary(working, max_chars=limit)
+        return summary or "Содержание письма отсутствует."
 
     @staticmethod
     def _strip_greetings_and_signatures(text: str) -> str:
@@ -184,3 +296,10 @@ class MessageProcessor:
         filtered_end.reverse()
 
         return "\n".join(filtered_end).strip()
+
+
+def _truncate(text: str, max_len: int) -> str:
+    """The length cap of ``sanitize_text`` for text it has already cleaned."""
+    if len(text) > max_len:
+        return text[: max_len - 3] + "..."
+    return text
@@ -0,0 +1,185 @@
+"""Local store of reply threads and their running summaries.
+
+Every summarized message is recorded under its ``Message-ID`` together
+with the thread it belongs to, and each thread keeps the summary of its
+latest message. A reply is matched to its thread through ``In-Reply-To``
+and ``References``. The pipeline then summarizes only the new part of
+the reply, with the stored summary as context, so the LLM cost of a reply
+does not grow with the length of the chain.
+
+Data lives in a small SQLite file next to ``state.json``. Threads expire
+after ``ttl_seconds`` without activity and the number of remembered
+messages is bounded. Storage errors degrade to "unknown thread".
+"""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+DEFAULT_THREADS_PATH = Path(__file__).resolve().parent.parent / "threads.sqlite3"
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS messages (
+        message_id TEXT PRIMARY KEY,
+        thread_id TEXT NOT NULL,
+        seen_at REAL NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS threads (
+        thread_id TEXT PRIMARY KEY,
+        summary TEXT NOT NULL,
+        updated_at REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS messages_seen ON messages(seen_at)",
+)
+
+
+@dataclass
+class ThreadContext:
+    thread_id: str
+    # Summary of the latest known message of the thread, "" if none.
+    summary: str = ""
+
+
+class ThreadStore:
+    """Thread-safe SQLite map of Message-ID -> thread -> latest summary."""
+
+    def __init__(
+        self,
+        path: Path = DEFAULT_THREADS_PATH,
+        ttl_seconds: float = 30 * 24 * 3600,
+        max_messages: int = 20000,
+    ) -> None:
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_messages = max(1, max_messages)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            for statement in _SCHEMA:
+                self._conn.execute(statement)
+        except (OSError, sqlite3.Error) as exc:
+            logger.warning("Thread store disabled: %s", exc)
+            self._conn = None
+
+    def lookup(self, message_id: str, in_reply_to: str = "", references: Sequence[str] = ()) -> ThreadContext:
+        """Thread of a message; ``summary`` is set when the thread is known.
+
+        The closest known ancestor wins: ``In-Reply-To`` first, then
+        ``References`` from newest to oldest. An unknown reply starts a
+        thread named after its root reference. A message that is already
+        recorded (delivered to several mailboxes, or processed again) gets
+        no summary: it would be its own.
+        """
+        ancestors = [ref for ref in [in_reply_to, *reversed(list(references))] if ref]
+        fallback = references[0] if references else (in_reply_to or message_id)
+        context = ThreadContext(fallback or "")
+        if not ancestors:
+            return context
+        now = time.time()
+        with self._lock:
+            if self._conn is None:
+                return context
+            try:
+                if message_id:
+                    known = self._conn.execute(
+                        "SELECT thread_id FROM messages WHERE message_id = ?", (message_id,)
+                    ).fetchone()
+                    if known is not None:
+                        return ThreadContext(known[0])
+                for ancestor in ancestors:
+                    row = self._conn.execute(
+                        "SELECT m.thread_id, t.summary, t.updated_at FROM messages m "
+                        "LEFT JOIN threads t ON t.thread_id = m.thread_id WHERE m.message_id = ?",
+                        (ancestor,),
+                    ).fetchone()
+                    if row is None:
+                        continue
+                    thread_id, summary, updated_at = row
+                    context.thread_id = thread_id
+                    if summary and updated_at is not None and now - updated_at <= self.ttl_seconds:
+                        context.summary = summary
+                    break
+            except sqlite3.Error as exc:
+                logger.warning("Thread store read failed: %s", exc)
+                return ThreadContext(fallback or "")
+            if context.summary:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return context
+
+    def record(self, message_id: str, thread_id: str, summary: str) -> None:
+        """Remember ``message_id`` in ``thread_id`` and its latest summary."""
+        if not message_id or not thread_id:
+            return
+        now = time.time()
+        with self._lock:
+            if self._conn is None:
+                return
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO messages (message_id, thread_id, seen_at) VALUES (?, ?, ?)",
+                    (message_id, thread_id, now),
+                )
+                if summary:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO threads (thread_id, summary, updated_at) VALUES (?, ?, ?)",
+                        (thread_id, summary, now),
+                    )
+                self._evict(now)
+            except sqlite3.Error as exc:
+                logger.warning("Thread store write failed: %s", exc)
+
+    def _evict(self, now: float) -> None:
+        assert self._conn is not None
+        cutoff = now - self.ttl_seconds
+        self._conn.execute("DELETE FROM messages WHERE seen_at < ?", (cutoff,))
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM messages").fetchone()
+        overflow = count - self.max_messages
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM messages WHERE message_id IN "
+                "(SELECT message_id FROM messages ORDER BY seen_at ASC LIMIT ?)",
+                (overflow,),
+            )
+        self._conn.execute(
+            "DELETE FROM threads WHERE updated_at < ? "
+            "OR thread_id NOT IN (SELECT DISTINCT thread_id FROM messages)",
+            (cutoff,),
+        )
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            threads = 0
+            if self._conn is not None:
+                try:
+                    threads = self._conn.execute("SELECT COUNT(*) FROM threads").fetchone()[0]
+                except sqlite3.Error:
+                    threads = 0
+        return {"hits": self.hits, "misses": self.misses, "threads": threads}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+__all__ = ["DEFAULT_THREADS_PATH", "ThreadContext", "ThreadStore"]
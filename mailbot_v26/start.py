@@ -1,20 +1,51 @@
 """MailBot Premium v26 - Runtime orchestrator"""
 from __future__ import annotations
 
+import argparse
 import logging
+import re
 import sys
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 from email import message_from_bytes
 from email.header import decode_header, make_header
 from email.message import Message as EmailMessage
-from email.utils import parsedate_to_datetime
+from email.utils import parseaddr, parsedate_to_datetime
 from pathlib import Path
-from typing import List
+from typing import TYPE_CHECKING, Any, List, Optional, Tuple
 
 CURRENT_DIR = Path(__file__).resolve().parent
 LOG_PATH = CURRENT_DIR / "mailbot.log"
 
+sys.path.insert(0, str(CURRENT_DIR.parent))
+
+from mailbot_v26.startup_profile import ImportProfiler
+
+# Installed before the package imports below so they show up in the report.
+_IMPORT_PROFILER: Optional[ImportProfiler] = (
+    ImportProfiler().install() if "--startup-profile" in sys.argv[1:] else None
+)
+
+logger = logging.getLogger("mailbot")
+
+_MESSAGE_ID_RE = re.compile(r"<[^<>\s]+>")
+
+from mailbot_v26.config_loader import BotConfig, load_config
+from mailbot_v26.imap_client import ResilientIMAP
+from mailbot_v26.state_manager import StateManager
+from mailbot_v26.worker.outbox import DeliveryWorker, Outbox
+from mailbot_v26.worker.telegram_sender import shared_client
+from mailbot_v26.bot_core.extractors.doc import extract_docx_text
+from mailbot_v26.bot_core.extractors.excel import extract_excel_text
+from mailbot_v26.bot_core.extractors.pdf import extract_pdf_text
+from mailbot_v26.bot_core.classifier import classify_attachment
+from mailbot_v26.llm.fanout import map_ordered
+from mailbot_v26.text import sanitize_text
+
+if TYPE_CHECKING:  # the pipeline is imported in the background at startup
+    from mailbot_v26.pipeline.processor import Attachment, InboundMessage, MessageProcessor
+
 
 def _configure_logging() -> None:
     handlers: List[logging.Handler] = []
@@ -34,20 +65,106 @@ def _configure_logging() -> None:
     )
 
 
-_configure_logging()
-logger = logging.getLogger("mailbot")
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="mailbot_v26", description="MailBot Premium v26")
+    parser.add_argument(
+        "--startup-profile",
+        action="store_true",
+        help="print per-module import cost once the first IMAP check is done",
+    )
+    args, _unknown = parser.parse_known_args(argv)
+    return args
 
-sys.path.insert(0, str(CURRENT_DIR.parent))
 
-from mailbot_v26.config_loader import BotConfig, load_config
-from mailbot_v26.imap_client import ResilientIMAP
-from mailbot_v26.state_manager import StateManager
-from mailbot_v26.pipeline.processor import Attachment, InboundMessage, MessageProcessor
-from mailbot_v26.worker.telegram_sender import send_telegram
-from mailbot_v26.bot_core.extractors.doc import extract_docx_text
-from mailbot_v26.bot_core.extractors.excel import extract_excel_text
-from mailbot_v26.bot_core.extractors.pdf import extract_pdf_text
-from mailbot_v26.text import sanitize_text
+def _build_processor(config: BotConfig, state: StateManager) -> "MessageProcessor":
+    """Import the summarization pipeline and build the processor.
+
+    Runs on a warm-up thread so prompt tables and the LLM stack load while
+    the first IMAP connection is being established.
+    """
+
+    from mailbot_v26.llm.budget import TokenBudget
+    from mailbot_v26.llm.cache import LLMResponseCache
+    from mailbot_v26.llm.chunker import chunk_budget
+    from mailbot_v26.llm.circuit import CircuitBreaker
+    from mailbot_v26.llm.routing import ModelRouter
+    from mailbot_v26.llm.summarizer import LLMSummarizer
+    from mailbot_v26.pipeline.processor import SUMMARY_CHAR_LIMIT, MessageProcessor
+    from mailbot_v26.pipeline.boilerplate import BoilerplateIndex
+    from mailbot_v26.pipeline.threads import ThreadStore
+
+    budget = TokenBudget(
+        state,
+        daily_limit=config.llm.daily_token_budget,
+        account_share=config.llm.account_budget_share,
+        priority_reserve=config.llm.priority_reserve,
+        reduced_max_chunks=config.llm.reduced_max_chunks,
+    )
+    if config.llm_call is not None and hasattr(config.llm_call, "on_tokens"):
+        config.llm_call.on_tokens = budget.record
+
+    cache = None
+    if config.llm.cache_enabled:
+        cache = LLMResponseCache(
+            CURRENT_DIR / "llm_cache.sqlite3",
+            ttl_seconds=config.llm.cache_ttl_hours * 3600,
+            max_entries=config.llm.cache_max_entries,
+        )
+    summarizer = LLMSummarizer(
+        config.llm_call,
+        cache=cache,
+        model=config.llm.model,
+        max_concurrency=config.llm.max_concurrency,
+        breaker=CircuitBreaker(
+            state,
+            failure_threshold=config.llm.breaker_failure_threshold,
+            reset_timeout=config.llm.breaker_reset_seconds,
+        ),
+        chunk_tokens=chunk_budget(config.llm.context_tokens, config.llm.max_tokens, config.llm.chunk_tokens),
+        merge_fan_in=config.llm.merge_fan_in,
+        batch_window=config.llm.batch_window_ms / 1000.0,
+        batch_max_items=config.llm.batch_max_items,
+        extract_tokens=config.llm.extractive_target_tokens,
+        output_char_limit=SUMMARY_CHAR_LIMIT if config.llm.stream_responses else 0,
+        router=ModelRouter(config.llm.model, config.llm.routes),
+        progressive=config.llm.progressive_summary,
+    )
+    threads = None
+    if config.llm.thread_context:
+        threads = ThreadStore(CURRENT_DIR / "threads.sqlite3", ttl_seconds=config.llm.thread_ttl_days * 86400)
+    boilerplate = None
+    if config.llm.boilerplate_filter:
+        boilerplate = BoilerplateIndex(
+            CURRENT_DIR / "boilerplate.json", min_messages=config.llm.boilerplate_min_messages
+        )
+    return MessageProcessor(
+        config=config, state=state, llm=summarizer, budget=budget, threads=threads, boilerplate=boilerplate
+    )
+
+
+class _WarmupError(RuntimeError):
+    """The pipeline could not be built, so no mail can be processed."""
+
+
+def _resolve_processor(
+    future: Future, state: StateManager, login: str, previous_uid: int
+) -> "MessageProcessor":
+    """Wait for the warm-up; if it failed, give back the UIDs just fetched."""
+
+    try:
+        return future.result()
+    except Exception as exc:
+        # The fetch already advanced last_uid; keep those messages unread.
+        state.update_last_uid(login, previous_uid)
+        state.save(force=True)
+        raise _WarmupError(f"pipeline warm-up failed: {exc}") from exc
+
+
+def _report_startup_profile(profiler: ImportProfiler) -> None:
+    report = profiler.report()
+    profiler.uninstall()
+    print(report)
+    logger.info("%s", report)
 
 
 def _decode_subject(email_obj: EmailMessage) -> str:
@@ -70,6 +187,12 @@ def _decode_sender(email_obj: EmailMessage) -> str:
         return raw_from or ""
 
 
+def _decode_sender_address(email_obj: EmailMessage) -> str:
+    """Bare lowercase address of ``From``; the display name is dropped."""
+    _, address = parseaddr(str(email_obj.get("From", "") or ""))
+    return address.strip().lower() if "@" in address else ""
+
+
 def _decode_date(email_obj: EmailMessage) -> datetime:
     raw_date = email_obj.get("Date", "")
     try:
@@ -126,25 +249,55 @@ def _extract_body(email_obj: EmailMessage) -> str:
     return _decode_part(email_obj)
 
 
-def _extract_attachment_text(att: Attachment) -> str:
+_ROUTED_SUFFIXES = (".pdf", ".doc", ".docx", ".xls", ".xlsx")
+_CATEGORY_SUFFIX = {
+    "PDF": ".pdf",
+    "DOC": ".doc",
+    "DOCX": ".docx",
+    "XLS": ".xls",
+    "XLSX": ".xlsx",
+}
+
+
+def _routing_name(att: Attachment) -> str:
+    """Return a lowercase filename whose suffix routes to the right extractor.
+
+    Parts without a usable extension (``attachment.bin``) are sniffed by the
+    classifier, which reads only container headers and directories.
+    """
+
     name_lower = (att.filename or "").lower()
+    if name_lower.endswith(_ROUTED_SUFFIXES):
+        return name_lower
+    category = classify_attachment(filename=name_lower, mime_type=att.content_type, content_bytes=att.content)
+    suffix = _CATEGORY_SUFFIX.get(category)
+    return f"{name_lower or 'attachment'}{suffix}" if suffix else name_lower
+
+
+def _extract_attachment_text(att: Attachment) -> str:
+    """Extracted text, already normalized to the pipeline's attachment limit."""
+    from mailbot_v26.pipeline.processor import ATTACHMENT_CHAR_LIMIT
+
+    name_lower = _routing_name(att)
     content_type = (att.content_type or "").lower()
     try:
         if name_lower.endswith(".pdf"):
-            return sanitize_text(extract_pdf_text(att.content, att.filename), max_length=5000)
+            return sanitize_text(extract_pdf_text(att.content, name_lower), max_len=ATTACHMENT_CHAR_LIMIT)
         if name_lower.endswith((".doc", ".docx")):
-            return sanitize_text(extract_docx_text(att.content, att.filename), max_length=5000)
+            return sanitize_text(extract_docx_text(att.content, name_lower), max_len=ATTACHMENT_CHAR_LIMIT)
         if name_lower.endswith((".xls", ".xlsx")):
-            return sanitize_text(extract_excel_text(att.content, att.filename), max_length=5000)
+            return sanitize_text(extract_excel_text(att.content, name_lower), max_len=ATTACHMENT_CHAR_LIMIT)
         if content_type.startswith("text") or name_lower.endswith((".txt", ".csv", ".log", ".md", ".json")):
             decoded = att.content.decode("utf-8", errors="ignore")
-            return sanitize_text(decoded, max_length=4000)
+            return sanitize_text(decoded, max_len=ATTACHMENT_CHAR_LIMIT)
         return ""
     except Exception:
         return ""
 
 
 def _extract_attachments(email_obj: EmailMessage, max_mb: int) -> List[Attachment]:
+    from mailbot_v26.pipeline.processor import Attachment
+
     attachments: List[Attachment] = []
     byte_limit = max_mb * 1024 * 1024
     for part in email_obj.walk():
@@ -162,13 +315,26 @@ def _extract_attachments(email_obj: EmailMessage, max_mb: int) -> List[Attachmen
                 content_type=part.get_content_type() or "",
             )
             attachment.text = _extract_attachment_text(attachment)
+            attachment.normalized_text = attachment.text
             attachments.append(attachment)
         except Exception:
             continue
     return attachments
 
 
+def _is_priority(email_obj: EmailMessage) -> bool:
+    x_priority = (email_obj.get("X-Priority", "") or "").strip()
+    importance = (email_obj.get("Importance", "") or "").strip().lower()
+    return x_priority[:1] in {"1", "2"} or importance == "high"
+
+
+def _message_ids(value: Any) -> List[str]:
+    return _MESSAGE_ID_RE.findall(str(value or ""))
+
+
 def _parse_raw_email(raw_bytes: bytes, config: BotConfig) -> InboundMessage:
+    from mailbot_v26.pipeline.processor import InboundMessage
+
     email_obj = message_from_bytes(raw_bytes)
     subject = _decode_subject(email_obj)
     sender = _decode_sender(email_obj)
@@ -178,13 +344,41 @@ def _parse_raw_email(raw_bytes: bytes, config: BotConfig) -> InboundMessage:
     return InboundMessage(
         subject=subject,
         sender=sender,
+        sender_address=_decode_sender_address(email_obj),
         body=body,
         attachments=attachments,
         received_at=received_at,
+        priority=_is_priority(email_obj),
+        message_id=next(iter(_message_ids(email_obj.get("Message-ID"))), ""),
+        in_reply_to=next(iter(_message_ids(email_obj.get("In-Reply-To"))), ""),
+        references=_message_ids(email_obj.get("References")),
     )
 
 
-def main(config_dir: Path | None = None) -> None:
+def _summarize_uid(
+    processor: "MessageProcessor", config: BotConfig, login: str, item: Tuple[Any, bytes]
+) -> Optional[str]:
+    """Parse and summarize one fetched message; ``None`` when it failed."""
+
+    uid, raw = item
+    print(f"Processing UID {uid}")
+    try:
+        inbound = _parse_raw_email(raw, config)
+        return processor.process(login, inbound) or ""
+    except Exception as e:
+        print(f"Processing error: {e}")
+        logger.exception("Processing error for UID %s", uid)
+        return None
+
+
+def main(config_dir: Path | None = None, argv: Optional[List[str]] = None) -> None:
+    global _IMPORT_PROFILER
+
+    args = _parse_args(argv)
+    if args.startup_profile and _IMPORT_PROFILER is None:
+        _IMPORT_PROFILER = ImportProfiler().install()
+
+    _configure_logging()
     print("MailBot Premium v26 starting...")
     print(f"Log file: {LOG_PATH}\n")
 
@@ -202,7 +396,16 @@ def main(config_dir: Path | None = None) -> None:
         return
 
     state = StateManager(CURRENT_DIR / "state.json")
-    processor = MessageProcessor(config=config, state=state)
+    warmup = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mailbot-warmup")
+    processor_future: Future = warmup.submit(_build_processor, config, state)
+    warmup.shutdown(wait=False)
+    processor: Optional[MessageProcessor] = None
+    # Summaries are queued durably and sent by a background worker, so a
+    # slow or unavailable Telegram never holds up mail processing.
+    # One keep-alive, rate-limited Telegram client for the whole run.
+    telegram = shared_client(config.keys.telegram_bot_token)
+    outbox = Outbox(CURRENT_DIR / "outbox.sqlite3")
+    delivery = DeliveryWorker(outbox, telegram.deliver).start()
     print("Ready to work\n")
 
     cycle = 0
@@ -218,33 +421,49 @@ def main(config_dir: Path | None = None) -> None:
 
                 try:
                     imap = ResilientIMAP(account, state)
+                    previous_uid = state.get_last_uid(account.login)
                     new_messages = imap.fetch_new_messages()
 
+                    if processor is None:
+                        processor = _resolve_processor(processor_future, state, account.login, previous_uid)
+                        if _IMPORT_PROFILER is not None:
+                            _report_startup_profile(_IMPORT_PROFILER)
+                            _IMPORT_PROFILER = None
+
                     if not new_messages:
                         print("No new messages")
                         continue
 
                     print(f"Received {len(new_messages)} messages")
 
-                    for uid, raw in new_messages:
-                        print(f"Processing UID {uid}")
+                    # With prompt batching on, messages of one fetch are
+                    # summarized together so their short prompts can share
+                    # requests; delivery below stays in UID order.
+                    workers = config.llm.batch_max_items if config.llm.batch_window_ms > 0 else 1
+                    results = map_ordered(
+                        lambda item: _summarize_uid(processor, config, login, item),
+                        new_messages,
+                        workers,
+                    )
+
+                    for (uid, _raw), final_text in zip(new_messages, results):
+                        if final_text is None:
+                            continue
                         try:
-                            inbound = _parse_raw_email(raw, config)
-                            final_text = processor.process(login, inbound)
-
-                            if final_text and final_text.strip():
-                                ok = send_telegram(
-                                    config.keys.telegram_bot_token,
-                                    account.telegram_chat_id,
-                                    final_text.strip()
-                                )
+                            if not final_text.strip():
+                                print("Empty result")
+                            elif outbox.enqueue(account.telegram_chat_id, final_text.strip(), login, uid) is not None:
+                                # Delivered by the background worker, in order per chat.
+                                delivery.notify()
+                                print("Queued for Telegram")
+                                logger.info("UID %s: queued for Telegram", uid)
+                            else:
+                                ok = telegram.send(account.telegram_chat_id, final_text.strip())
                                 if not ok:
                                     print("Telegram send failed (see log)")
                                 else:
                                     print("Telegram send ok")
                                 logger.info("UID %s: Telegram %s", uid, "OK" if ok else "FAIL")
-                            else:
-                                print("Empty result")
 
                         except Exception as e:
                             print(f"Processing error: {e}")
@@ -252,11 +471,39 @@ def main(config_dir: Path | None = None) -> None:
 
                     state.save()
 
+                except _WarmupError:
+                    raise
                 except Exception as e:
                     print(f"IMAP error: {e}")
                     logger.exception("IMAP error for %s", login)
 
             state.save()
+            if processor is not None and processor.llm.cache is not None:
+                logger.info("LLM cache: %s", processor.llm.cache.stats())
+            if processor is not None and getattr(processor.llm, "router", None) is not None:
+                logger.info("LLM routes: %s", processor.llm.router.stats())
+            if processor is not None and getattr(processor.llm, "progressive", False):
+                logger.info("LLM progressive early stops: %d", processor.llm.early_stops)
+            logger.info(
+                "Telegram outbox: %s, delivered %d, failed attempts %d",
+                outbox.stats(),
+                delivery.delivered,
+                delivery.failed,
+            )
+            if processor is not None and processor.boilerplate is not None:
+                processor.boilerplate.save()
+                logger.info("Boilerplate index: %s", processor.boilerplate.stats())
+            if processor is not None and processor.threads is not None:
+                logger.info("Thread store: %s", processor.threads.stats())
+            if processor is not None and processor.validate_summaries:
+                logger.info("LLM summaries rejected by validation: %d", processor.validation_rejects)
+            if getattr(config.llm_call, "latency", None) is not None:
+                logger.info(
+                    "LLM latency: %s, hedges %d sent / %d won",
+                    config.llm_call.latency.snapshot(),
+                    config.llm_call.hedges_sent,
+                    config.llm_call.hedges_won,
+                )
             delay = max(120, config.general.check_interval)
             print(f"Sleeping {delay} seconds...")
             time.sleep(delay)
@@ -268,6 +515,11 @@ def main(config_dir: Path | None = None) -> None:
         print(f"Critical error: {e}")
         logger.exception("Fatal error")
         time.sleep(10)
+    finally:
+        # Undelivered messages stay in the outbox for the next start.
+        delivery.stop()
+        outbox.close()
+        telegram.close()
 
 
 if __name__ == "__main__":
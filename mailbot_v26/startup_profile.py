@@ -0,0 +1,84 @@
+"""Import-time profiler for ``start.py --startup-profile``.
+
+Wraps ``builtins.__import__`` and records, for every module imported for
+the first time, the cumulative and self time spent loading it (the same
+numbers ``python -X importtime`` prints, but available on Windows
+launchers and written to the bot log). Profiling is opt-in: nothing is
+patched unless :meth:`ImportProfiler.install` is called.
+"""
+
+from __future__ import annotations
+
+import builtins
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List
+
+
+@dataclass
+class ImportRecord:
+    name: str
+    cumulative: float = 0.0
+    self_time: float = 0.0
+
+
+class ImportProfiler:
+    """Measures first-time module imports across all threads."""
+
+    def __init__(self) -> None:
+        self.records: Dict[str, ImportRecord] = {}
+        self._original_import = builtins.__import__
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._installed = False
+        self._started = time.perf_counter()
+
+    def install(self) -> "ImportProfiler":
+        if not self._installed:
+            self._original_import = builtins.__import__
+            builtins.__import__ = self._timed_import
+            self._installed = True
+            self._started = time.perf_counter()
+        return self
+
+    def uninstall(self) -> None:
+        if self._installed:
+            builtins.__import__ = self._original_import
+            self._installed = False
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._started
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level or name in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+
+        stack: List[float] = self._local.__dict__.setdefault("children", [])
+        stack.append(0.0)
+        started = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            cumulative = time.perf_counter() - started
+            children = stack.pop()
+            if stack:
+                stack[-1] += cumulative
+            with self._lock:
+                record = self.records.setdefault(name, ImportRecord(name))
+                record.cumulative += cumulative
+                record.self_time += max(0.0, cumulative - children)
+
+    def report(self, limit: int = 25) -> str:
+        with self._lock:
+            records = sorted(self.records.values(), key=lambda r: r.cumulative, reverse=True)
+        lines = [f"Startup import profile ({len(records)} modules, {self.elapsed() * 1000:.0f} ms since start):"]
+        for record in records[:limit]:
+            lines.append(
+                f"  {record.cumulative * 1000:8.1f} ms  self {record.self_time * 1000:7.1f} ms  {record.name}"
+            )
+        return "\n".join(lines)
+
+
+__all__ = ["ImportProfiler", "ImportRecord"]
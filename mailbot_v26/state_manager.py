@@ -24,6 +24,8 @@ class AccountState:
     last_check_time: Optional[str] = None
     imap_status: str = "unknown"
     last_error: str = ""
+    tokens_used_today: int = 0
+    tokens_date: str = ""
 
 
 @dataclass
@@ -109,21 +111,42 @@ class StateManager:
             account.last_error = error
             self._mark_dirty()
 
-    def add_tokens(self, count: int) -> None:
+    def add_tokens(self, count: int, login: Optional[str] = None) -> None:
         with self._lock:
             today = datetime.now().strftime("%Y-%m-%d")
             if self._state.llm.date != today:
                 self._state.llm.tokens_used_today = 0
                 self._state.llm.date = today
             self._state.llm.tokens_used_today += count
+            if login:
+                account = self._state.accounts.setdefault(login, AccountState())
+                if account.tokens_date != today:
+                    account.tokens_used_today = 0
+                    account.tokens_date = today
+                account.tokens_used_today += count
             self._mark_dirty()
 
+    def get_tokens_used_today(self, login: Optional[str] = None) -> int:
+        with self._lock:
+            today = datetime.now().strftime("%Y-%m-%d")
+            if login is None:
+                llm = self._state.llm
+                return llm.tokens_used_today if llm.date == today else 0
+            account = self._state.accounts.get(login)
+            if account is None or account.tokens_date != today:
+                return 0
+            return account.tokens_used_today
+
     def set_llm_unavailable(self, unavailable: bool, error: str = "") -> None:
         with self._lock:
             self._state.llm.unavailable = unavailable
             self._state.llm.last_error = error
             self._mark_dirty()
 
+    def get_llm_status(self) -> tuple[bool, str]:
+        with self._lock:
+            return self._state.llm.unavailable, self._state.llm.last_error
+
     def save(self, force: bool = False) -> None:
         with self._lock:
             now = datetime.now()
@@ -1,3 +1,6 @@
+import io
+import zipfile
+
 import mailbot_v26.start as start
 from mailbot_v26.pipeline.processor import Attachment
 
@@ -15,3 +18,20 @@ def test_zip_like_attachment_not_leaking_pk():
     text = start._extract_attachment_text(att)
     assert "PK" not in text
     assert text in {"", None}
+
+
+def test_nameless_ooxml_attachment_routed_by_container(monkeypatch):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("[Content_Types].xml", "<Types/>")
+        archive.writestr("word/document.xml", "<document/>")
+    seen = {}
+
+    def fake_docx(content: bytes, filename: str) -> str:
+        seen["filename"] = filename
+        return "Текст договора"
+
+    monkeypatch.setattr(start, "extract_docx_text", fake_docx)
+    att = Attachment(filename="attachment.bin", content=buffer.getvalue(), content_type="application/octet-stream")
+    assert start._extract_attachment_text(att) == "Текст договора"
+    assert seen["filename"].endswith(".docx")
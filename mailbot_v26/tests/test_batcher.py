@@ -0,0 +1,187 @@
+import re
+import threading
+from types import SimpleNamespace
+
+from mailbot_v26.llm.batcher import PromptBatcher, build_batch_prompt, split_batch_response
+from mailbot_v26.llm.budget import TokenBudget
+from mailbot_v26.llm.fanout import map_ordered
+from mailbot_v26.llm.summarizer import LLMSummarizer
+
+
+def _echo_batches(prompt: str, max_tokens=None) -> str:
+    tasks = re.findall(r"### ЗАДАНИЕ (\d+)\n(.*?)(?=\n\n### ЗАДАНИЕ|\n\Z)", prompt, re.S)
+    if not tasks:
+        return f"single:{prompt}"
+    return "\n".join(f"### ОТВЕТ {num}\nanswer:{body.strip()}" for num, body in tasks)
+
+
+def test_split_batch_response_maps_answers_by_number():
+    response = "### ОТВЕТ 2\nвторой\n### ОТВЕТ 1\nпервый\n### ОТВЕТ 9\nлишний"
+    assert split_batch_response(response, 3) == {1: "первый", 2: "второй"}
+
+
+def test_build_batch_prompt_numbers_tasks():
+    prompt = build_batch_prompt(["a", "b"])
+    assert "### ЗАДАНИЕ 1\na" in prompt
+    assert "### ЗАДАНИЕ 2\nb" in prompt
+
+
+def test_concurrent_small_prompts_share_one_request():
+    calls = []
+
+    def call(prompt, max_tokens):
+        calls.append((prompt, max_tokens))
+        return _echo_batches(prompt)
+
+    batcher = PromptBatcher(call, window=0.5, max_items=4, item_output_tokens=100)
+    batcher.submit("warm-up")  # starts the burst; later arrivals wait for the window
+    calls.clear()
+    barrier = threading.Barrier(4)
+
+    def submit(text):
+        barrier.wait()
+        return batcher.submit(text)
+
+    results = map_ordered(submit, ["p1", "p2", "p3", "p4"], max_workers=4)
+
+    assert len(calls) == 1
+    assert calls[0][1] == 400
+    assert results == ["answer:p1", "answer:p2", "answer:p3", "answer:p4"]
+
+
+def test_missing_answers_are_resent_individually():
+    calls = []
+
+    def call(prompt, max_tokens):
+        calls.append(prompt)
+        if "### ЗАДАНИЕ" in prompt:
+            return "### ОТВЕТ 1\nтолько первый"
+        return f"single:{prompt}"
+
+    batcher = PromptBatcher(call, window=0.5, max_items=2)
+    batcher.submit("warm-up")
+    calls.clear()
+    barrier = threading.Barrier(2)
+
+    def submit(text):
+        barrier.wait()
+        return batcher.submit(text)
+
+    results = map_ordered(submit, ["a", "b"], max_workers=2)
+
+    assert len(calls) == 2
+    assert "только первый" in results
+    (other,) = [result for result in results if result != "только первый"]
+    assert other in {"single:a", "single:b"}
+    assert batcher.retried_jobs == 1
+
+
+def test_lone_prompt_is_sent_without_batch_wrapper():
+    batcher = PromptBatcher(_echo_batches, window=0.01)
+    assert batcher.submit("one") == "single:one"
+
+
+def test_lone_prompt_after_quiet_spell_is_not_held_for_window():
+    batcher = PromptBatcher(_echo_batches, window=60.0)
+    sender = threading.Thread(target=batcher.submit, args=("one",), daemon=True)
+    sender.start()
+    sender.join(timeout=5)
+    assert not sender.is_alive()
+    assert batcher.requests == 1
+
+
+def test_failed_batch_fails_jobs_without_individual_resends():
+    calls = []
+
+    def call(prompt, max_tokens):
+        calls.append(prompt)
+        if prompt == "warm-up":
+            return "ok"
+        raise RuntimeError("backend down")
+
+    batcher = PromptBatcher(call, window=0.5, max_items=3)
+    batcher.submit("warm-up")
+    barrier = threading.Barrier(3)
+
+    def submit(text):
+        barrier.wait()
+        return batcher.submit(text)
+
+    results = map_ordered(submit, ["a", "b", "c"], max_workers=3)
+
+    assert results == ["", "", ""]
+    assert len(calls) == 2
+    assert batcher.retried_jobs == 0
+
+
+def test_missing_answers_are_not_resent_while_llm_unavailable():
+    calls = []
+
+    def call(prompt, max_tokens):
+        calls.append(prompt)
+        return "### ОТВЕТ 1\nтолько первый" if "### ЗАДАНИЕ" in prompt else f"single:{prompt}"
+
+    batcher = PromptBatcher(call, window=0.5, max_items=2, allow=lambda: False)
+    batcher.submit("warm-up")
+    barrier = threading.Barrier(2)
+
+    def submit(text):
+        barrier.wait()
+        return batcher.submit(text)
+
+    results = map_ordered(submit, ["a", "b"], max_workers=2)
+
+    assert len(calls) == 2
+    assert sorted(results) == ["", "только первый"]
+
+
+def test_summarizer_batches_short_emails_across_messages():
+    calls = []
+
+    def llm(prompt):
+        calls.append(prompt)
+        return _echo_batches(prompt)
+
+    summarizer = LLMSummarizer(llm, batch_window=0.5, batch_max_items=3)
+    summarizer.summarize_email("Письмо ноль.")
+    calls.clear()
+    barrier = threading.Barrier(3)
+
+    def summarize(text):
+        barrier.wait()
+        return summarizer.summarize_email(text)
+
+    results = map_ordered(summarize, ["Письмо один.", "Письмо два.", "Письмо три."], max_workers=3)
+
+    assert len(calls) == 1
+    for text, result in zip(["один", "два", "три"], results):
+        assert result.startswith("answer:") and text in result
+
+
+def test_batch_tokens_are_split_across_job_accounts():
+    booked = {}
+    state = SimpleNamespace(add_tokens=lambda count, login=None: booked.update({login: booked.get(login, 0) + count}))
+    budget = TokenBudget(state)
+
+    def call(prompt, max_tokens):
+        budget.record(300)
+        return _echo_batches(prompt)
+
+    batcher = PromptBatcher(call, window=0.5, max_items=3)
+    with budget.account("warm"):
+        batcher.submit("warm-up")
+    booked.clear()
+    barrier = threading.Barrier(3)
+
+    def submit(job):
+        login, text = job
+        with budget.account(login):
+            barrier.wait()
+            return batcher.submit(text)
+
+    jobs = [("alice", "короткий"), ("bob", "короткий"), ("carol", "короткий")]
+    results = map_ordered(submit, jobs, max_workers=3)
+
+    assert results == ["answer:короткий"] * 3
+    assert booked == {"alice": 100, "bob": 100, "carol": 100}
+    assert batcher.stats()["batched_jobs"] == 3
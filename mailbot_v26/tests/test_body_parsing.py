@@ -33,3 +33,21 @@ def test_extract_body_handles_multipart_unencoded_text():
     body = start._extract_body(email_obj)
 
     assert body == "Body without transfer encoding"
+
+
+def test_parse_keeps_sender_address_behind_display_name():
+    from types import SimpleNamespace
+
+    from mailbot_v26.pipeline.boilerplate import sender_domain
+
+    config = SimpleNamespace(general=SimpleNamespace(max_attachment_mb=15))
+    for from_header in (
+        b"Ivan Petrov <Ivan@Corp.ru>",
+        b"=?utf-8?b?0JjQstCw0L0g0J/QtdGC0YDQvtCy?= <ivan@corp.ru>",
+    ):
+        raw_email = b"From: " + from_header + b"\r\nSubject: Test\r\n\r\nBody\r\n"
+        message = start._parse_raw_email(raw_email, config)
+
+        assert "@" not in message.sender
+        assert message.sender_address == "ivan@corp.ru"
+        assert sender_domain(message.sender_address) == "corp.ru"
@@ -0,0 +1,90 @@
+from pathlib import Path
+
+from mailbot_v26.pipeline.boilerplate import BoilerplateIndex, sender_domain, sender_key
+
+DISCLAIMER = "Настоящее сообщение содержит конфиденциальную информацию и предназначено только адресату."
+FOOTER = "ООО Ромашка, 123456, г. Москва, ул. Ленина, д. 1, тел. +7 495 000-00-00"
+
+
+def _mail(text: str) -> str:
+    return f"{text}\n\n{DISCLAIMER}\n{FOOTER}"
+
+
+def test_sender_domain():
+    assert sender_domain("Иван <Ivan@Corp.Example.com>") == "corp.example.com"
+    assert sender_domain("no address") == ""
+    assert sender_key("Иван <Ivan@Corp.Example.com>") == "corp.example.com"
+    assert sender_key("Иван <Ivan.Petrov@Mail.ru>") == "ivan.petrov@mail.ru"
+
+
+def test_repeated_domain_lines_are_stripped_after_threshold(tmp_path: Path):
+    index = BoilerplateIndex(tmp_path / "boilerplate.json", min_messages=2)
+    sender = "billing@romashka.ru"
+
+    assert index.strip(sender, _mail("Счет 1 во вложении, оплатить до пятницы.")) == _mail(
+        "Счет 1 во вложении, оплатить до пятницы."
+    )
+    assert DISCLAIMER in index.strip(sender, _mail("Акт сверки за март во вложении."))
+    assert index.strip(sender, _mail("Счет 3 на оплату поставки.")) == "Счет 3 на оплату поставки."
+    # Another domain has learned nothing yet.
+    assert DISCLAIMER in index.strip("info@other.ru", _mail("Новости компании."))
+    # A body that is nothing but boilerplate is left as is.
+    assert index.strip(sender, f"{DISCLAIMER}\n{FOOTER}") == f"{DISCLAIMER}\n{FOOTER}"
+    assert index.stats()["stripped_lines"] == 2
+
+    index.save()
+    reloaded = BoilerplateIndex(tmp_path / "boilerplate.json", min_messages=2)
+    assert reloaded.strip(sender, _mail("Счет 4.")) == "Счет 4."
+
+
+def test_index_is_bounded():
+    index = BoilerplateIndex(None, min_messages=3, max_domains=2, max_lines=8)
+    for idx in range(20):
+        index.strip("a@one.ru", f"Уникальная строка письма номер {idx} для проверки\n{FOOTER}")
+    assert len(index._domains["one.ru"].lines) <= 8
+    # Pruning keeps the frequent footer, so it is still stripped.
+    assert index.strip("a@one.ru", f"Новая строка письма для проверки границ\n{FOOTER}") == (
+        "Новая строка письма для проверки границ"
+    )
+
+    index.strip("b@two.ru", FOOTER)
+    index.strip("c@three.ru", FOOTER)
+    assert index.stats()["domains"] == 2
+    assert "one.ru" not in index._domains
+
+
+def test_same_message_is_learned_once(tmp_path: Path):
+    index = BoilerplateIndex(tmp_path / "boilerplate.json", min_messages=2)
+    for _ in range(3):
+        index.strip("billing@romashka.ru", _mail("Счет 1 во вложении."), "<one@romashka.ru>")
+    assert DISCLAIMER in index.strip("billing@romashka.ru", _mail("Счет 2 во вложении."), "<two@romashka.ru>")
+
+    index.save()
+    reloaded = BoilerplateIndex(tmp_path / "boilerplate.json", min_messages=2)
+    reloaded.strip("billing@romashka.ru", _mail("Счет 1 во вложении."), "<one@romashka.ru>")
+    assert reloaded.strip("billing@romashka.ru", _mail("Счет 3."), "<three@romashka.ru>") == "Счет 3."
+
+
+def test_repeated_content_line_with_changing_amount_is_kept():
+    index = BoilerplateIndex(None, min_messages=2)
+    content = "Во вложении счет на оплату за услуги связи по договору 17/2024."
+    for amount in range(1000, 1010):
+        body = _mail(f"{content}\nСумма к оплате: {amount},00 руб., срок оплаты до 10.04.2025.")
+        stripped = index.strip("billing@telecom.ru", body)
+    assert stripped == f"{content}\nСумма к оплате: 1009,00 руб., срок оплаты до 10.04.2025."
+
+
+def test_line_in_a_minority_of_messages_is_kept():
+    index = BoilerplateIndex(None, min_messages=2)
+    notice = "Обратите внимание: офис не работает в праздничные дни."
+    for idx in range(12):
+        extra = f"\n{notice}" if idx % 4 == 0 else ""
+        index.strip("news@corp.ru", _mail(f"Новость номер {idx} о работе компании.{extra}"))
+    assert notice in index.strip("news@corp.ru", _mail(f"Последняя новость о работе компании.\n{notice}"))
+
+
+def test_free_mail_senders_are_not_pooled():
+    index = BoilerplateIndex(None, min_messages=2)
+    for idx in range(3):
+        index.strip(f"user{idx}@gmail.com", _mail(f"Письмо {idx} от частного лица с вопросом."))
+    assert DISCLAIMER in index.strip("other@gmail.com", _mail("Еще одно письмо с вопросом."))
@@ -0,0 +1,90 @@
+from pathlib import Path
+from types import SimpleNamespace
+
+from mailbot_v26.llm.budget import BudgetLevel, TokenBudget
+from mailbot_v26.llm.fanout import map_ordered
+from mailbot_v26.pipeline.processor import Attachment, InboundMessage, MessageProcessor
+from mailbot_v26.state_manager import StateManager
+
+
+def _budget(tmp_path: Path, **kwargs) -> TokenBudget:
+    state = StateManager(tmp_path / "state.json")
+    return TokenBudget(state, daily_limit=1000, account_share=0.5, priority_reserve=0.1, **kwargs)
+
+
+def test_unlimited_budget_is_always_full(tmp_path: Path) -> None:
+    budget = TokenBudget(StateManager(tmp_path / "state.json"), daily_limit=0)
+    budget.state.add_tokens(10**9, login="a")
+    assert budget.decide("a").level is BudgetLevel.FULL
+
+
+def test_budget_degrades_in_steps(tmp_path: Path) -> None:
+    budget = _budget(tmp_path, reduced_max_chunks=2)
+    # account cap = (1000 - 100 reserve) * 0.5 = 450
+    assert budget.decide("a").level is BudgetLevel.FULL
+    budget.state.add_tokens(250, login="a")
+    reduced = budget.decide("a")
+    assert reduced.level is BudgetLevel.REDUCED
+    assert reduced.max_chunks == 2
+    budget.state.add_tokens(120, login="a")
+    assert budget.decide("a").level is BudgetLevel.BODY_ONLY
+    assert budget.decide("a").summarize_attachments is False
+    budget.state.add_tokens(100, login="a")
+    assert budget.decide("a").use_llm is False
+
+
+def test_noisy_account_does_not_starve_others(tmp_path: Path) -> None:
+    budget = _budget(tmp_path)
+    budget.state.add_tokens(450, login="noisy")
+    assert budget.decide("noisy").level is BudgetLevel.FALLBACK
+    assert budget.decide("quiet").level is BudgetLevel.FULL
+
+
+def test_priority_mail_uses_reserve(tmp_path: Path) -> None:
+    budget = _budget(tmp_path)
+    budget.state.add_tokens(450, login="a")
+    budget.state.add_tokens(450, login="b")
+    assert budget.decide("c").level is BudgetLevel.FALLBACK
+    assert budget.decide("c", priority=True).use_llm is True
+
+
+def test_record_charges_current_account_across_threads(tmp_path: Path) -> None:
+    budget = _budget(tmp_path)
+    with budget.account("a"):
+        map_ordered(lambda _: budget.record(5), range(4), max_workers=4)
+    budget.record(7)
+    assert budget.state.get_tokens_used_today("a") == 20
+    assert budget.state.get_tokens_used_today() == 27
+
+
+def test_processor_skips_llm_when_budget_exhausted(tmp_path: Path) -> None:
+    calls = []
+
+    class Summarizer:
+        max_concurrency = 1
+
+        def summarize_email(self, text, max_chunks=None):
+            calls.append(("email", max_chunks))
+            return "Краткое резюме тела письма"
+
+        def summarize_attachment(self, text, kind="PDF", max_chunks=None):
+            calls.append(("attachment", max_chunks))
+            return "Сводка вложения"
+
+    budget = _budget(tmp_path)
+    processor = MessageProcessor(SimpleNamespace(llm_call=None), budget.state, llm=Summarizer(), budget=budget)
+    msg = InboundMessage(
+        subject="Счет",
+        body="Просим оплатить счет за услуги связи до конца месяца.",
+        attachments=[Attachment(filename="act.pdf", content=b"", text="Акт оказанных услуг за март.")],
+    )
+
+    budget.state.add_tokens(300, login="a")
+    assert processor.process("a", msg) is not None
+    assert calls == [("email", 2), ("attachment", 2)]
+
+    calls.clear()
+    budget.state.add_tokens(200, login="a")
+    output = processor.process("a", msg)
+    assert calls == []
+    assert "Просим оплатить счет" in output
@@ -11,3 +11,73 @@ def test_chunker_respects_overlap():
 
 def test_chunker_handles_small_text():
     assert chunk_text("short", size=100, overlap=20) == ["short"]
+
+
+def test_token_estimate_is_script_aware():
+    from mailbot_v26.llm.tokens import estimate_tokens
+
+    english = "payment is due at the end of the month " * 20
+    russian = "оплата должна быть произведена до конца месяца " * 20
+    assert estimate_tokens("") == 0
+    assert estimate_tokens(russian) / len(russian) > estimate_tokens(english) / len(english)
+
+
+def test_token_chunker_keeps_paragraphs_whole():
+    from mailbot_v26.llm.chunker import chunk_by_tokens
+    from mailbot_v26.llm.tokens import estimate_tokens
+
+    clause = "Поставщик обязуется передать товар в срок."
+    paragraphs = [f"Пункт {idx}. " + " ".join([clause] * 6) for idx in range(12)]
+    text = "\n\n".join(paragraphs)
+    chunks = chunk_by_tokens(text, max_tokens=300)
+
+    assert 1 < len(chunks) < len(paragraphs)
+    for chunk in chunks:
+        assert estimate_tokens(chunk) <= 300 + 5
+        for part in chunk.split("\n\n"):
+            assert part in paragraphs
+    assert "\n\n".join(chunks) == text
+
+
+def test_token_chunker_splits_long_paragraph_on_sentences():
+    from mailbot_v26.llm.chunker import chunk_by_tokens
+
+    sentences = [f"Предложение номер {idx} описывает условия оплаты." for idx in range(60)]
+    chunks = chunk_by_tokens(" ".join(sentences), max_tokens=120)
+
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert chunk.endswith(".")
+    assert " ".join(chunks) == " ".join(sentences)
+
+
+def test_token_chunker_overlaps_only_hard_splits():
+    from mailbot_v26.llm.chunker import chunk_by_tokens
+
+    words = [f"слово{idx}" for idx in range(400)]
+    chunks = chunk_by_tokens(" ".join(words), max_tokens=100, overlap_tokens=10)
+
+    assert len(chunks) > 2
+    for chunk in chunks:
+        for token in chunk.split(" "):
+            assert token in words
+    for previous, current in zip(chunks, chunks[1:]):
+        assert previous.split(" ")[-1] in current.split(" ")[:10]
+
+
+def test_chunk_budget_respects_context():
+    from mailbot_v26.llm.chunker import chunk_budget
+
+    assert chunk_budget(8192, 512, 1800) == 1800
+    assert chunk_budget(2048, 512, 1800) == 2048 - 512 - 300
+
+
+def test_iter_chunks_matches_list_and_is_lazy():
+    from mailbot_v26.llm.chunker import chunk_by_tokens, iter_chunks_by_tokens
+
+    text = "\n\n".join(f"Абзац {idx}. " + "Условия поставки и оплаты. " * 20 for idx in range(10))
+    chunks = iter_chunks_by_tokens(text, max_tokens=200)
+
+    assert next(chunks) == chunk_by_tokens(text, max_tokens=200)[0]
+    assert [chunk_by_tokens(text, max_tokens=200)[0]] + list(chunks) == chunk_by_tokens(text, max_tokens=200)
+    assert list(iter_chunks_by_tokens("   ")) == []
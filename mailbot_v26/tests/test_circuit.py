@@ -0,0 +1,78 @@
+from pathlib import Path
+
+from mailbot_v26.llm.circuit import CircuitBreaker, CircuitState
+from mailbot_v26.llm.summarizer import LLMSummarizer
+from mailbot_v26.state_manager import StateManager
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_breaker_opens_and_persists(tmp_path: Path) -> None:
+    state = StateManager(tmp_path / "state.json")
+    breaker = CircuitBreaker(state, failure_threshold=2, reset_timeout=60, clock=FakeClock())
+    breaker.record_failure("timeout")
+    assert breaker.current is CircuitState.CLOSED
+    breaker.record_failure("timeout")
+    assert breaker.current is CircuitState.OPEN
+    assert breaker.allow_request() is False
+    assert state.get_llm_status() == (True, "timeout")
+
+
+def test_half_open_allows_single_probe(tmp_path: Path) -> None:
+    clock = FakeClock()
+    state = StateManager(tmp_path / "state.json")
+    breaker = CircuitBreaker(state, failure_threshold=1, reset_timeout=60, clock=clock)
+    breaker.record_failure("down")
+    clock.now = 61
+    assert breaker.available() is True
+    assert breaker.allow_request() is True
+    assert breaker.current is CircuitState.HALF_OPEN
+    assert breaker.allow_request() is False
+
+    breaker.record_failure("still down")
+    assert breaker.current is CircuitState.OPEN
+    clock.now = 130
+    assert breaker.allow_request() is True
+    breaker.record_success()
+    assert breaker.current is CircuitState.CLOSED
+    assert state.get_llm_status()[0] is False
+
+
+def test_breaker_restores_open_state_after_restart(tmp_path: Path) -> None:
+    state = StateManager(tmp_path / "state.json")
+    state.set_llm_unavailable(True, "down")
+    breaker = CircuitBreaker(state, reset_timeout=60, clock=FakeClock())
+    assert breaker.current is CircuitState.OPEN
+    assert breaker.available() is False
+
+
+def test_summarizer_skips_llm_while_open(tmp_path: Path) -> None:
+    calls = []
+
+    def failing(prompt: str) -> str:
+        calls.append(prompt)
+        raise TimeoutError("timed out")
+
+    clock = FakeClock()
+    breaker = CircuitBreaker(StateManager(tmp_path / "state.json"), failure_threshold=2, reset_timeout=60, clock=clock)
+    summarizer = LLMSummarizer(failing, breaker=breaker)
+    text = "Важное уведомление об оплате. " * 400
+
+    first = summarizer.summarize_email(text)
+    assert first.startswith("Важное уведомление")
+    assert len(calls) == 2  # threshold reached, remaining chunks skipped
+
+    summarizer.summarize_email(text)
+    summarizer.summarize_attachment(text)
+    assert len(calls) == 2
+
+    clock.now = 61
+    summarizer.llm_call = lambda prompt: calls.append(prompt) or "Уведомление об оплате счета."
+    assert summarizer.summarize_email("Короткое письмо об оплате.") == "Уведомление об оплате счета."
+    assert breaker.current is CircuitState.CLOSED
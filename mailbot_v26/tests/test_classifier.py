@@ -0,0 +1,93 @@
+import io
+import struct
+import zipfile
+import zlib
+from types import SimpleNamespace
+
+import pytest
+
+from mailbot_v26.bot_core import classifier
+from mailbot_v26.bot_core.classifier import classify_attachment
+
+_OLE_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+_FREE = 0xFFFFFFFF
+_END = 0xFFFFFFFE
+_FAT = 0xFFFFFFFD
+
+
+def _zip_container(names: list[str]) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name in names:
+            archive.writestr(name, "<xml/>" * 200)
+    return buffer.getvalue()
+
+
+def _dir_entry(name: str, entry_type: int) -> bytes:
+    encoded = (name + "\x00").encode("utf-16-le")
+    entry = encoded.ljust(64, b"\x00")
+    entry += struct.pack("<HBB", len(encoded), entry_type, 1)
+    return entry.ljust(128, b"\x00")
+
+
+def _ole_container(stream_name: str) -> bytes:
+    header = bytearray(512)
+    header[0:8] = _OLE_MAGIC
+    struct.pack_into("<HHH", header, 26, 3, 0xFFFE, 9)
+    struct.pack_into("<I", header, 44, 1)  # one FAT sector
+    struct.pack_into("<I", header, 48, 1)  # directory starts at sector 1
+    difat = [0] + [_FREE] * 108
+    struct.pack_into("<109I", header, 76, *difat)
+
+    fat = struct.pack("<128I", _FAT, _END, *([_FREE] * 126))
+    directory = _dir_entry("Root Entry", 5) + _dir_entry(stream_name, 2)
+    directory = directory.ljust(512, b"\x00")
+    return bytes(header) + fat + directory
+
+
+def test_nameless_docx_detected_from_central_directory():
+    data = _zip_container(["[Content_Types].xml", "_rels/.rels", "word/document.xml"])
+    assert classify_attachment("attachment.bin", "application/octet-stream", data) == "DOCX"
+
+
+def test_nameless_xlsx_detected_from_central_directory():
+    data = _zip_container(["[Content_Types].xml", "xl/workbook.xml", "xl/worksheets/sheet1.xml"])
+    assert classify_attachment("", "", data) == "XLSX"
+
+
+def test_plain_zip_stays_unknown():
+    data = _zip_container(["readme.txt", "word/notes.txt"])
+    assert classify_attachment("archive.bin", "", data) == "UNKNOWN"
+
+
+def test_truncated_zip_is_unknown():
+    data = _zip_container(["[Content_Types].xml", "word/document.xml"])
+    assert classify_attachment("attachment.bin", "", data[:40]) == "UNKNOWN"
+
+
+def test_nameless_ole_doc_and_xls_detected():
+    assert classify_attachment("attachment.bin", "", _ole_container("WordDocument")) == "DOC"
+    assert classify_attachment("attachment.bin", "", _ole_container("Workbook")) == "XLS"
+    assert classify_attachment("attachment.bin", "", _ole_container("PowerPoint Document")) == "UNKNOWN"
+
+
+def test_filename_hint_still_wins():
+    data = _zip_container(["[Content_Types].xml", "xl/workbook.xml"])
+    assert classify_attachment("report.docx", "", data) == "DOCX"
+
+
+def test_container_sniff_reads_only_the_entries_it_needs(monkeypatch):
+    names = ["[Content_Types].xml"] + [f"word/media/image{i}.png" for i in range(300)]
+    data = _zip_container(names)
+    reads = []
+
+    def counting_unpack_from(fmt, buffer, offset=0):
+        reads.append(offset)
+        return struct.unpack_from(fmt, buffer, offset)
+
+    monkeypatch.setattr(classifier, "struct", SimpleNamespace(unpack_from=counting_unpack_from, error=struct.error))
+    monkeypatch.setattr(zlib, "decompressobj", lambda *args, **kwargs: pytest.fail("member inflated"))
+
+    assert classify_attachment("attachment.bin", "", data) == "DOCX"
+    # EOCD record plus the two entries that decide it, not all 301.
+    assert len(reads) == 3
@@ -29,3 +29,34 @@ def test_clean_email_removes_signature_block():
     )
     cleaned = clean_email_body(body)
     assert cleaned == "Основной текст"
+
+
+def test_latest_reply_cuts_outlook_header_block():
+    from mailbot_v26.text.clean_email import latest_reply
+
+    body = (
+        "Тема: согласование договора\n"
+        "Согласны с правками, подпишем до пятницы.\n"
+        "\n"
+        "From: Иван Петров <ivan@example.com>\n"
+        "Sent: Monday, March 3, 2025 10:00\n"
+        "To: team@example.com\n"
+        "Subject: RE: договор\n"
+        "Старая переписка"
+    )
+    assert latest_reply(body) == "Тема: согласование договора\nСогласны с правками, подпишем до пятницы."
+
+
+def test_latest_reply_handles_attribution_and_quotes():
+    from mailbot_v26.text.clean_email import latest_reply
+
+    body = "Новый ответ\n> цитата\nЕще строка\nOn Mon, 3 Mar 2025, Ivan wrote:\n> старое"
+    assert latest_reply(body) == "Новый ответ\nЕще строка"
+    assert latest_reply("-----Original Message-----\nстарое") == ""
+
+
+def test_strip_signature_keeps_header_like_lines():
+    from mailbot_v26.text.clean_email import strip_signature
+
+    body = "Тема: оплата\nСчет оплачен.\nС уважением,\nИван\n+7 900 000-00-00"
+    assert strip_signature(body) == "Тема: оплата\nСчет оплачен."
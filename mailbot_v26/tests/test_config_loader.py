@@ -8,7 +8,7 @@ from mailbot_v26.config_loader import (
     load_accounts_config,
     load_config,
     load_general_config,
-    load_keys_config,
+    load_llm_config,
 )
 
 
@@ -97,3 +97,51 @@ admin_chat_id = 1
     )
     general = load_general_config(tmp_path)
     assert general.check_interval == 180
+
+
+def test_llm_section_defaults_and_overrides(tmp_path: Path) -> None:
+    build_sample_config(tmp_path)
+    assert load_config(tmp_path).llm.cache_enabled is True
+
+    write_file(
+        tmp_path,
+        "config.ini",
+        """[general]
+check_interval = 400
+max_attachment_mb = 20
+admin_chat_id = 111
+
+[llm]
+model = @cf/test/model
+cache_enabled = false
+cache_ttl_hours = 5
+cache_max_entries = 10
+batch_window_ms = 150
+""",
+    )
+    llm = load_llm_config(tmp_path)
+    assert llm.model == "@cf/test/model"
+    assert llm.cache_enabled is False
+    assert llm.cache_ttl_hours == 5
+    assert llm.cache_max_entries == 10
+    assert llm.batch_window_ms == 150
+    assert llm.batch_max_items == 6
+
+
+def test_llm_section_invalid_number(tmp_path: Path) -> None:
+    write_file(tmp_path, "config.ini", "[general]\n\n[llm]\ncache_ttl_hours = soon\n")
+    with pytest.raises(ConfigError):
+        load_llm_config(tmp_path)
+
+
+def test_llm_routes_section(tmp_path: Path) -> None:
+    write_file(
+        tmp_path,
+        "config.ini",
+        "[general]\n\n[llm_routes]\nchunk = @cf/small\nattachment.excel = @cf/tables\nfinal =\n",
+    )
+    assert load_llm_config(tmp_path).routes == {"chunk": "@cf/small", "attachment.excel": "@cf/tables"}
+
+    write_file(tmp_path, "config.ini", "[general]\n\n[llm_routes]\nsummary = @cf/small\n")
+    with pytest.raises(ConfigError):
+        load_llm_config(tmp_path)
@@ -0,0 +1,63 @@
+from mailbot_v26.llm.extractive import extract_summary, score_sentences, split_sentences
+from mailbot_v26.llm.summarizer import LLMSummarizer
+from mailbot_v26.llm.tokens import estimate_tokens
+
+
+LETTER = (
+    "Добрый день, коллеги.\n"
+    "Погода на этой неделе будет переменчивой.\n"
+    "Направляем счет № INV-2041 на оплату поставки оборудования.\n"
+    "Сумма к оплате по счету составляет 125 000 руб.\n"
+    "Оплату поставки оборудования просим провести до 15.03.2024.\n"
+    "В офисе поменяли кофемашину."
+)
+
+
+def test_split_sentences_uses_punctuation_and_lines():
+    assert split_sentences("Первое. Второе!\nТретье") == ["Первое.", "Второе!", "Третье"]
+
+
+def test_fact_sentences_outrank_small_talk():
+    scores = {item.text: item.score for item in score_sentences(LETTER)}
+    assert scores["Сумма к оплате по счету составляет 125 000 руб."] > scores["В офисе поменяли кофемашину."]
+    assert scores["Оплату поставки оборудования просим провести до 15.03.2024."] > scores[
+        "Погода на этой неделе будет переменчивой."
+    ]
+
+
+def test_extract_summary_keeps_original_order_within_limit():
+    summary = extract_summary(LETTER, max_chars=180)
+    assert len(summary) <= 180
+    assert "INV-2041" in summary and "15.03.2024" in summary
+    assert "кофемашину" not in summary
+    assert summary.index("INV-2041") < summary.index("15.03.2024")
+
+
+def test_extract_summary_truncates_single_oversized_sentence():
+    summary = extract_summary("слово " * 200, max_chars=100)
+    assert len(summary) <= 100
+    assert summary.endswith("...")
+
+
+def test_summarizer_condenses_long_input_before_llm():
+    prompts = []
+
+    def llm(prompt: str) -> str:
+        prompts.append(prompt)
+        return "Итог по письму."
+
+    filler = "\n".join(f"Строка заполнения номер {idx} без фактов." for idx in range(400))
+    summarizer = LLMSummarizer(llm, extract_tokens=200)
+    assert summarizer.summarize_email(filler + "\n" + LETTER) == "Итог по письму."
+
+    assert len(prompts) == 1
+    assert estimate_tokens(prompts[0]) < 200 + 150
+    assert "INV-2041" in prompts[0]
+
+
+def test_fallback_prefers_fact_sentences():
+    summarizer = LLMSummarizer(None)
+    filler = " ".join(f"Общая фраза номер {idx} ни о чем." for idx in range(100))
+    result = summarizer.summarize_email(filler + " Сумма к оплате составляет 125 000 руб.")
+    assert len(result) <= 600
+    assert "125 000 руб." in result
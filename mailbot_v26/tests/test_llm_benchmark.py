@@ -0,0 +1,87 @@
+import http.client
+import json
+
+from mailbot_v26.bot_core.llm_client import CloudflareConfig, CloudflareLLMClient
+from mailbot_v26.llm import benchmark
+from mailbot_v26.llm.stub_server import StubLLMServer, StubProfile, build_response
+
+
+def _fast_profile(**overrides) -> StubProfile:
+    values = dict(latency_ms=1.0, latency_spread=0.0, token_interval_ms=0.0, seed=1)
+    values.update(overrides)
+    return StubProfile(**values)
+
+
+def test_stub_answers_in_client_shape_and_reports_usage():
+    tokens = []
+    with StubLLMServer(_fast_profile(response_words=10)) as server:
+        client = CloudflareLLMClient(
+            CloudflareConfig("acc", "token", api_base=server.api_base), on_tokens=tokens.append
+        )
+        answer = client("Текст: оплата счета поставщику")
+        client.close()
+
+    assert answer
+    assert len(answer.split()) == 10
+    assert tokens and tokens[0] > 0
+    assert server.stats.completed == 1
+
+
+def test_stub_rate_limits_are_retried_by_client():
+    with StubLLMServer(_fast_profile(rate_limit_rate=1.0, retry_after=0.0)) as server:
+        client = CloudflareLLMClient(
+            CloudflareConfig("acc", "token", api_base=server.api_base, max_retries=2), sleep=lambda _: None
+        )
+        assert client("prompt") == ""
+        client.close()
+    assert server.stats.requests == 3
+    assert server.stats.rate_limited == 3
+
+
+def test_stub_streams_server_sent_events():
+    with StubLLMServer(_fast_profile(response_words=5)) as server:
+        host, port = server.server_address[:2]
+        conn = http.client.HTTPConnection(host, port, timeout=5)
+        body = json.dumps({"messages": [{"role": "user", "content": "one two"}], "stream": True})
+        conn.request("POST", "/client/v4/accounts/acc/ai/run/model", body=body)
+        response = conn.getresponse()
+        raw = response.read().decode("utf-8")
+        conn.close()
+
+    assert response.getheader("Content-Type") == "text/event-stream"
+    events = [line[len("data: "):] for line in raw.splitlines() if line.startswith("data: ")]
+    assert events[-1] == "[DONE]"
+    text = "".join(json.loads(event)["response"] for event in events[:-1])
+    assert text == build_response("one two", 5)
+
+
+def test_build_response_answers_every_batch_task():
+    prompt = "Заголовок\n\n### ЗАДАНИЕ 1\nпервое письмо\n\n### ЗАДАНИЕ 2\nвторое письмо\n"
+    response = build_response(prompt, 12)
+    assert "### ОТВЕТ 1" in response and "### ОТВЕТ 2" in response
+
+
+def test_benchmark_reports_each_concurrency_level(capsys):
+    results = benchmark.main(
+        ["--messages", "4", "--concurrency", "1,2", "--latency-ms", "1", "--token-ms", "0", "--body-chars", "300"]
+    )
+
+    assert [item.concurrency for item in results] == [1, 2]
+    assert all(item.requests >= item.messages for item in results)
+    assert all(item.p95_ms >= item.p50_ms > 0 for item in results)
+    assert "calls/msg" in capsys.readouterr().out
+
+
+def test_benchmark_stream_mode_reads_sse():
+    corpus = benchmark.synthetic_corpus(3, 300)
+    with StubLLMServer(_fast_profile(response_words=20)) as server:
+        result = benchmark.run_level(server, corpus, 1, stream=True)
+
+    assert server.stats.streams == result.requests >= 3
+    assert result.failed_calls == 0 and result.p50_ms > 0
+
+
+def test_percentile_nearest_rank():
+    assert benchmark.percentile([5.0, 1.0, 3.0, 2.0, 4.0], 50) == 3.0
+    assert benchmark.percentile([1.0, 2.0], 95) == 2.0
+    assert benchmark.percentile([], 50) == 0.0
@@ -0,0 +1,68 @@
+from pathlib import Path
+
+from mailbot_v26.llm.cache import LLMResponseCache
+from mailbot_v26.llm.summarizer import LLMSummarizer
+
+
+def test_cache_survives_restart(tmp_path: Path) -> None:
+    path = tmp_path / "cache.sqlite3"
+    cache = LLMResponseCache(path)
+    cache.put("model-a", "prompt", "answer")
+    cache.close()
+
+    reopened = LLMResponseCache(path)
+    assert reopened.get("model-a", "prompt") == "answer"
+    assert reopened.get("model-b", "prompt") is None
+    assert reopened.stats()["hits"] == 1
+    assert reopened.stats()["misses"] == 1
+
+
+def test_cache_ttl_expires_entries(tmp_path: Path) -> None:
+    cache = LLMResponseCache(tmp_path / "cache.sqlite3", ttl_seconds=-1)
+    cache.put("m", "p", "r")
+    assert cache.get("m", "p") is None
+
+
+def test_cache_is_size_bounded(tmp_path: Path) -> None:
+    cache = LLMResponseCache(tmp_path / "cache.sqlite3", max_entries=3)
+    for idx in range(5):
+        cache.put("m", f"p{idx}", f"r{idx}")
+    assert len(cache) == 3
+    assert cache.get("m", "p0") is None
+    assert cache.get("m", "p4") == "r4"
+
+
+def test_unusable_path_disables_cache(tmp_path: Path) -> None:
+    (tmp_path / "file").write_text("x", encoding="utf-8")
+    cache = LLMResponseCache(tmp_path / "file" / "cache.sqlite3")
+    assert cache.get("m", "prompt") is None
+    cache.put("m", "prompt", "answer")
+    cache.close()
+
+
+def test_summarizer_reuses_cached_responses(tmp_path: Path) -> None:
+    calls = []
+
+    def llm_call(prompt: str) -> str:
+        calls.append(prompt)
+        return "Счет на оплату услуг связи за март."
+
+    cache = LLMResponseCache(tmp_path / "cache.sqlite3")
+    text = "Просим оплатить счет за услуги связи за март."
+    first = LLMSummarizer(llm_call, cache=cache, model="m").summarize_email(text)
+    made = len(calls)
+    second = LLMSummarizer(llm_call, cache=cache, model="m").summarize_email(text)
+
+    assert first == second
+    assert len(calls) == made
+    assert cache.hits == made
+
+
+def test_summarizer_does_not_cache_failures(tmp_path: Path) -> None:
+    cache = LLMResponseCache(tmp_path / "cache.sqlite3")
+
+    def failing(prompt: str) -> str:
+        raise RuntimeError("down")
+
+    LLMSummarizer(failing, cache=cache, model="m").summarize_email("Текст письма")
+    assert len(cache) == 0
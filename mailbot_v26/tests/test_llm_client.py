@@ -0,0 +1,299 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from mailbot_v26.bot_core.llm_client import CloudflareConfig, CloudflareLLMClient, _Abort
+from mailbot_v26.config_loader import load_config
+from mailbot_v26.llm.stub_server import StubLLMServer, StubProfile, build_response
+from mailbot_v26.llm.summarizer import LLMSummarizer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self) -> None:  # noqa: N802 - http.server API
+        server = self.server
+        length = int(self.headers.get("Content-Length", 0))
+        server.requests.append((self.path, json.loads(self.rfile.read(length)), self.client_address[1]))
+        status, payload, headers = server.responses.pop(0) if server.responses else (200, server.default, {})
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        return None
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.requests = []
+    httpd.responses = []
+    httpd.default = {
+        "result": {"response": "Ответ модели", "usage": {"prompt_tokens": 7, "completion_tokens": 3}},
+        "success": True,
+    }
+    thread = threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _client(server, **overrides) -> CloudflareLLMClient:
+    config = CloudflareConfig(
+        account_id="acc",
+        api_token="token",
+        api_base=f"http://127.0.0.1:{server.server_address[1]}/client/v4",
+        **overrides,
+    )
+    return CloudflareLLMClient(config, sleep=lambda _: None)
+
+
+def test_client_reuses_keep_alive_connection(server):
+    tokens = []
+    client = _client(server, max_tokens=64)
+    client.on_tokens = tokens.append
+
+    assert client("первый") == "Ответ модели"
+    assert client("второй") == "Ответ модели"
+
+    paths = {path for path, _, _ in server.requests}
+    ports = {port for _, _, port in server.requests}
+    assert paths == {"/client/v4/accounts/acc/ai/run/@cf/meta/llama-3-8b-instruct"}
+    assert len(ports) == 1
+    assert server.requests[0][1]["max_tokens"] == 64
+    assert server.requests[0][1]["messages"] == [{"role": "user", "content": "первый"}]
+    assert tokens == [10, 10]
+
+
+def test_client_retries_429_and_5xx(server):
+    server.responses = [
+        (429, {"errors": ["rate"]}, {"Retry-After": "0"}),
+        (503, {"errors": ["busy"]}, {}),
+    ]
+    client = _client(server, max_retries=2)
+    assert client.complete("prompt") == "Ответ модели"
+    assert len(server.requests) == 3
+
+
+def test_client_gives_up_after_retries(server):
+    server.responses = [(500, {}, {})] * 3
+    client = _client(server, max_retries=1)
+    assert client.complete("prompt") == ""
+    assert len(server.requests) == 2
+
+
+def test_client_does_not_retry_client_errors(server):
+    server.responses = [(400, {"errors": ["bad"]}, {})]
+    client = _client(server, max_retries=3)
+    assert client.complete("prompt") == ""
+    assert len(server.requests) == 1
+
+
+def test_client_generate_keeps_system_prompt(server):
+    server.default = {"result": {"response": {"message": {"content": " факт "}}}}
+    client = _client(server)
+    assert client.generate("system", "data") == "факт"
+    assert server.requests[0][1]["messages"][0] == {"role": "system", "content": "system"}
+
+
+def test_client_without_credentials_is_silent():
+    client = CloudflareLLMClient(CloudflareConfig(account_id="", api_token=""))
+    assert client("prompt") == ""
+
+
+def test_load_config_wires_llm_transport(tmp_path: Path):
+    (tmp_path / "config.ini").write_text("[general]\n\n[llm]\nmax_tokens = 128\n", encoding="utf-8")
+    (tmp_path / "accounts.ini").write_text("[a]\nlogin = x\npassword = y\n", encoding="utf-8")
+    (tmp_path / "keys.ini").write_text(
+        "[telegram]\nbot_token = t\n\n[cloudflare]\naccount_id = acc\napi_token = key\n", encoding="utf-8"
+    )
+    cfg = load_config(tmp_path)
+    assert isinstance(cfg.llm_call, CloudflareLLMClient)
+    assert cfg.llm_call.config.max_tokens == 128
+
+
+def _stub_client(stub, **overrides) -> CloudflareLLMClient:
+    config = CloudflareConfig(account_id="acc", api_token="token", api_base=stub.api_base, **overrides)
+    return CloudflareLLMClient(config, sleep=lambda _: None)
+
+
+def test_client_stream_yields_sse_pieces_and_reuses_connection():
+    tokens = []
+    with StubLLMServer(StubProfile(latency_ms=1, latency_spread=0, token_interval_ms=0, response_words=6)) as stub:
+        client = _stub_client(stub)
+        client.on_tokens = tokens.append
+        first = "".join(client.stream("one two three"))
+        second = "".join(client.stream("one two three"))
+        client.close()
+
+    assert first == second == build_response("one two three", 6)
+    assert stub.stats.streams == 2
+    assert len(tokens) == 2
+
+
+def test_client_stream_early_close_stops_generation():
+    profile = StubProfile(latency_ms=1, latency_spread=0, token_interval_ms=5, response_words=400)
+    with StubLLMServer(profile) as stub:
+        client = _stub_client(stub)
+        pieces = client.stream("prompt words here")
+        received = [next(pieces) for _ in range(3)]
+        pieces.close()
+        deadline = time.monotonic() + 2
+        while not stub.stats.streams_cancelled and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    assert len(received) == 3
+    assert stub.stats.streams_cancelled == 1
+    assert stub.stats.generated_words < 400
+
+
+def test_client_stream_accepts_plain_json_answer(server):
+    client = _client(server)
+    assert list(client.stream("prompt")) == ["Ответ модели"]
+    assert server.requests[0][1]["stream"] is True
+
+
+def test_summarizer_stops_reading_stream_at_char_limit():
+    profile = StubProfile(latency_ms=1, latency_spread=0, token_interval_ms=2, response_words=300)
+    with StubLLMServer(profile) as stub:
+        summarizer = LLMSummarizer(_stub_client(stub), output_char_limit=200)
+        summary = summarizer.summarize_email("Короткое письмо об оплате счета.")
+        deadline = time.monotonic() + 2
+        while not stub.stats.streams_cancelled and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    assert 200 <= len(summary) < 260
+    assert stub.stats.streams_cancelled == 1
+
+
+class _DelayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self) -> None:  # noqa: N802 - http.server API
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        delay = self.server.delays.pop(0) if self.server.delays else 0.0
+        time.sleep(delay)
+        model = self.path.rsplit("/", 1)[-1]
+        body = json.dumps({"result": {"response": f"answer from {model}"}}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        return None
+
+
+@pytest.fixture
+def slow_server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _DelayHandler)
+    httpd.daemon_threads = True
+    httpd.delays = []
+    thread = threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _warm(client: CloudflareLLMClient, model: str, seconds: float = 0.02, count: int = 30) -> None:
+    for _ in range(count):
+        client.latency.record(model, seconds)
+
+
+def test_client_hedges_requests_slower_than_p95(slow_server):
+    client = _client(slow_server, model="main", hedge_model="alt", hedge_max_ratio=1.0)
+    _warm(client, "main")
+    slow_server.delays = [1.0, 0.0]
+
+    started = time.monotonic()
+    assert client.complete("prompt") == "answer from alt"
+    assert time.monotonic() - started < 0.8
+    assert client.hedges_sent == 1 and client.hedges_won == 1
+    client.close()
+
+
+def test_client_hedge_ratio_caps_duplicates(slow_server):
+    client = _client(slow_server, model="main", hedge_max_ratio=0.0)
+    _warm(client, "main")
+    slow_server.delays = [0.2]
+
+    assert client.complete("prompt") == "answer from main"
+    assert client.hedges_sent == 0
+    client.close()
+
+
+def test_client_timeout_follows_recent_latency():
+    client = CloudflareLLMClient(CloudflareConfig("acc", "token", timeout=15.0, min_timeout=1.0))
+    assert client._timeout_for("m") == 15.0
+    _warm(client, "m", seconds=2.0)
+    assert client._timeout_for("m") == 4.0
+    _warm(client, "slow", seconds=30.0)
+    assert client._timeout_for("slow") == 15.0
+
+
+def test_streamed_summaries_feed_latency_and_hedging():
+    profile = StubProfile(latency_ms=1, latency_spread=0, token_interval_ms=0, response_words=30)
+    with StubLLMServer(profile) as stub:
+        # No hedges, so the request count is exact.
+        client = _stub_client(stub, model="main", hedge_max_ratio=0.0)
+        summarizer = LLMSummarizer(client, output_char_limit=1200)
+        for idx in range(25):
+            assert summarizer.summarize_email(f"Письмо номер {idx} об оплате счета.")
+        client.close()
+
+    assert stub.stats.streams == 25
+    assert client.latency.snapshot()["main stream"]["samples"] == 25
+    assert client.hedge_eligible == 25 and client.hedges_sent == 0
+
+
+def test_slow_stream_is_hedged_and_loser_aborted(slow_server):
+    client = _client(slow_server, model="main", hedge_model="alt", hedge_max_ratio=1.0)
+    _warm(client, "main stream")
+    slow_server.delays = [1.0, 0.0]
+    summarizer = LLMSummarizer(client, output_char_limit=1200)
+
+    started = time.monotonic()
+    assert summarizer.summarize_email("Короткое письмо об оплате счета.") == "answer from alt"
+    assert time.monotonic() - started < 0.8
+    assert client.hedges_sent == 1 and client.hedges_won == 1
+    client.close()
+
+
+def test_hedge_delay_ignores_time_queued_for_a_worker(slow_server):
+    client = _client(slow_server, model="main", hedge_max_ratio=1.0, pool_size=0)
+    _warm(client, "main", seconds=0.3)
+    slow_server.delays = [0.2, 0.2]
+    # pool_size=0 leaves two hedge workers: occupy both, so the next
+    # request waits for a worker longer than its p95 before it starts.
+    busy = [client._submit(lambda hedge, abort: time.sleep(0.4), False, _Abort()) for _ in range(2)]
+    assert client.complete("prompt") == "answer from main"
+    assert client.hedges_sent == 0
+    for future in busy:
+        future.result()
+    client.close()
+
+
+def test_client_recovers_when_latency_rises_above_adaptive_timeout(slow_server):
+    client = _client(slow_server, model="main", hedge_enabled=False, timeout=15.0, min_timeout=0.2)
+    _warm(client, "main")
+    assert client._timeout_for("main") == 0.2
+    slow_server.delays = [0.5] * 10
+
+    assert [client.complete("prompt") for _ in range(3)] == ["answer from main"] * 3
+    # Timed-out attempts were recorded, so the timeout now covers 0.5 s.
+    assert client._timeout_for("main") > 0.5
+    client.close()
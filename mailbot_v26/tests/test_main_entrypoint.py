@@ -14,3 +14,45 @@ def test_module_entrypoint_runs_start(monkeypatch):
     runpy.run_module("mailbot_v26", run_name="__main__")
 
     assert called["config_dir"] is None
+
+
+def test_failed_warmup_keeps_fetched_mail_unread(monkeypatch, tmp_path):
+    from types import SimpleNamespace
+
+    from mailbot_v26.state_manager import StateManager
+
+    start = mailbot_v26.start
+    account = SimpleNamespace(login="user@example.com", telegram_chat_id="1")
+    config = SimpleNamespace(
+        accounts=[account],
+        keys=SimpleNamespace(telegram_bot_token="t"),
+        llm=SimpleNamespace(batch_window_ms=0),
+        general=SimpleNamespace(check_interval=120),
+        llm_call=None,
+    )
+
+    class FakeIMAP:
+        def __init__(self, account, state):
+            self.state = state
+
+        def fetch_new_messages(self):
+            self.state.update_last_uid(account.login, 42)
+            return [(41, b"raw"), (42, b"raw")]
+
+    def broken_build(config, state):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(start, "CURRENT_DIR", tmp_path)
+    monkeypatch.setattr(start, "load_config", lambda _dir: config)
+    monkeypatch.setattr(start, "ResilientIMAP", FakeIMAP)
+    monkeypatch.setattr(start, "_build_processor", broken_build)
+    monkeypatch.setattr(start, "_configure_logging", lambda: None)
+    def sleep(seconds):
+        if seconds >= 120:  # end of a cycle: stop instead of looping forever
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr(start.time, "sleep", sleep)
+
+    start.main(tmp_path, argv=[])
+
+    assert StateManager(tmp_path / "state.json").get_last_uid(account.login) == 0
@@ -0,0 +1,120 @@
+import threading
+from pathlib import Path
+
+from mailbot_v26.worker.outbox import DeliveryWorker, Outbox
+
+
+def test_outbox_keeps_chat_order_and_survives_restart(tmp_path: Path) -> None:
+    path = tmp_path / "outbox.sqlite3"
+    outbox = Outbox(path)
+    for text in ("a1", "a2"):
+        outbox.enqueue("A", text, uid=text)
+    outbox.enqueue("B", "b1")
+    outbox.close()
+
+    outbox = Outbox(path)
+    assert [(item.chat_id, item.text) for item in outbox.due()] == [("A", "a1"), ("B", "b1")]
+    assert outbox.stats() == {"pending": 3, "dead": 0}
+
+
+def test_worker_retries_with_backoff_without_reordering(tmp_path: Path) -> None:
+    outbox = Outbox(tmp_path / "outbox.sqlite3")
+    outbox.enqueue("A", "a1")
+    outbox.enqueue("A", "a2")
+    outbox.enqueue("B", "b1")
+    sent = []
+    down = {"A"}
+
+    def send(chat_id: str, text: str) -> bool:
+        if chat_id in down:
+            return False
+        sent.append(text)
+        return True
+
+    worker = DeliveryWorker(outbox, send, base_delay=0.0)
+    assert worker.run_once() == 1
+    # a2 must not overtake the failed a1.
+    assert sent == ["b1"]
+    assert worker.backoff(3) == 0.0 and DeliveryWorker(outbox, send).backoff(3) == 40.0
+
+    down.clear()
+    assert worker.run_once() == 1
+    assert worker.run_once() == 1
+    assert sent == ["b1", "a1", "a2"]
+    assert outbox.stats() == {"pending": 0, "dead": 0}
+
+
+def test_long_outage_never_parks_pending_messages(tmp_path: Path) -> None:
+    outbox = Outbox(tmp_path / "outbox.sqlite3")
+    outbox.enqueue("A", "summary")
+    outbox.enqueue("A", "next")
+    sent = []
+    down = {"yes"}
+
+    def send(chat_id: str, text: str) -> bool:
+        if down:
+            raise ConnectionError("Telegram unreachable")
+        sent.append(text)
+        return True
+
+    worker = DeliveryWorker(outbox, send, base_delay=0.0)
+    for _ in range(100):
+        worker.run_once()
+    assert outbox.stats() == {"pending": 2, "dead": 0}
+    assert DeliveryWorker(outbox, send).backoff(100) == 600.0
+
+    down.clear()
+    worker.run_once()
+    worker.run_once()
+    assert sent == ["summary", "next"]
+    assert outbox.stats() == {"pending": 0, "dead": 0}
+
+
+def test_background_worker_delivers_after_notify(tmp_path: Path) -> None:
+    outbox = Outbox(tmp_path / "outbox.sqlite3")
+    delivered = threading.Event()
+
+    def send(chat_id: str, text: str) -> bool:
+        delivered.set()
+        return True
+
+    worker = DeliveryWorker(outbox, send, idle_wait=5.0).start()
+    try:
+        outbox.enqueue("A", "hello")
+        worker.notify()
+        assert delivered.wait(2.0)
+    finally:
+        worker.stop()
+    assert worker.delivered == 1
+
+
+def test_rejected_message_is_parked_at_once_and_chat_moves_on(tmp_path: Path) -> None:
+    from types import SimpleNamespace
+
+    from mailbot_v26.worker.telegram_sender import TelegramClient
+
+    outbox = Outbox(tmp_path / "outbox.sqlite3")
+    outbox.enqueue("A", "too long")
+    outbox.enqueue("A", "next")
+    posted = []
+
+    def post(url: str, json: dict, timeout: float) -> SimpleNamespace:
+        posted.append(json["text"])
+        if json["text"] == "too long":
+            return SimpleNamespace(status_code=400, text="Bad Request: message is too long")
+        return SimpleNamespace(status_code=200, text="ok")
+
+    client = TelegramClient("token", post=post, sleep=lambda _s: None)
+    worker = DeliveryWorker(outbox, client.deliver, base_delay=60.0)
+    worker.run_once()
+    worker.run_once()
+
+    assert posted == ["too long", "next"]
+    assert outbox.stats() == {"pending": 0, "dead": 1}
+
+
+def test_unusable_path_leaves_outbox_unavailable(tmp_path: Path) -> None:
+    (tmp_path / "file").write_text("x", encoding="utf-8")
+    outbox = Outbox(tmp_path / "file" / "outbox.sqlite3")
+    assert not outbox.available
+    assert outbox.enqueue("A", "text") is None
@@ -243,3 +243,292 @@ def test_processor_output_no_binary(monkeypatch):
     assert "PK" not in output
     assert "IDAT" not in output
     assert "Useful text" in output
+
+
+def test_processor_summarizes_attachments_concurrently(monkeypatch):
+    import threading
+    import time
+
+    barrier = threading.Barrier(3, timeout=2)
+
+    class ConcurrentSummarizer:
+        max_concurrency = 3
+
+        def __init__(self, _):
+            pass
+
+        def summarize_email(self, text: str) -> str:
+            barrier.wait()
+            return "Краткое резюме тела письма"
+
+        def summarize_attachment(self, text: str, kind: str = "PDF") -> str:
+            barrier.wait()
+            time.sleep(0.05 if kind == "PDF" else 0)
+            return f"Сводка вложения {text}"
+
+    monkeypatch.setattr(processor, "LLMSummarizer", ConcurrentSummarizer)
+
+    cfg = SimpleNamespace(llm_call=lambda x: "ok")
+    msg = InboundMessage(
+        subject="Subj",
+        sender="sender@example.com",
+        body="Основное содержимое письма.",
+        attachments=[
+            Attachment(filename="first.pdf", content=b"data", text="первое"),
+            Attachment(filename="second.xlsx", content=b"data", text="второе"),
+        ],
+        received_at=datetime(2024, 5, 5, 15, 0),
+    )
+
+    output = MessageProcessor(cfg, DummyState()).process("login", msg)
+    assert output is not None
+    assert output.index("first.pdf") < output.index("Сводка вложения первое")
+    assert output.index("Сводка вложения первое") < output.index("second.xlsx")
+    assert output.index("second.xlsx") < output.index("Сводка вложения второе")
+
+
+def test_processor_rejects_summary_not_backed_by_source(monkeypatch):
+    class DummySummarizer:
+        def __init__(self, _):
+            pass
+
+        def summarize_email(self, text: str) -> str:
+            return "Просим оплатить счет 123 на сумму 999000 рублей до 01.01.2099."
+
+        def summarize_attachment(self, text: str, kind: str = "PDF") -> str:
+            return "Счет 123 на сумму 150000 рублей, оплатить до 20.12.2024."
+
+    monkeypatch.setattr(processor, "LLMSummarizer", DummySummarizer)
+
+    cfg = SimpleNamespace(llm_call=lambda x: "ok", llm=SimpleNamespace(validate_summaries=True))
+    msg = InboundMessage(
+        subject="Счет",
+        sender="sender@example.com",
+        body="Просим оплатить счет 123 на сумму 150000 рублей до 20.12.2024. Реквизиты во вложении.",
+        attachments=[Attachment(filename="invoice.pdf", content=b"data", text="Счет 123. Итого 150000 рублей.")],
+        received_at=datetime(2024, 12, 1, 10, 0),
+    )
+
+    proc = MessageProcessor(cfg, DummyState())
+    output = proc.process("login", msg)
+    assert output is not None
+    assert "999000" not in output
+    assert "Счет 123 на сумму 150000 рублей, оплатить до 20.12.2024." in output
+    assert proc.validation_rejects == 1
+
+
+def test_outlook_reply_with_subject_line_keeps_new_text():
+    seen = []
+
+    class RecordingSummarizer:
+        def summarize_email(self, text: str) -> str:
+            seen.append(text)
+            return "Договор согласован."
+
+        def summarize_attachment(self, text: str, kind: str = "PDF") -> str:
+            return ""
+
+    msg = InboundMessage(
+        subject="RE: договор",
+        sender="partner@example.com",
+        body=(
+            "Тема: согласование договора\n"
+            "Согласны с правками, подпишем до пятницы.\n\n"
+            "From: Иванов Иван\n"
+            "Sent: Monday, March 3, 2025 10:00\n"
+            "To: Петров Петр\n"
+            "Subject: договор\n\n"
+            "Пришлите правки к договору."
+        ),
+    )
+
+    output = MessageProcessor(SimpleNamespace(llm_call=None), DummyState(), llm=RecordingSummarizer()).process(
+        "login", msg
+    )
+
+    assert seen == ["Тема: согласование договора\nСогласны с правками, подпишем до пятницы."]
+    assert "Договор согласован." in output
+
+
+def test_message_text_is_normalized_once(monkeypatch):
+    calls = []
+    original_sanitize = processor.sanitize_text
+
+    def counting_sanitize(text, max_len=8000):
+        calls.append(max_len)
+        return original_sanitize(text, max_len=max_len)
+
+    monkeypatch.setattr(processor, "sanitize_text", counting_sanitize)
+
+    msg = InboundMessage(
+        subject="Subj",
+        body="Текст   письма\r\n\r\n\r\nвторой абзац\nFrom: other@example.com\nSent: Monday\nстарое письмо",
+        attachments=[
+            Attachment(filename="a.pdf", content=b"", text="raw   text"),
+            Attachment(filename="b.pdf", content=b"", text="raw", normalized_text="уже готово"),
+        ],
+    )
+
+    assert msg.normalize() == "Текст письма\n\nвторой абзац"
+    assert msg.normalize() == "Текст письма\n\nвторой абзац"
+    assert [att.normalize() for att in msg.attachments] == ["raw text", "уже готово"]
+    assert msg.attachments[0].normalize() == "raw text"
+    assert calls == [processor.BODY_CHAR_LIMIT, processor.ATTACHMENT_CHAR_LIMIT]
+
+
+def test_processor_summarizes_only_new_reply_with_thread_context(monkeypatch, tmp_path):
+    from mailbot_v26.pipeline.threads import ThreadStore
+
+    seen = []
+
+    class DummySummarizer:
+        def __init__(self, _):
+            pass
+
+        def summarize_email(self, text: str, context: str = "") -> str:
+            seen.append((text, context))
+            return f"Итог письма номер {len(seen)}."
+
+        def summarize_attachment(self, text: str, kind: str = "PDF") -> str:
+            return ""
+
+    monkeypatch.setattr(processor, "LLMSummarizer", DummySummarizer)
+    store = ThreadStore(tmp_path / "threads.sqlite3")
+    proc = MessageProcessor(SimpleNamespace(llm_call=lambda x: "ok"), DummyState(), threads=store)
+
+    first = InboundMessage(subject="Договор", body="Пришлите, пожалуйста, договор.", message_id="<a@x>")
+    reply = InboundMessage(
+        subject="RE: Договор",
+        body=(
+            "Договор во вложении.\n\n"
+            "From: client@example.com\nSent: Monday\nTo: us@example.com\n"
+            "Пришлите, пожалуйста, договор."
+        ),
+        message_id="<b@x>",
+        in_reply_to="<a@x>",
+        references=["<a@x>"],
+    )
+    proc.process("login", first)
+    output = proc.process("login", reply)
+
+    assert seen[0] == ("Пришлите, пожалуйста, договор.", "")
+    assert seen[1] == ("Договор во вложении.", "Итог письма номер 1.")
+    assert "Итог письма номер 2." in output
+    assert store.lookup("<c@x>", in_reply_to="<b@x>").summary == "Итог письма номер 2."
+
+
+def test_processor_strips_boilerplate_by_sender_address(monkeypatch):
+    from mailbot_v26.pipeline.boilerplate import BoilerplateIndex
+
+    seen = []
+
+    class DummySummarizer:
+        def __init__(self, _):
+            pass
+
+        def summarize_email(self, text: str) -> str:
+            seen.append(text)
+            return "Краткое резюме письма."
+
+        def summarize_attachment(self, text: str, kind: str = "PDF") -> str:
+            return ""
+
+    monkeypatch.setattr(processor, "LLMSummarizer", DummySummarizer)
+    proc = MessageProcessor(
+        SimpleNamespace(llm_call=lambda x: "ok"), DummyState(), boilerplate=BoilerplateIndex(None, min_messages=2)
+    )
+    footer = "Настоящее сообщение содержит конфиденциальную информацию."
+    for idx in range(3):
+        proc.process(
+            "login",
+            InboundMessage(
+                subject="Счет",
+                sender="Иван Петров",
+                sender_address="ivan@corp.ru",
+                body=f"Счет {idx} во вложении.\n\n{footer}",
+                message_id=f"<{idx}@corp.ru>",
+            ),
+        )
+
+    assert seen[-1] == "Счет 2 во вложении."
+
+
+def test_processor_records_only_llm_summaries_as_thread_context(monkeypatch, tmp_path):
+    from mailbot_v26.pipeline.threads import ThreadStore
+
+    class FailingSummarizer:
+        def __init__(self, _):
+            pass
+
+        def summarize_email(self, text: str, context: str = "") -> str:
+            return ""
+
+        def summarize_attachment(self, text: str, kind: str = "PDF") -> str:
+            return ""
+
+    monkeypatch.setattr(processor, "LLMSummarizer", FailingSummarizer)
+    store = ThreadStore(tmp_path / "threads.sqlite3")
+    proc = MessageProcessor(SimpleNamespace(llm_call=lambda x: "ok"), DummyState(), threads=store)
+
+    output = proc.process("login", InboundMessage(subject="Тема", body="", message_id="<a@x>"))
+
+    assert "Содержание письма отсутствует." in output
+    reply = store.lookup("<b@x>", in_reply_to="<a@x>")
+    assert reply.thread_id == "<a@x>" and reply.summary == ""
+
+
+def test_long_mail_reaches_chunk_merge_and_budget_limit(tmp_path):
+    import random
+
+    from mailbot_v26.llm import prompts_ru
+    from mailbot_v26.llm.budget import TokenBudget
+    from mailbot_v26.llm.summarizer import LLMSummarizer
+    from mailbot_v26.state_manager import StateManager
+
+    prompts = []
+
+    def llm_call(prompt: str) -> str:
+        prompts.append(prompt)
+        return "Поставщик подтверждает отгрузку партии товара на склад заказчика."
+
+    def count(template: str) -> int:
+        head = template.strip().splitlines()[0]
+        return sum(1 for prompt in prompts if prompt.strip().startswith(head))
+
+    words = (
+        "поставка договор счет оплата склад товар партия срок акт сверка банк платеж заказчик "
+        "поставщик цена скидка услуга доставка претензия возврат качество упаковка маршрут "
+        "накладная график смета объем задержка штраф гарантия ремонт монтаж проект этап бюджет"
+    ).split()
+    rng = random.Random(1)
+
+    def lines(count: int) -> str:
+        # Varied sentences, so extractive condensing keeps most of them.
+        return "\n".join(
+            f"Пункт {idx}: " + " ".join(rng.choice(words) for _ in range(10)) + "." for idx in range(count)
+        )
+
+    # Production sizes: 1800-token chunks, inputs condensed to 8000 tokens.
+    summarizer = LLMSummarizer(llm_call, chunk_tokens=1800, extract_tokens=8000)
+    cfg = SimpleNamespace(llm_call=llm_call)
+    msg = InboundMessage(
+        subject="Отгрузка",
+        sender="sender@example.com",
+        body=lines(180),
+        attachments=[Attachment(filename="spec.pdf", content=b"", text=lines(400))],
+    )
+
+    MessageProcessor(cfg, DummyState(), llm=summarizer).process("login", msg)
+    assert count(prompts_ru.EMAIL_CHUNK) >= 3
+    assert count(prompts_ru.EMAIL_MERGE) >= 1
+    assert count(prompts_ru.ATTACHMENT_CHUNK_PDF) >= 5
+    # More summaries than the merge fan-in: a two-level merge tree.
+    assert count(prompts_ru.ATTACHMENT_MERGE) >= 2
+
+    budget = TokenBudget(StateManager(tmp_path / "state.json"), daily_limit=1000, reduced_max_chunks=2)
+    budget.state.add_tokens(250, login="login")
+    prompts.clear()
+    msg.normalized_body = None
+    MessageProcessor(cfg, DummyState(), llm=summarizer, budget=budget).process("login", msg)
+    assert count(prompts_ru.EMAIL_CHUNK) == 2
+    assert count(prompts_ru.ATTACHMENT_CHUNK_PDF) == 2
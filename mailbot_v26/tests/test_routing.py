@@ -0,0 +1,68 @@
+import threading
+
+from mailbot_v26.llm.cache import LLMResponseCache
+from mailbot_v26.llm.routing import ModelRouter
+from mailbot_v26.llm.summarizer import LLMSummarizer
+
+
+class _RecordingTransport:
+    accepts_options = True
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, prompt, model=None, max_tokens=None):
+        self.calls.append((model, prompt))
+        return f"summary from {model or 'default'}"
+
+
+def test_attachment_routes_fall_back_to_broader_routes():
+    router = ModelRouter("base", {"attachment": "docs", "chunk": "small"})
+    assert router.model_for("attachment.excel") == "docs"
+    assert ModelRouter("base", {"chunk": "small"}).model_for("attachment.pdf") == "small"
+    assert router.model_for("final") == "base"
+
+
+def test_summarizer_sends_each_stage_to_its_model(monkeypatch):
+    from mailbot_v26.llm import summarizer as summarizer_module
+
+    monkeypatch.setattr(summarizer_module, "iter_chunks_by_tokens", lambda text, max_tokens: ["one", "two"])
+    transport = _RecordingTransport()
+    router = ModelRouter("base", {"chunk": "small", "merge": "medium"})
+    summarizer = LLMSummarizer(transport, model="base", router=router)
+
+    summarizer.summarize_email("long email")
+
+    models = [model for model, _prompt in transport.calls]
+    assert models == ["small", "small", "medium", None]
+    stats = router.stats()
+    assert stats["chunk"]["calls"] == 2 and stats["chunk"]["model"] == "small"
+    assert stats["merge"]["calls"] == 1
+    assert stats["final"]["model"] == "base" and stats["final"]["failures"] == 0
+
+
+def test_cache_key_uses_stage_model(tmp_path):
+    cache = LLMResponseCache(tmp_path / "cache.sqlite3")
+    transport = _RecordingTransport()
+    LLMSummarizer(transport, cache=cache, model="base", router=ModelRouter("base", {"final": "large"})).summarize_email(
+        "short email"
+    )
+    prompt = transport.calls[0][1]
+    assert cache.get("large", prompt) == "summary from large"
+    assert cache.get("base", prompt) is None
+    cache.close()
+
+
+def test_waiting_for_a_slot_counts_as_queue_time_not_latency():
+    router = ModelRouter("base")
+    summarizer = LLMSummarizer(_RecordingTransport(), model="base", router=router)
+    summarizer._inflight.acquire()
+    releaser = threading.Timer(0.2, summarizer._inflight.release)
+    releaser.start()
+
+    summarizer.summarize_email("short email")
+    releaser.join()
+
+    final = router.stats()["final"]
+    assert final["avg_queue_ms"] >= 150
+    assert final["avg_latency_ms"] < final["avg_queue_ms"]
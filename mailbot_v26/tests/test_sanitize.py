@@ -35,3 +35,66 @@ def test_sanitize_handles_null_bytes():
     cleaned = sanitize_text(raw)
     assert "\x00" not in cleaned
     assert "Good" in cleaned
+
+
+def _reference_sanitize(text, max_len=8000):
+    """sanitize_text as it was before the single-pass rewrite."""
+    import re
+
+    markers = ("ihdr", "idat", "pk", "content_types", "=?koi8", "base64", "image/png", "zip")
+
+    def binaryish(data):
+        if not data:
+            return False
+        if "\x00" in data:
+            return True
+        lowered = data.lower()
+        if any(marker in lowered for marker in markers):
+            return True
+        if re.search(r"[A-Za-z0-9+/]{40,}={0,2}", data):
+            return True
+        non_printable = sum(1 for ch in data if not (ch.isprintable() or ch in "\n\r\t"))
+        return non_printable > 5 and non_printable > len(data) * 0.02
+
+    normalized = str(text).replace("\r\n", "\n").replace("\r", "\n").replace("\x00", "")
+    safe_lines = [line for line in (raw.strip("\ufeff") for raw in normalized.split("\n")) if not binaryish(line)]
+    collapsed = []
+    blank = False
+    for line in safe_lines:
+        compact = re.sub(r"\s+", " ", line).strip()
+        if not compact:
+            if blank:
+                continue
+            collapsed.append("")
+            blank = True
+            continue
+        collapsed.append(compact)
+        blank = False
+    cleaned = "\n".join(collapsed).strip()
+    if len(cleaned) > max_len:
+        return cleaned[: max_len - 3] + "..."
+    return cleaned
+
+
+def test_sanitize_matches_reference_output():
+    import random
+
+    rng = random.Random(26)
+    pieces = [
+        "Счет на оплату № 15", "Payment due 20.12.2024", "  spaced\t\tout  ", "", "", " ", "\ufeffBOM line",
+        "IHDR\x89PNG", "PK\x03\x04", "Zip archive", "Q" * 45 + "==", "\x0b\x0c\x1c\x1d\x1e\x1f\x85",
+        "non\xa0breaking spaces", "\x01\x02\x03\x04\x05\x06text", " sep ", "\r\n", "\r",
+        "\x00nul", "Итого: 125 000 руб.", "ſ KELVIN K", "-" * 30,
+    ]
+    for _ in range(400):
+        text = "\n".join(rng.choice(pieces) for _ in range(rng.randint(0, 40)))
+        for max_len in (0, 2, 3, 10, 57, 200, 8000):
+            assert sanitize_text(text, max_len=max_len) == _reference_sanitize(text, max_len=max_len)
+
+
+def test_sanitize_golden_output():
+    raw = "\ufeffДобрый день!\r\n\r\n\r\n  Счет   №15\tна 1 000 руб.\nIHDR junk\n\n" + "A" * 50 + "\nКонец"
+    assert sanitize_text(raw) == "Добрый день!\n\nСчет №15 на 1 000 руб.\n\nКонец"
+    assert sanitize_text(raw, max_len=20) == "Добрый день!\n\nСче..."
+    assert sanitize_text(b"bytes \xd0\xb8 text") == "bytes и text"
+    assert sanitize_text(None) == ""
@@ -0,0 +1,39 @@
+import builtins
+import importlib
+import sys
+
+from mailbot_v26.startup_profile import ImportProfiler
+
+
+def test_profiler_records_first_imports(tmp_path, monkeypatch):
+    (tmp_path / "profiled_outer.py").write_text("import profiled_inner\n", encoding="utf-8")
+    (tmp_path / "profiled_inner.py").write_text("VALUE = sum(range(1000))\n", encoding="utf-8")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    original_import = builtins.__import__
+
+    profiler = ImportProfiler().install()
+    try:
+        importlib.invalidate_caches()
+        __import__("profiled_outer")
+    finally:
+        profiler.uninstall()
+        sys.modules.pop("profiled_outer", None)
+        sys.modules.pop("profiled_inner", None)
+
+    assert builtins.__import__ is original_import
+    outer = profiler.records["profiled_outer"]
+    inner = profiler.records["profiled_inner"]
+    assert outer.cumulative >= inner.cumulative
+    assert outer.self_time <= outer.cumulative
+    report = profiler.report()
+    assert "profiled_outer" in report
+    assert "profiled_inner" in report
+
+
+def test_profiler_ignores_cached_modules():
+    profiler = ImportProfiler().install()
+    try:
+        __import__("json")
+    finally:
+        profiler.uninstall()
+    assert "json" not in profiler.records
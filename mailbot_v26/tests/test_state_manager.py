@@ -27,3 +27,14 @@ def test_llm_unavailable_flag(tmp_path: Path) -> None:
     reloaded = StateManager(tmp_path / "state.json")
     assert reloaded._state.llm.unavailable is True
     assert reloaded._state.llm.last_error == "maintenance"
+
+
+def test_tokens_tracked_per_account(tmp_path: Path) -> None:
+    manager = StateManager(tmp_path / "state.json")
+    manager.add_tokens(30, login="a@example.com")
+    manager.add_tokens(12)
+    manager.save(force=True)
+    reloaded = StateManager(tmp_path / "state.json")
+    assert reloaded.get_tokens_used_today("a@example.com") == 30
+    assert reloaded.get_tokens_used_today("b@example.com") == 0
+    assert reloaded.get_tokens_used_today() == 42
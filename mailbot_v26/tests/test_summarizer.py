@@ -25,3 +25,182 @@ def test_summarizer_attachment_fallback():
     result = summarizer.summarize_attachment(text, kind="PDF")
     assert result.startswith("data")
     assert len(result) <= 603
+
+
+def test_summarizer_chunks_run_concurrently_in_order(monkeypatch):
+    import threading
+    import time
+
+    from mailbot_v26.llm import summarizer as summarizer_module
+
+    chunks = [f"chunk-{idx}" for idx in range(6)]
+    monkeypatch.setattr(summarizer_module, "iter_chunks_by_tokens", lambda text, max_tokens: chunks)
+    active = {"now": 0, "peak": 0}
+    lock = threading.Lock()
+    prompts = []
+    # The first wave only gets through if three calls are in flight at once.
+    first_wave = threading.Barrier(3, timeout=5)
+
+    def slow_call(prompt: str) -> str:
+        prompts.append(prompt)
+        found = [chunk for chunk in chunks if chunk in prompt]
+        if len(found) != 1:
+            return "merged"
+        with lock:
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+        if chunks.index(found[0]) < 3:
+            first_wave.wait()
+        # later chunks finish first to prove ordering is restored
+        time.sleep(0.01 * (len(chunks) - chunks.index(found[0])))
+        with lock:
+            active["now"] -= 1
+        return f"summary of {found[0]}"
+
+    result = LLMSummarizer(slow_call, max_concurrency=3, merge_fan_in=6).summarize_attachment("text", kind="PDF")
+
+    assert result == "merged"
+    assert active["peak"] == 3
+    assert not first_wave.broken
+    merge_prompt = prompts[-1]
+    positions = [merge_prompt.index(f"summary of {chunk}") for chunk in chunks]
+    assert positions == sorted(positions)
+
+
+def test_short_email_uses_single_category_call():
+    prompts = []
+
+    def llm_call(prompt: str) -> str:
+        prompts.append(prompt)
+        return "Банк сообщает о списании комиссии."
+
+    summarizer = LLMSummarizer(llm_call)
+    result = summarizer.summarize_email("Банк уведомляет о списании комиссии за обслуживание.")
+
+    assert result == "Банк сообщает о списании комиссии."
+    assert len(prompts) == 1
+    assert "банковское письмо" in prompts[0]
+    assert "списании комиссии за обслуживание" in prompts[0]
+
+
+def test_long_email_keeps_chunk_merge_final():
+    prompts = []
+
+    def llm_call(prompt: str) -> str:
+        prompts.append(prompt)
+        return "Итог."
+
+    text = "Обычное письмо с подробностями проекта. " * 400
+    LLMSummarizer(llm_call).summarize_email(text)
+    chunk_calls = [p for p in prompts if "фрагмент делового письма" in p]
+    assert len(chunk_calls) > 1
+    assert len(prompts) == len(chunk_calls) + 2
+
+
+def test_single_chunk_attachment_skips_merge():
+    prompts = []
+
+    def llm_call(prompt: str) -> str:
+        prompts.append(prompt)
+        return "Счет на оплату поставки."
+
+    result = LLMSummarizer(llm_call).summarize_attachment("Счет № 15 на оплату поставки.", kind="PDF")
+    assert result == "Счет на оплату поставки."
+    assert len(prompts) == 1
+
+
+def test_long_attachment_merges_as_bounded_tree(monkeypatch):
+    from mailbot_v26.llm import summarizer as summarizer_module
+
+    chunks = [f"chunk-{idx}" for idx in range(10)]
+    monkeypatch.setattr(summarizer_module, "iter_chunks_by_tokens", lambda text, max_tokens: chunks)
+    merge_sizes = []
+
+    def llm_call(prompt: str) -> str:
+        if "Фрагменты:" in prompt:
+            items = prompt.split("Фрагменты:")[1].strip().splitlines()
+            merge_sizes.append(len(items))
+            return "merged " + "+".join(item.split()[-1] for item in items)
+        return "summary " + next(chunk for chunk in chunks if chunk in prompt)
+
+    result = LLMSummarizer(llm_call, max_concurrency=4, merge_fan_in=3).summarize_attachment("text")
+
+    assert merge_sizes and max(merge_sizes) <= 3
+    # 10 -> 4 -> 2 -> 1; a leftover single summary is carried up without a call
+    assert merge_sizes == [3, 3, 3, 3, 2]
+    assert result.startswith("merged")
+
+
+def test_tree_merge_failure_falls_back(monkeypatch):
+    from mailbot_v26.llm import summarizer as summarizer_module
+
+    monkeypatch.setattr(summarizer_module, "iter_chunks_by_tokens", lambda text, max_tokens: ["a1", "b2", "c3"])
+
+    def llm_call(prompt: str) -> str:
+        return "" if "Фрагменты:" in prompt else "часть документа"
+
+    result = LLMSummarizer(llm_call, merge_fan_in=2).summarize_attachment("Исходный текст вложения")
+    assert result == "Исходный текст вложения"
+
+
+def test_progressive_stops_once_invoice_facts_are_found(monkeypatch):
+    from mailbot_v26.llm import summarizer as summarizer_module
+
+    chunks = [
+        "Счет № INV-2041 на сумму 125 000 руб. Просим оплатить до 15.03.2025.",
+        "Приложение: спецификация товара, строка 1.",
+        "Приложение: спецификация товара, строка 2.",
+    ]
+    monkeypatch.setattr(summarizer_module, "iter_chunks_by_tokens", lambda text, max_tokens: iter(chunks))
+    prompts = []
+
+    def llm_call(prompt: str) -> str:
+        prompts.append(prompt)
+        return "Итог."
+
+    summarizer = LLMSummarizer(llm_call, progressive=True)
+    summarizer.summarize_email("Счет на оплату, оплатить до срока")
+
+    assert not any("спецификация" in prompt for prompt in prompts)
+    assert summarizer.early_stops == 1
+
+    prompts.clear()
+    LLMSummarizer(llm_call).summarize_email("Счет на оплату, оплатить до срока")
+    assert sum("спецификация" in prompt for prompt in prompts) == 2
+
+
+def test_progressive_reads_on_while_facts_are_missing(monkeypatch):
+    from mailbot_v26.llm import summarizer as summarizer_module
+
+    chunks = [
+        "Счет № INV-2041, просим оплатить.",
+        "Сумма к оплате 125 000 руб.",
+        "Срок оплаты 15.03.2025.",
+        "Реквизиты банка получателя.",
+    ]
+    monkeypatch.setattr(summarizer_module, "iter_chunks_by_tokens", lambda text, max_tokens: iter(chunks))
+    prompts = []
+
+    def llm_call(prompt: str) -> str:
+        prompts.append(prompt)
+        return "Итог."
+
+    summarizer = LLMSummarizer(llm_call, progressive=True)
+    summarizer.summarize_attachment("Счет на оплату", kind="PDF")
+
+    chunk_prompts = [prompt for prompt in prompts if any(chunk in prompt for chunk in chunks)]
+    assert len(chunk_prompts) == 3
+    assert not any("Реквизиты" in prompt for prompt in prompts)
+
+
+def test_thread_context_reaches_prompt_but_not_fallback():
+    prompts = []
+
+    def llm_call(prompt: str) -> str:
+        prompts.append(prompt)
+        return ""
+
+    result = LLMSummarizer(llm_call).summarize_email("Договор подписан.", context="Обсуждали правки договора.")
+    assert "Обсуждали правки договора." in prompts[0]
+    assert "Договор подписан." in prompts[0]
+    assert result == "Договор подписан."
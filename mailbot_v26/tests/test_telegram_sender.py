@@ -1,4 +1,5 @@
 import logging
+from functools import partial
 from types import SimpleNamespace
 
 import pytest
@@ -13,6 +14,16 @@ class DummyResponse:
         self.content = text.encode()
 
 
+@pytest.fixture(autouse=True)
+def _no_shared_clients(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(telegram_sender, "_CLIENTS", {})
+
+
+def _requests_with(post) -> SimpleNamespace:
+    """A stand-in ``requests`` module whose sessions post through ``post``."""
+    return SimpleNamespace(Session=lambda: SimpleNamespace(post=post, close=lambda: None))
+
+
 def test_send_telegram_empty_text_logs(caplog: pytest.LogCaptureFixture) -> None:
     with caplog.at_level(logging.ERROR):
         assert telegram_sender.send_telegram("token", "chat", "") is False
@@ -28,7 +39,7 @@ def test_send_telegram_success(monkeypatch: pytest.MonkeyPatch) -> None:
         called["timeout"] = timeout
         return DummyResponse(status_code=200, text="ok")
 
-    monkeypatch.setattr(telegram_sender, "requests", SimpleNamespace(post=fake_post))
+    monkeypatch.setattr(telegram_sender, "requests", _requests_with(fake_post))
     assert telegram_sender.send_telegram("token", "123", "hello") is True
     assert called["json"]["text"] == "hello"
     assert called["json"]["chat_id"] == "123"
@@ -39,7 +50,7 @@ def test_send_telegram_non_200_logs(monkeypatch: pytest.MonkeyPatch, caplog: pyt
     monkeypatch.setattr(
         telegram_sender,
         "requests",
-        SimpleNamespace(post=lambda url, json, timeout: DummyResponse(status_code=401, text="bad")),
+        _requests_with(lambda url, json, timeout: DummyResponse(status_code=401, text="bad")),
     )
     with caplog.at_level(logging.ERROR):
         assert telegram_sender.send_telegram("token", "123", "hello") is False
@@ -51,7 +62,7 @@ def test_send_telegram_exception(monkeypatch: pytest.MonkeyPatch, caplog: pytest
     def raising_post(url: str, json: dict, timeout: int) -> DummyResponse:
         raise RuntimeError("network error")
 
-    monkeypatch.setattr(telegram_sender, "requests", SimpleNamespace(post=raising_post))
+    monkeypatch.setattr(telegram_sender, "requests", _requests_with(raising_post))
     with caplog.at_level(logging.ERROR):
         assert telegram_sender.send_telegram("token", "123", "hello") is False
     assert "network error" in caplog.text
@@ -62,3 +73,96 @@ def test_send_telegram_requests_missing(monkeypatch: pytest.MonkeyPatch, caplog:
     with caplog.at_level(logging.ERROR):
         assert telegram_sender.send_telegram("token", "123", "hello") is False
     assert "requests module not available" in caplog.text
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_client_retries_429_after_server_delay() -> None:
+    answers = [
+        DummyResponse(status_code=429, text='{"ok": false, "parameters": {"retry_after": 7}}'),
+        DummyResponse(status_code=200),
+    ]
+    clock = FakeClock()
+    client = telegram_sender.TelegramClient(
+        "token", post=lambda url, json, timeout: answers.pop(0), clock=clock, sleep=clock.sleep
+    )
+
+    assert client.send("123", "hello") is True
+    assert clock.now == pytest.approx(7.0)
+    assert client.rate_limited == 1 and client.sent == 1
+
+
+def test_client_paces_bursts() -> None:
+    posted = []
+
+    def post(url: str, json: dict, timeout: float) -> DummyResponse:
+        posted.append(json["text"])
+        return DummyResponse(status_code=200)
+
+    clock = FakeClock()
+    client = telegram_sender.TelegramClient("token", post=post, clock=clock, sleep=clock.sleep)
+
+    assert all(client.send("123", f"m{idx}") for idx in range(6))
+    assert all(client.send("-100500", f"g{idx}") for idx in range(4))
+
+    assert len(posted) == 10
+    # Private chat: no burst, one per second (5 s). Group: a burst of 3,
+    # then 20 per minute, so the 4th waits another 3 s.
+    assert clock.now == pytest.approx(8.0)
+
+
+def test_client_owns_one_session(monkeypatch: pytest.MonkeyPatch) -> None:
+    sessions = []
+
+    class FakeSession:
+        def __init__(self) -> None:
+            self.closed = False
+            sessions.append(self)
+
+        def post(self, url: str, json: dict, timeout: float) -> DummyResponse:
+            return DummyResponse(status_code=200)
+
+        def close(self) -> None:
+            self.closed = True
+
+    monkeypatch.setattr(telegram_sender, "requests", SimpleNamespace(Session=FakeSession))
+    client = telegram_sender.TelegramClient("token", sleep=lambda _s: None)
+    assert client.send("-1", "a") and client.send("-1", "b")
+    client.close()
+
+    assert len(sessions) == 1 and sessions[0].closed
+
+
+def test_send_telegram_reuses_one_client_per_token(monkeypatch: pytest.MonkeyPatch) -> None:
+    sessions = []
+
+    def session() -> SimpleNamespace:
+        sessions.append(1)
+        return SimpleNamespace(post=lambda url, json, timeout: DummyResponse(), close=lambda: None)
+
+    monkeypatch.setattr(telegram_sender, "requests", SimpleNamespace(Session=session))
+    clock = FakeClock()
+    monkeypatch.setattr(
+        telegram_sender, "TelegramClient", partial(telegram_sender.TelegramClient, clock=clock, sleep=clock.sleep)
+    )
+
+    assert telegram_sender.send_telegram("token", "123", "a")
+    assert telegram_sender.send_telegram("token", "123", "b")
+
+    assert len(sessions) == 1
+    # The second message waited for the private chat's bucket.
+    assert clock.now == pytest.approx(1.0)
+    client = telegram_sender.shared_client("token")
+    client.close()
+    assert telegram_sender.shared_client("token") is not client
@@ -0,0 +1,51 @@
+from pathlib import Path
+
+from mailbot_v26.pipeline.threads import ThreadStore
+
+
+def test_thread_store_links_replies_and_survives_restart(tmp_path: Path) -> None:
+    path = tmp_path / "threads.sqlite3"
+    store = ThreadStore(path)
+    root = store.lookup("<a@x>")
+    assert root.thread_id == "<a@x>" and root.summary == ""
+    store.record("<a@x>", root.thread_id, "Запрос счета на поставку.")
+    store.close()
+
+    store = ThreadStore(path)
+    reply = store.lookup("<b@x>", in_reply_to="<a@x>", references=["<a@x>"])
+    assert reply.thread_id == "<a@x>"
+    assert reply.summary == "Запрос счета на поставку."
+    store.record("<b@x>", reply.thread_id, "Счет выставлен.")
+
+    # A reply to the reply, referencing an unknown message in between.
+    later = store.lookup("<d@x>", in_reply_to="<c@x>", references=["<a@x>", "<b@x>", "<c@x>"])
+    assert later.thread_id == "<a@x>"
+    assert later.summary == "Счет выставлен."
+    assert store.stats() == {"hits": 2, "misses": 0, "threads": 1}
+
+
+def test_thread_store_unknown_reply_and_bounds(tmp_path: Path) -> None:
+    store = ThreadStore(tmp_path / "threads.sqlite3", max_messages=2)
+    unknown = store.lookup("<z@x>", in_reply_to="<y@x>", references=["<root@x>", "<y@x>"])
+    assert unknown.thread_id == "<root@x>" and unknown.summary == ""
+
+    for idx in range(3):
+        store.record(f"<m{idx}@x>", f"<t{idx}@x>", f"summary {idx}")
+    assert store.lookup("<r@x>", in_reply_to="<m0@x>").summary == ""
+    assert store.lookup("<r@x>", in_reply_to="<m2@x>").summary == "summary 2"
+    assert store.stats()["threads"] == 2
+
+    expired = ThreadStore(tmp_path / "expired.sqlite3", ttl_seconds=-1)
+    expired.record("<a@x>", "<a@x>", "old")
+    assert expired.lookup("<b@x>", in_reply_to="<a@x>").summary == ""
+
+
+def test_already_recorded_message_gets_no_context(tmp_path: Path) -> None:
+    store = ThreadStore(tmp_path / "threads.sqlite3")
+    store.record("<a@x>", "<a@x>", "Запрос счета.")
+    assert store.lookup("<b@x>", in_reply_to="<a@x>").summary == "Запрос счета."
+    store.record("<b@x>", "<a@x>", "Счет выставлен.")
+
+    # The same reply again, e.g. delivered to a second mailbox.
+    again = store.lookup("<b@x>", in_reply_to="<a@x>")
+    assert again.thread_id == "<a@x>" and again.summary == ""
@@ -0,0 +1,40 @@
+from mailbot_v26.llm import prompts_ru
+from mailbot_v26.llm.summarizer import LLMSummarizer
+from mailbot_v26.llm.triggers import TriggerMatcher
+
+
+def test_best_scoring_category_wins_over_dict_order():
+    matcher = TriggerMatcher(prompts_ru.TRIGGERS)
+    text = "Приглашаем на встречу в zoom, повестка (agenda) и ссылка на созвон во вложении. Ответьте до пятницы."
+    assert matcher.best(text) == "MEETING"
+
+
+def test_short_triggers_need_whole_words_and_stems_match_word_starts():
+    matcher = TriggerMatcher({"DEADLINE": ["до"], "SPAM": ["скидк"], "COURT": ["иск"]})
+    assert matcher.scan("документы и дом") == {}
+    assert matcher.scan("оцените риск") == {}
+    assert matcher.best("Большие скидки") == "SPAM"
+    assert matcher.scan("оплатить до 1 мая")["DEADLINE"].hits["до"] == 1
+
+
+def test_phrases_match_across_whitespace_and_outweigh_single_words():
+    matcher = TriggerMatcher({"A": ["срок"], "B": ["крайний срок"]})
+    scores = matcher.scan("Крайний\n  срок сдачи, срок")
+    assert scores["B"].hits["крайний срок"] == 1
+    assert scores["B"].score > scores["A"].score
+    assert matcher.best("Крайний\n  срок сдачи, срок") == "B"
+
+
+def test_no_hits_fall_back_to_generic():
+    assert TriggerMatcher(prompts_ru.TRIGGERS).best("Коллеги, кофемашину починили.") == "GENERIC"
+
+
+def test_summarizer_uses_scored_category_prompt():
+    prompts = []
+
+    def llm(prompt: str) -> str:
+        prompts.append(prompt)
+        return "Итог."
+
+    LLMSummarizer(llm).summarize_email("Налоговая инспекция ФНС направила требование по НДС, штраф и пени.")
+    assert "налогового органа" in prompts[0]
@@ -0,0 +1,22 @@
+from mailbot_v26.bot_core.validation import FactIndex, validate_summary
+
+
+def test_fact_index_normalizes_numbers_and_dates():
+    index = FactIndex("Сумма 150 000,50 руб.", "Оплатить до 20/12/2024 по счету №123.")
+
+    assert index.has_number("150000.50")
+    assert index.has_number("123")
+    assert not index.has_number("999")
+    assert index.has_date("20.12.2024")
+    assert not index.has_date("21.12.2024")
+
+
+def test_validate_summary_accepts_index_and_text_alike():
+    original = "Просим оплатить счёт №123 на сумму 150000 рублей до 20.12.2024"
+    good = "СУММА: 150000 | СРОК: 20.12.2024 | ДОКУМЕНТ: №123"
+    bad = "СУММА: 999000 | СРОК: 20.12.2024 | ДОКУМЕНТ: №123"
+    index = FactIndex(original)
+
+    assert validate_summary(good, index) == validate_summary(good, original) == good
+    assert validate_summary(bad, index) is None
+    assert validate_summary("Совещание перенесено на пятницу", index) is None
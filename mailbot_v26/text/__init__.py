@@ -1,4 +1,4 @@
 from mailbot_v26.text.sanitize import sanitize_text, is_binaryish
-from mailbot_v26.text.clean_email import clean_email_body
+from mailbot_v26.text.clean_email import clean_email_body, latest_reply, strip_signature
 
-__all__ = ["sanitize_text", "clean_email_body", "is_binaryish"]
+__all__ = ["sanitize_text", "clean_email_body", "is_binaryish", "latest_reply", "strip_signature"]
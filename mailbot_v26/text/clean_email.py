@@ -21,6 +21,24 @@ SIGNATURE_MARKERS = (
     "regards,",
 )
 
+# Where the quoted history of a reply starts.
+_QUOTE_SEPARATOR_RE = re.compile(
+    r"^\s*(?:-{2,}\s*(?:original message|forwarded message|исходное сообщение|"
+    r"пересылаемое сообщение|пересланное сообщение)\s*-{2,}|_{10,})\s*$",
+    re.IGNORECASE,
+)
+_QUOTE_ATTRIBUTION_RE = re.compile(
+    r"^\s*(?:on\s.+\swrote:|.+\s(?:пишет|написал|написала|написал\(а\)):)\s*$",
+    re.IGNORECASE,
+)
+_QUOTE_HEADER_RE = re.compile(
+    r"^\s*\*?(from|sent|date|to|cc|subject|от|отправлено|дата|кому|копия|тема)\*?\s*:",
+    re.IGNORECASE,
+)
+_QUOTE_FROM = {"from", "от"}
+# An Outlook header block: "From:" and another header within this many lines.
+_HEADER_BLOCK_LINES = 4
+
 
 def _to_str(text: Any) -> str:
     if text is None:
@@ -79,4 +97,49 @@ def clean_email_body(text: Any) -> str:
     return result
 
 
-__all__ = ["clean_email_body"]
+def latest_reply(text: Any) -> str:
+    """Only the newest message of a reply chain.
+
+    Cuts at the quoted history: an "Original Message" separator, an
+    "On ... wrote:" attribution or an Outlook header block ("From:" followed
+    by "Sent:"/"To:"/... lines). A lone "From:" or "Тема:" line in the new
+    text does not count as a header block. Lines quoted with ">" are
+    dropped. Returns an empty string when nothing new is left.
+    """
+    try:
+        lines = _to_str(text).replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    except Exception:
+        return ""
+
+    kept: list[str] = []
+    for idx, line in enumerate(lines):
+        if _QUOTE_SEPARATOR_RE.match(line) or _QUOTE_ATTRIBUTION_RE.match(line):
+            break
+        header = _QUOTE_HEADER_RE.match(line)
+        if header and header.group(1).lower() in _QUOTE_FROM:
+            following = lines[idx + 1 : idx + 1 + _HEADER_BLOCK_LINES]
+            if any(_QUOTE_HEADER_RE.match(other) for other in following):
+                break
+        if line.lstrip().startswith(">"):
+            continue
+        kept.append(line)
+
+    return "\n".join(kept).strip()
+
+
+def strip_signature(text: Any) -> str:
+    """Text up to the first signature line ("--", "С уважением," ...)."""
+    try:
+        lines = _to_str(text).replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    except Exception:
+        return ""
+
+    kept: list[str] = []
+    for line in lines:
+        if _is_signature_start(line):
+            break
+        kept.append(line)
+    return "\n".join(kept).strip()
+
+
+__all__ = ["clean_email_body", "latest_reply", "strip_signature"]
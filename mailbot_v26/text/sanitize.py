@@ -16,6 +16,8 @@ BINARY_MARKERS = (
 )
 
 BASE64_RUN = re.compile(r"[A-Za-z0-9+/]{40,}={0,2}")
+# One scan of the lowercased line instead of one per marker.
+_MARKERS_RE = re.compile("|".join(re.escape(marker) for marker in BINARY_MARKERS))
 
 
 def _to_str(text: Any) -> str:
@@ -32,6 +34,22 @@ def _to_str(text: Any) -> str:
         return ""
 
 
+def _is_binary_line(line: str) -> bool:
+    """``is_binaryish`` for text that is already known to hold no NUL."""
+    if _MARKERS_RE.search(line.lower()):
+        return True
+
+    if BASE64_RUN.search(line):
+        return True
+
+    # Fast path: nearly every real line is printable as a whole.
+    visible = line.replace("\t", "").replace("\n", "").replace("\r", "")
+    if visible.isprintable():
+        return False
+    non_printable = sum(1 for ch in visible if not ch.isprintable())
+    return non_printable > 5 and non_printable > len(line) * 0.02
+
+
 def is_binaryish(text: str) -> bool:
     data = _to_str(text)
     if not data:
@@ -40,21 +58,16 @@ def is_binaryish(text: str) -> bool:
     if "\x00" in data:
         return True
 
-    lowered = data.lower()
-    if any(marker in lowered for marker in BINARY_MARKERS):
-        return True
-
-    if BASE64_RUN.search(data):
-        return True
-
-    non_printable = sum(1 for ch in data if not (ch.isprintable() or ch in "\n\r\t"))
-    if non_printable > 5 and non_printable > len(data) * 0.02:
-        return True
-
-    return False
+    return _is_binary_line(data)
 
 
 def sanitize_text(text: Any, max_len: int = 8000) -> str:
+    """Drop binary-looking lines, collapse whitespace and cap at ``max_len``.
+
+    Lines are processed in order and the scan stops as soon as the output
+    is known to exceed ``max_len``, so a long extracted PDF costs only as
+    much as the part that survives the cut.
+    """
     try:
         normalized = _to_str(text)
         normalized = normalized.replace("\r\n", "\n").replace("\r", "\n")
@@ -62,27 +75,31 @@ def sanitize_text(text: Any, max_len: int = 8000) -> str:
     except Exception:
         return ""
 
-    safe_lines: list[str] = []
+    parts: list[str] = []
+    size = 0
+    blank = False
+    # With max_len < 3 the cut below slices from the end; read everything.
+    limit = max_len if max_len >= 3 else -1
     for raw_line in normalized.split("\n"):
         line = raw_line.strip("\ufeff")
-        if is_binaryish(line):
+        if line and _is_binary_line(line):
             continue
-        safe_lines.append(line)
-
-    collapsed: list[str] = []
-    blank = False
-    for line in safe_lines:
-        compact = re.sub(r"\s+", " ", line).strip()
+        compact = " ".join(line.split())
         if not compact:
-            if blank:
-                continue
-            collapsed.append("")
             blank = True
             continue
-        collapsed.append(compact)
+        if parts:
+            # Runs of empty lines collapse to one; leading/trailing ones go.
+            separator = "\n\n" if blank else "\n"
+            parts.append(separator)
+            size += len(separator)
         blank = False
+        parts.append(compact)
+        size += len(compact)
+        if 0 <= limit < size:
+            break
 
-    cleaned = "\n".join(collapsed).strip()
+    cleaned = "".join(parts)
     if len(cleaned) > max_len:
         return cleaned[: max_len - 3] + "..."
     return cleaned
@@ -0,0 +1,267 @@
+"""Durable outbox for Telegram deliveries.
+
+Finished summaries are written to a small SQLite queue next to
+``state.json`` and the processing loop moves on at once. A background
+``DeliveryWorker`` sends them: per chat strictly in queue order (only the
+oldest pending message of a chat is ever attempted), failed sends are
+retried with exponential backoff, and everything survives a restart, so
+a summary is never computed twice because Telegram was slow or down.
+
+A message is parked as ``dead`` (kept in the table for inspection) as
+soon as the sender reports a failure that cannot be fixed by retrying
+(bad request, bot blocked, chat not found), so one undeliverable text
+does not hold back the rest of its chat. Temporary failures (network,
+5xx, 429) never park a message: it is retried every ``max_delay`` for as
+long as the outage lasts, and goes out once Telegram is back.
+"""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+DEFAULT_OUTBOX_PATH = Path(__file__).resolve().parent.parent / "outbox.sqlite3"
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        chat_id TEXT NOT NULL,
+        text TEXT NOT NULL,
+        account TEXT NOT NULL DEFAULT '',
+        uid TEXT NOT NULL DEFAULT '',
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at REAL NOT NULL,
+        created_at REAL NOT NULL,
+        last_error TEXT NOT NULL DEFAULT ''
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS outbox_pending ON outbox(status, chat_id, id)",
+)
+
+
+@dataclass
+class OutboxItem:
+    id: int
+    chat_id: str
+    text: str
+    account: str
+    uid: str
+    attempts: int
+
+
+class Outbox:
+    """Thread-safe SQLite queue of messages waiting for delivery."""
+
+    def __init__(self, path: Path = DEFAULT_OUTBOX_PATH) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            for statement in _SCHEMA:
+                self._conn.execute(statement)
+        except (OSError, sqlite3.Error) as exc:
+            logger.error("Outbox unavailable: %s", exc)
+            self._conn = None
+
+    @property
+    def available(self) -> bool:
+        return self._conn is not None
+
+    def enqueue(self, chat_id: str, text: str, account: str = "", uid: str = "") -> Optional[int]:
+        """Queue ``text`` for ``chat_id``; ``None`` when it could not be stored."""
+        now = time.time()
+        with self._lock:
+            if self._conn is None:
+                return None
+            try:
+                cursor = self._conn.execute(
+                    "INSERT INTO outbox (chat_id, text, account, uid, next_attempt_at, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (str(chat_id), text, account, str(uid), now, now),
+                )
+                return cursor.lastrowid
+            except sqlite3.Error as exc:
+                logger.error("Outbox write failed: %s", exc)
+                return None
+
+    def due(self, now: Optional[float] = None) -> List[OutboxItem]:
+        """Oldest pending message of every chat whose retry time has come."""
+        now = time.time() if now is None else now
+        with self._lock:
+            if self._conn is None:
+                return []
+            try:
+                rows = self._conn.execute(
+                    "SELECT o.id, o.chat_id, o.text, o.account, o.uid, o.attempts, o.next_attempt_at FROM outbox o "
+                    "JOIN (SELECT MIN(id) AS id FROM outbox WHERE status = 'pending' GROUP BY chat_id) head "
+                    "ON head.id = o.id ORDER BY o.id"
+                ).fetchall()
+            except sqlite3.Error as exc:
+                logger.error("Outbox read failed: %s", exc)
+                return []
+        return [OutboxItem(*row[:6]) for row in rows if row[6] <= now]
+
+    def next_due_in(self, now: Optional[float] = None) -> Optional[float]:
+        """Seconds until some chat head is due; ``None`` when nothing is pending."""
+        now = time.time() if now is None else now
+        with self._lock:
+            if self._conn is None:
+                return None
+            try:
+                (earliest,) = self._conn.execute(
+                    "SELECT MIN(o.next_attempt_at) FROM outbox o "
+                    "JOIN (SELECT MIN(id) AS id FROM outbox WHERE status = 'pending' GROUP BY chat_id) head "
+                    "ON head.id = o.id"
+                ).fetchone()
+            except sqlite3.Error:
+                return None
+        return None if earliest is None else max(0.0, earliest - now)
+
+    def mark_sent(self, item_id: int) -> None:
+        self._execute("DELETE FROM outbox WHERE id = ?", (item_id,))
+
+    def mark_failed(self, item_id: int, error: str, retry_in: float) -> None:
+        self._execute(
+            "UPDATE outbox SET attempts = attempts + 1, last_error = ?, next_attempt_at = ? WHERE id = ?",
+            (error, time.time() + retry_in, item_id),
+        )
+
+    def mark_dead(self, item_id: int, error: str) -> None:
+        self._execute(
+            "UPDATE outbox SET attempts = attempts + 1, last_error = ?, status = 'dead' WHERE id = ?",
+            (error, item_id),
+        )
+
+    def _execute(self, sql: str, params: tuple) -> None:
+        with self._lock:
+            if self._conn is None:
+                return
+            try:
+                self._conn.execute(sql, params)
+            except sqlite3.Error as exc:
+                logger.error("Outbox update failed: %s", exc)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            if self._conn is None:
+                return {"pending": 0, "dead": 0}
+            try:
+                counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall())
+            except sqlite3.Error:
+                counts = {}
+        return {"pending": counts.get("pending", 0), "dead": counts.get("dead", 0)}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class DeliveryWorker:
+    """Background thread draining an ``Outbox`` through ``send(chat_id, text)``.
+
+    ``send`` returns a truthy value on success. A falsy result with
+    ``retriable=False`` (``telegram_sender.SendResult``) parks the message
+    at once; exceptions and plain ``False`` are retried.
+    """
+
+    def __init__(
+        self,
+        outbox: Outbox,
+        send: Callable[[str, str], Any],
+        base_delay: float = 5.0,
+        max_delay: float = 600.0,
+        idle_wait: float = 30.0,
+    ) -> None:
+        self.outbox = outbox
+        self.send = send
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.idle_wait = idle_wait
+        self.delivered = 0
+        self.failed = 0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "DeliveryWorker":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="mailbot-delivery", daemon=True)
+            self._thread.start()
+        return self
+
+    def notify(self) -> None:
+        """Wake the worker after an enqueue."""
+        self._wake.set()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def backoff(self, attempts: int) -> float:
+        # Capped exponent: attempts keep growing through a long outage.
+        return min(self.max_delay, self.base_delay * (2 ** min(attempts, 30)))
+
+    def run_once(self) -> int:
+        """One pass over the due chat heads; returns how many were sent."""
+        sent = 0
+        for item in self.outbox.due():
+            if self._stop.is_set():
+                break
+            try:
+                result = self.send(item.chat_id, item.text)
+                ok = bool(result)
+                retriable = getattr(result, "retriable", True)
+                error = "" if ok else getattr(result, "error", "") or "send failed"
+            except Exception as exc:
+                ok, retriable, error = False, True, str(exc)
+            if ok:
+                self.outbox.mark_sent(item.id)
+                self.delivered += 1
+                sent += 1
+                logger.info("UID %s: Telegram OK", item.uid)
+            elif not retriable:
+                self.outbox.mark_dead(item.id, error)
+                self.failed += 1
+                logger.error("UID %s: Telegram rejected the message, not retrying: %s", item.uid, error)
+            else:
+                delay = self.backoff(item.attempts)
+                self.outbox.mark_failed(item.id, error, delay)
+                self.failed += 1
+                logger.warning(
+                    "UID %s: Telegram FAIL (attempt %d), retry in %.0fs", item.uid, item.attempts + 1, delay
+                )
+        return sent
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            # Cleared before the pass so an enqueue during it is not missed.
+            self._wake.clear()
+            try:
+                if self.run_once():
+                    # Progress: the next message of the same chats may be due.
+                    continue
+                wait = self.outbox.next_due_in()
+            except Exception:
+                logger.exception("Delivery worker error")
+                wait = self.idle_wait
+            self._wake.wait(self.idle_wait if wait is None else min(wait, self.idle_wait))
+
+
+__all__ = ["DEFAULT_OUTBOX_PATH", "DeliveryWorker", "Outbox", "OutboxItem"]
@@ -1,4 +1,29 @@
+"""Telegram delivery: a pooled, rate-limited client per bot token.
+
+``TelegramClient`` posts through a keep-alive ``requests.Session`` (or the
+``post`` callable it is given) and paces sends with token buckets matching
+Telegram's limits: about 30 messages per second overall, one per second in
+a private chat and 20 per minute in a group (negative chat id). A burst
+therefore goes out at the highest allowed rate instead of hitting 429
+halfway. When Telegram still answers 429, the client waits the
+``retry_after`` it was given, holds back that chat meanwhile, and tries
+again.
+
+``deliver`` also tells whether a failure is worth retrying: a 400, 403
+or 404 (bad request, bot blocked, chat not found) will fail the same way
+again, while network errors, 5xx and exhausted 429 retries may not.
+
+There is one client per bot token for the whole process
+(``shared_client``): the bot and ``send_telegram``, the helper for other
+callers that never raises, share its session and rate limits.
+"""
+
+import json
 import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
 
 try:
     import requests
@@ -7,6 +32,222 @@ except Exception:
 
 log = logging.getLogger(__name__)
 
+API_URL = "https://api.telegram.org/bot{token}/sendMessage"
+GLOBAL_RATE = 30.0
+PRIVATE_CHAT_RATE = 1.0
+GROUP_CHAT_RATE = 20.0 / 60.0
+# Private chats allow no burst above one message per second.
+PRIVATE_CHAT_BURST = 1.0
+GROUP_CHAT_BURST = 3.0
+MAX_429_RETRIES = 3
+MAX_RETRY_AFTER = 60.0
+MAX_CHAT_BUCKETS = 1000
+# Answers that mean this message will never be accepted as it is.
+PERMANENT_STATUSES = {400, 403, 404}
+
+
+class TokenBucket:
+    """Blocking token bucket: ``rate`` tokens per second, up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: float, clock=time.monotonic, sleep=time.sleep) -> None:
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """Take one token, sleeping as needed; returns the time waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._refill(now)
+                if now >= self._blocked_until and self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return waited
+                delay = max(self._blocked_until - now, (1.0 - self._tokens) / self.rate)
+            self._sleep(delay)
+            waited += delay
+
+    def block(self, seconds: float) -> None:
+        """Hold every taker back for ``seconds`` (server-side backoff)."""
+        with self._lock:
+            now = self._clock()
+            self._blocked_until = max(self._blocked_until, now + seconds)
+            self._refill(now)
+            self._tokens = 0.0
+
+    def idle(self) -> bool:
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            return self._tokens >= self.capacity and now >= self._blocked_until
+
+
+@dataclass
+class SendResult:
+    ok: bool
+    # False when sending the same message again cannot succeed.
+    retriable: bool = True
+    error: str = ""
+
+    def __bool__(self) -> bool:
+        return self.ok
+
+
+def _retry_after(resp: Any) -> Optional[float]:
+    """Delay requested by a 429 answer, from the JSON body or the header."""
+    try:
+        payload = resp.json()
+    except Exception:
+        try:
+            payload = json.loads(getattr(resp, "text", "") or "{}")
+        except ValueError:
+            payload = {}
+    parameters = payload.get("parameters") if isinstance(payload, dict) else None
+    value = parameters.get("retry_after") if isinstance(parameters, dict) else None
+    if value is None:
+        value = (getattr(resp, "headers", None) or {}).get("Retry-After")
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class TelegramClient:
+    """Keep-alive, rate-limited ``sendMessage`` client for one bot token.
+
+    ``post(url, json=..., timeout=...)`` defaults to the ``post`` of a
+    ``requests.Session`` owned (and closed) by the client.
+    """
+
+    def __init__(
+        self,
+        bot_token: str,
+        post: Optional[Callable[..., Any]] = None,
+        timeout: float = 15.0,
+        global_rate: float = GLOBAL_RATE,
+        max_retries: int = MAX_429_RETRIES,
+        clock=time.monotonic,
+        sleep=time.sleep,
+    ) -> None:
+        self.bot_token = bot_token
+        self.url = API_URL.format(token=bot_token)
+        self.timeout = timeout
+        self.max_retries = max(0, max_retries)
+        self.sent = 0
+        self.rate_limited = 0
+        self._clock = clock
+        self._sleep = sleep
+        self._global = TokenBucket(global_rate, global_rate, clock, sleep)
+        self._chats: Dict[str, TokenBucket] = {}
+        self._chats_lock = threading.Lock()
+        self._session: Any = None
+        if post is None and requests:
+            self._session = requests.Session()
+            post = self._session.post
+        self._post = post
+
+    def _chat_bucket(self, chat_id: str) -> TokenBucket:
+        with self._chats_lock:
+            bucket = self._chats.get(chat_id)
+            if bucket is None:
+                if len(self._chats) >= MAX_CHAT_BUCKETS:
+                    # Forget chats whose buckets are full again; they behave
+                    # exactly like new ones.
+                    for key in [key for key, value in self._chats.items() if value.idle()]:
+                        del self._chats[key]
+                if str(chat_id).startswith("-"):
+                    rate, burst = GROUP_CHAT_RATE, GROUP_CHAT_BURST
+                else:
+                    rate, burst = PRIVATE_CHAT_RATE, PRIVATE_CHAT_BURST
+                bucket = self._chats[chat_id] = TokenBucket(rate, burst, self._clock, self._sleep)
+            return bucket
+
+    def send(self, chat_id: str, text: str) -> bool:
+        """Send ``text``; waits for rate limits and 429 backoff. Never raises."""
+        return self.deliver(chat_id, text).ok
+
+    def deliver(self, chat_id: str, text: str) -> SendResult:
+        """Like ``send``, with the reason of a failure and whether to retry."""
+        if self._post is None:
+            log.error("Telegram send failed: requests module not available")
+            return SendResult(False, error="requests module not available")
+
+        if not self.bot_token or not chat_id or not text:
+            log.error("Telegram send failed: empty token, chat_id or text")
+            return SendResult(False, retriable=bool(chat_id and text), error="empty token, chat_id or text")
+
+        chat_key = str(chat_id)
+        chat_bucket = self._chat_bucket(chat_key)
+        payload = {
+            "chat_id": chat_id,
+            "text": text,
+            "disable_web_page_preview": True,
+        }
+        for attempt in range(self.max_retries + 1):
+            chat_bucket.acquire()
+            self._global.acquire()
+            try:
+                resp = self._post(self.url, json=payload, timeout=self.timeout)
+            except Exception as exc:
+                log.error("Telegram send exception: %s", exc)
+                return SendResult(False, error=str(exc))
+
+            if resp.status_code == 200:
+                self.sent += 1
+                return SendResult(True)
+
+            if resp.status_code == 429 and attempt < self.max_retries:
+                self.rate_limited += 1
+                delay = min(MAX_RETRY_AFTER, _retry_after(resp) or 1.0)
+                log.warning("Telegram 429 for chat %s, retrying in %.1fs", chat_key, delay)
+                chat_bucket.block(delay)
+                continue
+
+            log.error(
+                "Telegram HTTP error %s: %s",
+                resp.status_code,
+                resp.text,
+            )
+            return SendResult(
+                False,
+                retriable=resp.status_code not in PERMANENT_STATUSES,
+                error=f"HTTP {resp.status_code}: {resp.text}"[:500],
+            )
+
+    def close(self) -> None:
+        with _CLIENTS_LOCK:
+            if _CLIENTS.get(self.bot_token) is self:
+                del _CLIENTS[self.bot_token]
+        session, self._session = self._session, None
+        if session is not None:
+            try:
+                session.close()
+            except Exception:
+                pass
+
+
+_CLIENTS: Dict[str, TelegramClient] = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def shared_client(bot_token: str) -> TelegramClient:
+    """The process-wide client for ``bot_token`` (created on first use)."""
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(bot_token)
+        if client is None:
+            client = _CLIENTS[bot_token] = TelegramClient(bot_token)
+        return client
+
 
 def send_telegram(bot_token: str, chat_id: str, text: str) -> bool:
     """
@@ -22,28 +263,11 @@ def send_telegram(bot_token: str, chat_id: str, text: str) -> bool:
         log.error("Telegram send failed: empty token, chat_id or text")
         return False
 
-    url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-
     try:
-        resp = requests.post(
-            url,
-            json={
-                "chat_id": chat_id,
-                "text": text,
-                "disable_web_page_preview": True,
-            },
-            timeout=15,
-        )
+        return shared_client(bot_token).send(chat_id, text)
     except Exception as exc:
         log.error("Telegram send exception: %s", exc)
         return False
 
-    if resp.status_code != 200:
-        log.error(
-            "Telegram HTTP error %s: %s",
-            resp.status_code,
-            resp.text,
-        )
-        return False
 
-    return True
+__all__ = ["SendResult", "TelegramClient", "TokenBucket", "send_telegram", "shared_client"]